@@ -0,0 +1,73 @@
+"""
+Compare pronto's per-term superclasses() traversal with the is_a graph engine.
+
+Loads hp.obo both ways, checks that the include/exclude term sets for each umbrella
+term are identical, and prints the wall time of each approach.
+
+Usage:
+uv run python scripts/benchmark_ontology.py [--obo data/hp.obo] [--umbrella HP:0000005 HP:0000118]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+INGEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(INGEST_DIR))
+
+from pronto import Ontology  # noqa: E402
+
+from src.phenotype_ingest_utils import IsAGraph  # noqa: E402
+
+
+def pronto_split_terms(obo_file: str, umbrella_terms: list[str]) -> dict:
+    """Split the terms as the original implementation did: one superclasses() traversal per term per umbrella term."""
+    onto = Ontology(obo_file)
+    splits = {}
+    for umbrella_term in umbrella_terms:
+        for include in (True, False):
+            splits[umbrella_term, include] = {
+                term.id: term.name
+                for term in onto.terms()
+                if (umbrella_term in {ancestor.id for ancestor in term.superclasses()}) == include
+            }
+    return splits
+
+
+def graph_split_terms(obo_file: str, umbrella_terms: list[str]) -> dict:
+    graph = IsAGraph.from_obo(obo_file)
+    subtrees = graph.descendants(umbrella_terms)
+    splits = {}
+    for umbrella_term in umbrella_terms:
+        for include in (True, False):
+            splits[umbrella_term, include] = {
+                term_id: name
+                for term_id, name in graph.names.items()
+                if (term_id in subtrees[umbrella_term]) == include
+            }
+    return splits
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ontology subtree extraction")
+    parser.add_argument("--obo", default=str(INGEST_DIR / "data" / "hp.obo"), help="Path to the .obo file")
+    parser.add_argument("--umbrella", nargs="+", default=["HP:0000005", "HP:0000118"], help="Umbrella terms")
+    args = parser.parse_args()
+
+    expected, pronto_seconds = timed(pronto_split_terms, args.obo, args.umbrella)
+    actual, graph_seconds = timed(graph_split_terms, args.obo, args.umbrella)
+
+    for (umbrella_term, include), terms in expected.items():
+        assert actual[umbrella_term, include] == terms, f"Mismatch for {umbrella_term} include={include}"
+        print(f"{umbrella_term} include={include}: {len(terms)} terms")
+    print(f"pronto superclasses(): {pronto_seconds:.2f}s")
+    print(f"is_a graph:            {graph_seconds:.2f}s ({pronto_seconds / graph_seconds:.0f}x)")
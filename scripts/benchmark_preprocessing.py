@@ -0,0 +1,145 @@
+"""
+Compare the g2p preprocessing join with and without pre-aggregated HPOA references.
+
+Generates synthetic phenotype.hpoa / genes_to_phenotype.txt / genes_to_disease.txt /
+mondo.sssom.tsv files in a temporary directory, then reports for the previous query
+(g2p joined to every HPOA row, collapsed afterwards by `group by all`) and the current
+one in gene_to_phenotype_extras.py:
+
+  - the number of rows produced by the joins, before any grouping
+  - the wall time of the query (reading the inputs, joining and writing the output)
+
+Usage:
+uv run python scripts/benchmark_preprocessing.py [--rows N] [--hpoa-rows-per-key K]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import runpy
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+INGEST_DIR = Path(__file__).resolve().parent.parent
+PREPROCESS_SCRIPT = INGEST_DIR / "scripts" / "gene_to_phenotype_extras.py"
+
+# The join as it was before references were pre-aggregated
+LEGACY_FROM = """
+from g2p
+     left outer join hpoa on hpoa.hpo_id = g2p.hpo_id
+                 and g2p.disease_id = hpoa.database_id
+                 and hpoa.frequency = g2p.frequency
+     left outer join g2d_grouped on g2p.ncbi_gene_id = g2d_grouped.ncbi_gene_id_clean
+                 and g2p.disease_id = g2d_grouped.disease_id
+     left outer join mondo on mondo.object_id = replace(g2p.disease_id, 'ORPHA:', 'Orphanet:')
+"""
+
+LEGACY_SQL = """
+copy (
+select g2p.*,
+       array_to_string(list(hpoa.reference),';') as publications,
+       coalesce(g2d_grouped.association_types, '') as gene_to_disease_association_types,
+       coalesce(nullif(mondo.mondo_id, ''), replace(g2p.disease_id, 'ORPHA:', 'Orphanet:')) as disease_context_qualifier
+{from_clause}
+group by all
+) to 'legacy.tsv' (delimiter '\t', header true)
+"""
+
+CURRENT_FROM = """
+from g2p
+     left outer join hpoa_references on hpoa_references.hpo_id = g2p.hpo_id
+                 and g2p.disease_id = hpoa_references.database_id
+                 and hpoa_references.frequency = g2p.frequency
+     left outer join g2d_grouped on g2p.ncbi_gene_id = g2d_grouped.ncbi_gene_id_clean
+                 and g2p.disease_id = g2d_grouped.disease_id
+     left outer join mondo on mondo.object_id = replace(g2p.disease_id, 'ORPHA:', 'Orphanet:')
+"""
+
+
+def write_inputs(rows: int, hpoa_rows_per_key: int, seed: int = 0):
+    """Write synthetic inputs to data/ in the working directory."""
+    rng = random.Random(seed)  # noqa: S311
+    Path("data").mkdir()
+    diseases = [f"OMIM:{600000 + i}" for i in range(max(rows // 50, 1))]
+    frequencies = ["-", "1/2", "3/10", "HP:0040283", "40%"]
+
+    g2p = []
+    with open("data/phenotype.hpoa", "w") as hpoa:
+        hpoa.write("#description: synthetic\n#version: 2026-01-01\n#tracker: none\n#hpo-version: none\n")
+        hpoa.write("database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\t"
+                   "modifier\taspect\tbiocuration\n")
+        for _row in range(rows):
+            gene, disease = rng.randrange(rows // 10 + 1), rng.choice(diseases)
+            hpo_id, frequency = f"HP:{rng.randrange(20000):07d}", rng.choice(frequencies)
+            g2p.append((gene, hpo_id, frequency, disease))
+            for _ in range(hpoa_rows_per_key):
+                references = ";".join(f"PMID:{rng.randrange(rows)}" for _ in range(rng.randint(1, 3)))
+                hpoa.write(f"{disease}\tDisease\t\t{hpo_id}\t{disease};{references}\tPCS\t\t{frequency}\t\t\tP\t"
+                           f"HPO:probinson[2020-01-01]\n")
+
+    with open("data/genes_to_phenotype.txt", "w") as f:
+        f.write("ncbi_gene_id\tgene_symbol\thpo_id\thpo_name\tfrequency\tdisease_id\n")
+        for gene, hpo_id, frequency, disease in g2p:
+            f.write(f"{gene}\tGENE{gene}\t{hpo_id}\tPhenotype\t{frequency}\t{disease}\n")
+
+    with open("data/genes_to_disease.txt", "w") as f:
+        f.write("ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource\n")
+        for gene, _, _, disease in set(g2p):
+            f.write(f"NCBIGene:{gene}\tGENE{gene}\tMENDELIAN\t{disease}\tftp://ftp.omim.org/omim/genemap2.txt\n")
+
+    with open("data/mondo.sssom.tsv", "w") as f:
+        f.write("#curie_map: {}\n")
+        f.write("subject_id\tsubject_label\tpredicate_id\tobject_id\tobject_label\tmapping_justification\n")
+        for i, disease in enumerate(diseases):
+            f.write(f"MONDO:{i:07d}\tDisease\tskos:exactMatch\t{disease}\tDisease\tsemapv:ManualMappingCuration\n")
+
+
+class PreprocessingQuery:
+    """The preprocessing script's CTEs, loaded into a DuckDB connection with the Mondo index as `mondo`."""
+
+    def __init__(self, script: dict):
+        """Build the legacy and current queries on the script's CTEs, and register the Mondo index."""
+        sql = script["PREPROCESS_SQL"]
+        self.ctes = sql[sql.index("with"):sql.index("select g2p.*")]
+        self.legacy_sql = LEGACY_SQL.format(from_clause=LEGACY_FROM).replace("copy (", f"copy (\n{self.ctes}", 1)
+        self.current_sql = sql.format(output_file="current.tsv", copy_options=script["OUTPUT_FORMATS"]["tsv"])
+        self.parameters = {**script["COLUMNS"], "hpoa_skip": script["comment_lines"]("data/phenotype.hpoa")}
+        self.db = duckdb.connect(":memory:")
+        self.db.register("mondo", script["mondo_index"].load_mondo_index("data/mondo.sssom.tsv").columns())
+
+    def join_rows(self, from_clause: str) -> int:
+        """Rows produced by the joins, before any grouping."""
+        return self.db.execute(f"{self.ctes} select count(*) {from_clause}", self.parameters).fetchone()[0]
+
+    def seconds(self, sql: str) -> float:
+        start = time.perf_counter()
+        self.db.execute(sql, self.parameters)
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the g2p preprocessing join")
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic genes_to_phenotype rows")
+    parser.add_argument("--hpoa-rows-per-key", type=int, default=3, help="HPOA rows per (hpo_id, disease, frequency)")
+    args = parser.parse_args()
+
+    script = runpy.run_path(str(PREPROCESS_SCRIPT))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_inputs(args.rows, args.hpoa_rows_per_key)
+
+        query = PreprocessingQuery(script)
+        legacy_rows = query.join_rows(LEGACY_FROM)
+        current_rows = query.join_rows(CURRENT_FROM)
+        legacy_seconds = query.seconds(query.legacy_sql)
+        current_seconds = query.seconds(query.current_sql)
+        query.db.close()
+
+    print(f"{'query':<12}{'join rows':>14}{'seconds':>10}")
+    print(f"{'legacy':<12}{legacy_rows:>14,}{legacy_seconds:>10.2f}")
+    print(f"{'current':<12}{current_rows:>14,}{current_seconds:>10.2f}")
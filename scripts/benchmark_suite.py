@@ -0,0 +1,301 @@
+"""
+Throughput benchmarks for the ingest, over synthetic data, compared against a baseline.
+
+Generates synthetic inputs at the given scale (see scripts/synthetic_data.py) and runs:
+
+  - the g2p DuckDB preprocessing (gene_to_phenotype_extras.preprocess)
+  - read_ontology_to_exclusion_terms over hp.obo (repeated for MIN_SECONDS)
+  - reading each transform's input into the rows its transform_record receives, as
+    src.pipeline reads it (only the yaml's `row_columns`; see src/input_rows.py)
+  - each transform's transform_record over those rows (the rows are read into memory
+    first, untimed; the validation mode and interning are as in the transform's yaml)
+  - the same, keeping every edge in memory, with the edges' repeated values interned
+    (`.edges`) and built afresh for each edge (`.edges_not_interned`): the difference in
+    peak RSS and rows/sec is what src.phenotype_ingest_utils.ValueInterner saves and costs
+
+Each benchmark runs in a fresh process, so its peak RSS (which includes the imports) is
+its own. Inputs a benchmark needs that the synthetic data doesn't include (the g2p
+transform's preprocessed file) are prepared first, untimed, in a process of their own,
+so any benchmark can be run alone with --only. Logging is at INFO and above while
+benchmarking: koza logs every filtered row at DEBUG.
+
+Rows/sec and peak RSS are printed, and with --baseline compared against a stored run:
+a benchmark regresses when its rows/sec drops, or its peak RSS grows, by more than
+--tolerance, and the script then exits with status 1. Baselines are only comparable
+on the same machine and scale; --save-baseline records a new one.
+
+Usage:
+uv run python scripts/benchmark_suite.py [--scale 1] [--baseline scripts/benchmark_baseline.json]
+uv run python scripts/benchmark_suite.py --scale 10 --save-baseline baseline-10x.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import runpy
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+INGEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(INGEST_DIR))
+
+from synthetic_data import write_synthetic_data  # noqa: E402
+
+PREPROCESS_SCRIPT = INGEST_DIR / "scripts" / "gene_to_phenotype_extras.py"
+DEFAULT_BASELINE = INGEST_DIR / "scripts" / "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.2
+MIN_SECONDS = 2.0
+LOG_LEVEL = "INFO"
+
+# Transforms in the order they are benchmarked, with the data file their reader is pointed at
+TRANSFORMS = {
+    "disease_to_phenotype_transform": "phenotype.hpoa",
+    "disease_mode_of_inheritance_transform": "phenotype.hpoa",
+    "gene_to_disease_transform": "genes_to_disease.txt",
+    "gene_to_phenotype_transform": "genes_to_phenotype_preprocessed.tsv",
+}
+
+
+# Data files benchmarks read that synthetic_data.py doesn't write
+REQUIRES = {
+    f"gene_to_phenotype_transform.{kind}": ("genes_to_phenotype_preprocessed.tsv",)
+    for kind in ("read", "transform_record", "edges", "edges_not_interned")
+}
+
+
+def prepare_preprocessed():
+    runpy.run_path(str(PREPROCESS_SCRIPT))["preprocess"]()
+
+
+# Steps writing the files in REQUIRES
+PREPARE: dict[str, Callable[[], None]] = {"genes_to_phenotype_preprocessed.tsv": prepare_preprocessed}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_preprocessing() -> tuple[int, float]:
+    preprocess = runpy.run_path(str(PREPROCESS_SCRIPT))["preprocess"]
+    with open("data/genes_to_phenotype.txt") as f:
+        rows = sum(1 for _ in f) - 1
+    start = time.perf_counter()
+    preprocess(force=True)
+    return rows, time.perf_counter() - start
+
+
+def bench_ontology() -> tuple[int, float]:
+    from src.phenotype_ingest_utils import read_obo_is_a, read_ontology_to_exclusion_terms
+
+    terms = len(read_obo_is_a("data/hp.obo")[0])
+    # One pass takes a fraction of a second; repeat it for a stable rate
+    rows, start = 0, time.perf_counter()
+    while rows == 0 or time.perf_counter() - start < MIN_SECONDS:
+        read_ontology_to_exclusion_terms("data/hp.obo", umbrella_term="HP:0000118", include=False)
+        rows += terms
+    return rows, time.perf_counter() - start
+
+
+def _transform_input(name: str, **extra_fields):
+    """
+    Return a transform's hooks, a KozaTransform for it, and an iterator of the rows its transform_record receives.
+
+    :param extra_fields: `transform:` fields overriding the transform's yaml
+    """
+    from koza import KozaTransform
+    from koza.io.writer.passthrough_writer import PassthroughWriter
+    from koza.model.formats import OutputFormat
+    from koza.runner import KozaRunner
+
+    from src.parquet_io import read_runner_input
+
+    config, runner = KozaRunner.from_config_file(
+        str(INGEST_DIR / "src" / f"{name}.yaml"),
+        output_format=OutputFormat.passthrough,
+        input_files=[str(Path("data", TRANSFORMS[name]).resolve())],
+    )
+    hooks = runner.hooks_by_tag[None]
+    koza_transform = KozaTransform(
+        mappings=runner.load_mappings(),
+        writer=PassthroughWriter(),
+        extra_fields={**runner.extra_transform_fields, **extra_fields},
+    )
+    return hooks, koza_transform, read_runner_input(runner, config.reader)
+
+
+def bench_read(name: str) -> tuple[int, float]:
+    _, _, rows = _transform_input(name)
+    count, start = 0, time.perf_counter()
+    for _ in rows:
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def bench_transform(name: str, keep_edges: bool = False, intern_values: Optional[bool] = None) -> tuple[int, float]:
+    """Time transform_record over the transform's rows; intern_values, if given, overrides the yaml's."""
+    extra_fields = {} if intern_values is None else {"intern_values": intern_values}
+    hooks, koza_transform, rows = _transform_input(name, **extra_fields)
+    rows = list(rows)
+    transform_record = hooks.transform_record[0]
+
+    # The first row loads anything loaded lazily (e.g. hp.obo for modes of inheritance)
+    transform_record(koza_transform, rows[0])
+    edges = []
+    start = time.perf_counter()
+    for row in rows:
+        entities = transform_record(koza_transform, row)
+        if keep_edges:
+            edges.extend(entities)
+    return len(rows), time.perf_counter() - start
+
+
+BENCHMARKS: dict[str, tuple[Callable[..., tuple[int, float]], tuple]] = {
+    "preprocessing": (bench_preprocessing, ()),
+    "read_ontology_to_exclusion_terms": (bench_ontology, ()),
+    **{f"{name}.read": (bench_read, (name,)) for name in TRANSFORMS},
+    **{f"{name}.transform_record": (bench_transform, (name,)) for name in TRANSFORMS},
+    **{f"{name}.edges": (bench_transform, (name, True, True)) for name in TRANSFORMS},
+    **{f"{name}.edges_not_interned": (bench_transform, (name, True, False)) for name in TRANSFORMS},
+}
+
+
+def _enter(workdir: str):
+    from loguru import logger
+
+    os.chdir(workdir)
+    logger.remove()
+    logger.add(sys.stderr, level=LOG_LEVEL)
+
+
+def _prepare_in_process(file_name: str, workdir: str):
+    _enter(workdir)
+    PREPARE[file_name]()
+
+
+def _run_in_process(fn: Callable[..., tuple[int, float]], args: tuple, workdir: str) -> dict:
+    _enter(workdir)
+    rows, seconds = fn(*args)
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def prepare(workdir: str, name: str):
+    """
+    Write the files benchmark name needs into workdir/data/, unless they are there already.
+
+    :raises FileNotFoundError: if a missing file has no step in PREPARE
+    """
+    for file_name in REQUIRES.get(name, ()):
+        if (Path(workdir) / "data" / file_name).exists():
+            continue
+        if file_name not in PREPARE:
+            raise FileNotFoundError(f"{name} needs data/{file_name}, which nothing in PREPARE writes")
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(_prepare_in_process, file_name, workdir).result()
+
+
+def run_benchmarks(workdir: str, names: Optional[list[str]] = None) -> dict[str, dict]:
+    """
+    Run the benchmarks against workdir/data/, each in its own process, preparing their inputs first.
+
+    :param workdir: directory containing data/ with the (synthetic) inputs
+    :param names: benchmarks to run (all by default); they run in BENCHMARKS order
+    :return: dict of benchmark name to rows, seconds, rows_per_second and peak_rss_mb
+    """
+    results = {}
+    for name, (fn, args) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        prepare(workdir, name)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[name] = pool.submit(_run_in_process, fn, args, workdir).result()
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """
+    Regressions of results against baseline.
+
+    :param results: this run's results, as returned by run_benchmarks
+    :param baseline: a previous run's results
+    :param tolerance: allowed relative drop in rows/sec, or growth in peak RSS
+    :return: one message per regression
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["rows_per_second"] < base["rows_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['rows_per_second']:,.0f} rows/sec vs {base['rows_per_second']:,.0f} in the baseline"
+            )
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']:,.0f} MB vs {base['peak_rss_mb']:,.0f} MB in the baseline"
+            )
+    return regressions
+
+
+def _change(value: float, base: Optional[float]) -> str:
+    return f"{(value / base - 1) * 100:+.0f}%" if base else ""
+
+
+def print_results(results: dict[str, dict], baseline: dict[str, dict]):
+    print(f"{'benchmark':<58}{'rows':>10}{'rows/sec':>12}{'vs base':>9}{'peak RSS MB':>13}{'vs base':>9}")
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print(
+            f"{name:<58}{result['rows']:>10,}{result['rows_per_second']:>12,.0f}"
+            f"{_change(result['rows_per_second'], base.get('rows_per_second')):>9}"
+            f"{result['peak_rss_mb']:>13,.0f}{_change(result['peak_rss_mb'], base.get('peak_rss_mb')):>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Synthetic data size relative to the upstream files")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's results to a baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative drop in rows/sec or growth in peak RSS")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic_data(Path(workdir) / "data", args.scale, args.seed)
+        results = run_benchmarks(workdir, args.only)
+
+    baseline = {}
+    if args.baseline and Path(args.baseline).exists():
+        stored = json.loads(Path(args.baseline).read_text())
+        if stored["scale"] == args.scale:
+            baseline = stored["results"]
+        else:
+            print(f"Not comparing against {args.baseline}: it is for scale {stored['scale']}, not {args.scale}")
+
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"scale": args.scale, "seed": args.seed, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.save_baseline}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
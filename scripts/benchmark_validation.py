@@ -0,0 +1,98 @@
+"""
+Compare transform_record throughput with and without Biolink model validation.
+
+Runs each transform's transform_record over a representative row, once per
+validation mode (see phenotype_ingest_utils.build_association), and prints
+rows/sec and the speedup over full validation.
+
+Usage:
+uv run python scripts/benchmark_validation.py [--rows N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+INGEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(INGEST_DIR))
+
+from koza import KozaTransform  # noqa: E402
+from koza.io.writer.passthrough_writer import PassthroughWriter  # noqa: E402
+
+import src.disease_mode_of_inheritance_transform as moi  # noqa: E402
+from src import (  # noqa: E402
+    disease_to_phenotype_transform,
+    gene_to_disease_transform,
+    gene_to_phenotype_transform,
+)
+from src.phenotype_ingest_utils import VALIDATION_ALL, VALIDATION_NONE, VALIDATION_SAMPLE  # noqa: E402
+
+HPOA_ROW = {
+    "database_id": "OMIM:117650",
+    "disease_name": "Cerebrocostomandibular syndrome",
+    "qualifier": "",
+    "hpo_id": "HP:0001545",
+    "reference": "OMIM:117650;PMID:12345",
+    "evidence": "TAS",
+    "onset": "",
+    "frequency": "3/20",
+    "sex": "FEMALE",
+    "modifier": "",
+    "aspect": "P",
+    "biocuration": "HPO:skoehler[2017-07-13]",
+}
+
+TRANSFORMS = {
+    "disease_to_phenotype": (disease_to_phenotype_transform.transform_record, HPOA_ROW),
+    "disease_mode_of_inheritance": (moi.transform_record, {**HPOA_ROW, "hpo_id": "HP:0000006", "aspect": "I"}),
+    "gene_to_disease": (gene_to_disease_transform.transform_record, {
+        "ncbi_gene_id": "NCBIGene:64170",
+        "gene_symbol": "CARD9",
+        "association_type": "MENDELIAN",
+        "disease_id": "OMIM:212050",
+        "source": "ftp://ftp.ncbi.nlm.nih.gov/gene/DATA/mim2gene_medgen",
+    }),
+    "gene_to_phenotype": (gene_to_phenotype_transform.transform_record, {
+        "ncbi_gene_id": "8192",
+        "gene_symbol": "CLPP",
+        "hpo_id": "HP:0000252",
+        "hpo_name": "Microcephaly",
+        "frequency": "3/10",
+        "disease_id": "OMIM:614129",
+        "publications": "PMID:1234567;OMIM:614129",
+        "gene_to_disease_association_types": "MENDELIAN",
+        "disease_context_qualifier": "MONDO:0013588",
+    }),
+}
+
+
+def rows_per_second(transform_record, row, validation: str, rows: int) -> float:
+    koza_transform = KozaTransform(
+        mappings={},
+        writer=PassthroughWriter(),
+        extra_fields={"validation": validation},
+    )
+    start = time.perf_counter()
+    for _ in range(rows):
+        transform_record(koza_transform, row)
+    return rows / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transform throughput by validation mode")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows to transform per measurement")
+    args = parser.parse_args()
+
+    # Skip loading hp.obo; the benchmark row uses a known mode of inheritance term
+    moi._modes_of_inheritance = {"HP:0000006"}
+
+    print(f"{'transform':<30}{'validation':>12}{'rows/sec':>12}{'speedup':>10}")
+    for name, (transform_record, row) in TRANSFORMS.items():
+        baseline = None
+        for validation in (VALIDATION_ALL, VALIDATION_SAMPLE, VALIDATION_NONE):
+            rate = rows_per_second(transform_record, row, validation, args.rows)
+            baseline = baseline or rate
+            print(f"{name:<30}{validation:>12}{rate:>12,.0f}{rate / baseline:>9.1f}x")
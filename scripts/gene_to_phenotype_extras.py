@@ -1,31 +1,252 @@
+"""
+Build data/genes_to_phenotype_preprocessed.tsv for the gene to phenotype transform.
+
+Joins genes_to_phenotype.txt with the publications in phenotype.hpoa, the association
+types in genes_to_disease.txt and the Mondo exact matches of mondo.sssom.tsv, which are
+read from the index compiled once per SSSOM download (see src/mondo_index.py).
+
+Every input is read with an explicit all-VARCHAR schema, so DuckDB doesn't sniff
+types, and the leading `#` metadata lines of phenotype.hpoa are skipped. Threads,
+memory limit and the spill directory can be capped for shared build nodes, and
+--profile writes the EXPLAIN ANALYZE plan of the join.
+
+The sha256 of every input and of the SQL below, and the output's columns, are recorded
+in a manifest next to the output. If a later run finds the same manifest (and the output
+is still there), it is skipped; pass --force to rebuild anyway. An output written by an
+older version of this script, with other columns, is always rebuilt.
+
+With --output-format parquet the output is written as
+data/genes_to_phenotype_preprocessed.parquet instead, which the gene to phenotype
+transform reads when run with `intermediate_format: 'parquet'`.
+
+Usage:
+uv run python scripts/gene_to_phenotype_extras.py [--force] [--threads N] [--memory-limit 4GB]
+    [--temp-directory DIR] [--profile FILE] [--output-format tsv|parquet]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Optional
+
 import duckdb
 
-db = duckdb.connect(":memory:", read_only=False)
-db.execute("""
+INGEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(INGEST_DIR))
+
+from src import mondo_index  # noqa: E402
+
+INPUT_FILES = [
+    "data/phenotype.hpoa",
+    "data/genes_to_phenotype.txt",
+    "data/genes_to_disease.txt",
+    "data/mondo.sssom.tsv",
+]
+OUTPUT_FILE = "data/genes_to_phenotype_preprocessed.tsv"
+MANIFEST_SUFFIX = ".manifest.json"
+
+# COPY options per output format; the Parquet file sits next to the TSV (see src/parquet_io.py)
+OUTPUT_FORMATS = {
+    "tsv": "delimiter '\t', header true",
+    "parquet": "format parquet, compression zstd",
+}
+
+
+# Columns of the output, in order (the reader columns of src/gene_to_phenotype_transform.yaml)
+OUTPUT_COLUMNS = [
+    "ncbi_gene_id", "gene_symbol", "hpo_id", "hpo_name", "frequency", "disease_id",
+    "publications", "gene_to_disease_association_types", "disease_context_qualifier",
+]
+
+
+def _varchar_columns(*names: str) -> dict:
+    return {name: "VARCHAR" for name in names}
+
+
+# Explicit schemas for read_csv (column names as in the koza transform configs)
+COLUMNS = {
+    "hpoa_columns": _varchar_columns(
+        "database_id", "disease_name", "qualifier", "hpo_id", "reference", "evidence",
+        "onset", "frequency", "sex", "modifier", "aspect", "biocuration",
+    ),
+    "g2p_columns": _varchar_columns("ncbi_gene_id", "gene_symbol", "hpo_id", "hpo_name", "frequency", "disease_id"),
+    "g2d_columns": _varchar_columns("ncbi_gene_id", "gene_symbol", "association_type", "disease_id", "source"),
+}
+
+# HPOA references and g2d association types are collapsed to one row per join key before the
+# join, so each g2p row matches at most one row on each side and the join never fans out.
+# `mondo` (object_id, mondo_id) is the Mondo exact-match index, one row per id
+PREPROCESS_SQL = """
 copy (
 with
-  hpoa as (select * from read_csv('data/phenotype.hpoa')),
-  g2p as (select * from read_csv('data/genes_to_phenotype.txt')),
+  hpoa as (select * from read_csv('data/phenotype.hpoa', delim='\t', quote='"', skip=$hpoa_skip, header=true,
+                                  columns=$hpoa_columns)),
+  g2p as (select distinct * from read_csv('data/genes_to_phenotype.txt', delim='\t', quote='"', header=true,
+                                          columns=$g2p_columns)),
   g2d as (select 
     replace(ncbi_gene_id, 'NCBIGene:', '') as ncbi_gene_id_clean,
     disease_id, 
     association_type 
-    from read_csv('data/genes_to_disease.txt')),
+    from read_csv('data/genes_to_disease.txt', delim='\t', quote='"', header=true, columns=$g2d_columns)),
+  hpoa_references as (select
+    hpo_id,
+    database_id,
+    frequency,
+    -- every reference of every HPOA row for the key, split, deduplicated and sorted
+    array_to_string(list_sort(list_filter(
+        list_distinct(string_split(string_agg(replace(reference, ' ', ''), ';'), ';')),
+        p -> p != '')), ';') as publications
+    from hpoa
+    group by hpo_id, database_id, frequency),
   g2d_grouped as (select 
     ncbi_gene_id_clean,
     disease_id,
-    array_to_string(list(distinct association_type), ';') as association_types
+    array_to_string(list_sort(list(distinct association_type)), ';') as association_types
     from g2d 
     group by ncbi_gene_id_clean, disease_id)
 select g2p.*, 
-       array_to_string(list(hpoa.reference),';') as publications,
-       coalesce(g2d_grouped.association_types, '') as gene_to_disease_association_types
+       coalesce(hpoa_references.publications, '') as publications,
+       coalesce(g2d_grouped.association_types, '') as gene_to_disease_association_types,
+       coalesce(nullif(mondo.mondo_id, ''), replace(g2p.disease_id, 'ORPHA:', 'Orphanet:')) as disease_context_qualifier
 from g2p
-     left outer join hpoa on hpoa.hpo_id = g2p.hpo_id
-                 and g2p.disease_id = hpoa.database_id
-		             and hpoa.frequency = g2p.frequency
+     left outer join hpoa_references on hpoa_references.hpo_id = g2p.hpo_id
+                 and g2p.disease_id = hpoa_references.database_id
+                 and hpoa_references.frequency = g2p.frequency
      left outer join g2d_grouped on g2p.ncbi_gene_id = g2d_grouped.ncbi_gene_id_clean
                  and g2p.disease_id = g2d_grouped.disease_id
-group by all
-) to 'data/genes_to_phenotype_preprocessed.tsv' (delimiter '\t', header true)
-""")
+     left outer join mondo on mondo.object_id = replace(g2p.disease_id, 'ORPHA:', 'Orphanet:')
+) to '{output_file}' ({copy_options})
+"""
+
+
+# Read back the header of the output, to check it against OUTPUT_COLUMNS
+OUTPUT_COLUMNS_SQL = {
+    "tsv": "select * from read_csv(?, delim='\t', header=true, all_varchar=true) limit 0",
+    "parquet": "select * from read_parquet(?) limit 0",
+}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def comment_lines(path: str) -> int:
+    """Count the `#` metadata lines at the top of a file."""
+    count = 0
+    with open(path) as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            count += 1
+    return count
+
+
+def build_manifest() -> dict:
+    """Hashes of everything the output depends on."""
+    # The Mondo index's SQL too, so a change to how it is compiled rebuilds the output
+    sql = mondo_index.EXACT_MATCH_SQL + mondo_index.INDEX_SQL + PREPROCESS_SQL + json.dumps(COLUMNS, sort_keys=True)
+    return {
+        "inputs": {path: file_sha256(path) for path in INPUT_FILES},
+        "sql": hashlib.sha256(sql.encode()).hexdigest(),
+        "duckdb": duckdb.__version__,
+        "columns": OUTPUT_COLUMNS,
+    }
+
+
+def output_file(output_format: str = "tsv") -> str:
+    return str(Path(OUTPUT_FILE).with_suffix(f".{output_format}"))
+
+
+def read_manifest(manifest_file: str) -> dict | None:
+    try:
+        with open(manifest_file) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def preprocess(
+    force: bool = False,
+    threads: Optional[int] = None,
+    memory_limit: Optional[str] = None,
+    temp_directory: Optional[str] = None,
+    profile: Optional[str] = None,
+    output_format: str = "tsv",
+) -> bool:
+    """
+    Write the preprocessed file unless it is up to date with its inputs.
+
+    :param force: rebuild even if the manifest matches
+    :param threads: DuckDB worker threads (defaults to the number of cores)
+    :param memory_limit: DuckDB memory limit, e.g. "4GB" (defaults to 80% of RAM)
+    :param temp_directory: where DuckDB spills when over the memory limit
+    :param profile: write the EXPLAIN ANALYZE plan of the join to this file (implies a rebuild)
+    :param output_format: "tsv" or "parquet"
+    :return: True if the output was rebuilt, False if the run was skipped
+    """
+    output = output_file(output_format)
+    manifest_file = output + MANIFEST_SUFFIX
+    manifest = build_manifest()
+    previous = read_manifest(manifest_file)
+    if not force and not profile and previous is not None and Path(output).exists():
+        output_sha256 = previous.pop("output", None)
+        if previous == manifest and output_sha256 == file_sha256(output):
+            print(f"{output} is up to date with its inputs, skipping (use --force to rebuild)")
+            return False
+
+    # Drop the manifest first, so a failed run is never mistaken for an up to date one
+    Path(manifest_file).unlink(missing_ok=True)
+
+    config = {"threads": threads, "memory_limit": memory_limit, "temp_directory": temp_directory}
+    parameters = {**COLUMNS, "hpoa_skip": comment_lines("data/phenotype.hpoa")}
+    mondo = mondo_index.load_mondo_index("data/mondo.sssom.tsv", manifest["inputs"]["data/mondo.sssom.tsv"])
+    db = duckdb.connect(":memory:", read_only=False, config={k: v for k, v in config.items() if v is not None})
+    try:
+        db.register("mondo", mondo.columns())
+        copy_sql = PREPROCESS_SQL.format(output_file=output, copy_options=OUTPUT_FORMATS[output_format])
+        if profile:
+            plan = db.execute("explain analyze " + copy_sql, parameters).fetchall()
+            Path(profile).write_text("\n".join(text for _, text in plan))
+            print(f"Wrote query profile to {profile}")
+        else:
+            db.execute(copy_sql, parameters)
+        written = db.execute(OUTPUT_COLUMNS_SQL[output_format], [output])
+        columns = [description[0] for description in written.description]
+        if columns != OUTPUT_COLUMNS:
+            raise RuntimeError(f"{output} has columns {columns}, expected {OUTPUT_COLUMNS}")
+    finally:
+        db.close()
+
+    manifest["output"] = file_sha256(output)
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {output}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the inputs haven't changed")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB worker threads")
+    parser.add_argument("--memory-limit", default=None, help="DuckDB memory limit, e.g. 4GB")
+    parser.add_argument("--temp-directory", default=None, help="Directory DuckDB spills to over the memory limit")
+    parser.add_argument("--profile", default=None, help="Write the EXPLAIN ANALYZE plan of the join to this file")
+    parser.add_argument("--output-format", choices=list(OUTPUT_FORMATS), default="tsv", help="Format of the output")
+    args = parser.parse_args()
+
+    preprocess(
+        force=args.force,
+        threads=args.threads,
+        memory_limit=args.memory_limit,
+        temp_directory=args.temp_directory,
+        profile=args.profile,
+        output_format=args.output_format,
+    )
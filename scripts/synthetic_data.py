@@ -0,0 +1,220 @@
+"""
+Write synthetic versions of the ingest's input files at a chosen scale.
+
+Generates, in an output directory laid out like data/:
+
+  - phenotype.hpoa           — P/I/C annotations for OMIM, ORPHA and DECIPHER diseases
+  - genes_to_phenotype.txt   — the P annotations of each gene's diseases
+  - genes_to_disease.txt     — gene to disease associations (medgen rows for OMIM, orphadata for ORPHA)
+  - mondo.sssom.tsv          — exact (and some broad) matches to the OMIM/Orphanet diseases
+  - hp.obo                   — an is_a DAG with the real mode of inheritance, frequency and
+                               onset terms, plus generated phenotypic abnormality terms
+
+Scale 1 approximates the size of the current upstream files (SCALE_1); row counts grow
+linearly with the scale, which may be fractional. Files are written row by row, so even
+large scales only hold one disease's annotations in memory. Output is deterministic for
+a given scale and seed.
+
+Usage:
+uv run python scripts/synthetic_data.py OUTPUT_DIR [--scale 10] [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+
+# Approximate sizes of the upstream files at scale 1
+SCALE_1 = {
+    "diseases": 12500,
+    "annotations_per_disease": 22,
+    "genes": 5000,
+    "phenotype_terms": 19000,
+}
+
+# Real HP terms the transforms look for
+MODE_OF_INHERITANCE_TERMS = {
+    "HP:0000006": "Autosomal dominant inheritance",
+    "HP:0000007": "Autosomal recessive inheritance",
+    "HP:0001417": "X-linked inheritance",
+    "HP:0001419": "X-linked recessive inheritance",
+    "HP:0001427": "Mitochondrial inheritance",
+}
+FREQUENCY_TERMS = {
+    "HP:0040280": "Obligate",
+    "HP:0040281": "Very frequent",
+    "HP:0040282": "Frequent",
+    "HP:0040283": "Occasional",
+    "HP:0040284": "Very rare",
+    "HP:0040285": "Excluded",
+}
+ONSET_TERMS = {
+    "HP:0003577": "Congenital onset",
+    "HP:0003593": "Infantile onset",
+    "HP:0011463": "Childhood onset",
+    "HP:0003581": "Adult onset",
+}
+FIRST_PHENOTYPE_TERM = 1000000  # HP:1000000 onwards, clear of real term ids
+
+HPOA_COLUMNS = [
+    "database_id", "disease_name", "qualifier", "hpo_id", "reference", "evidence",
+    "onset", "frequency", "sex", "modifier", "aspect", "biocuration",
+]
+SOURCES = {
+    "OMIM": "ftp://ftp.ncbi.nlm.nih.gov/gene/DATA/mim2gene_medgen",
+    "ORPHA": "https://www.orphadata.com/data/xml/en_product6.xml",
+}
+
+
+def scaled(name: str, scale: float, minimum: int = 1) -> int:
+    return max(int(SCALE_1[name] * scale), minimum)
+
+
+def phenotype_term(i: int) -> str:
+    return f"HP:{FIRST_PHENOTYPE_TERM + i:07d}"
+
+
+def write_hp_obo(path: Path, phenotype_terms: int, rng: random.Random):
+    """Write an is_a DAG: each generated term has one or two parents among the terms before it."""
+    with open(path, "w") as f:
+        f.write("format-version: 1.2\ndata-version: hp/releases/2026-01-08\nontology: hp\n")
+
+        def term(term_id: str, name: str, parents: list[str]):
+            f.write(f"\n[Term]\nid: {term_id}\nname: {name}\n")
+            for parent in parents:
+                f.write(f"is_a: {parent}\n")
+
+        term("HP:0000001", "All", [])
+        term("HP:0000005", "Mode of inheritance", ["HP:0000001"])
+        for term_id, name in MODE_OF_INHERITANCE_TERMS.items():
+            term(term_id, name, ["HP:0000005"])
+        term("HP:0040279", "Frequency", ["HP:0000001"])
+        for term_id, name in FREQUENCY_TERMS.items():
+            term(term_id, name, ["HP:0040279"])
+        term("HP:0003674", "Onset", ["HP:0000001"])
+        for term_id, name in ONSET_TERMS.items():
+            term(term_id, name, ["HP:0003674"])
+        term("HP:0000118", "Phenotypic abnormality", ["HP:0000001"])
+        for i in range(phenotype_terms):
+            parents = [phenotype_term(p) for p in rng.sample(range(i), min(i, rng.randint(1, 2)))]
+            term(phenotype_term(i), f"Synthetic abnormality {i}", parents or ["HP:0000118"])
+
+
+def _frequency(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        return ""
+    if kind < 0.75:
+        return rng.choice(list(FREQUENCY_TERMS))
+    if kind < 0.95:
+        total = rng.randint(1, 40)
+        return f"{rng.randint(0, total)}/{total}"
+    return f"{rng.randint(1, 100)}%"
+
+
+def _biocuration(rng: random.Random) -> str:
+    curators = ["probinson", "skoehler", "lccarmody"]
+    return ";".join(
+        f"HPO:{rng.choice(curators)}[{rng.randint(2009, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}]"
+        for _ in range(rng.randint(1, 2))
+    )
+
+
+def write_synthetic_data(output_dir, scale: float = 1.0, seed: int = 0) -> dict[str, int]:
+    """
+    Write the synthetic input files to output_dir.
+
+    :param output_dir: directory to write to (created if needed)
+    :param scale: size relative to the current upstream files
+    :param seed: random seed
+    :return: dict of file name to number of data rows (terms for hp.obo)
+    """
+    rng = random.Random(seed)  # noqa: S311
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    n_diseases = scaled("diseases", scale)
+    n_genes = scaled("genes", scale)
+    n_terms = scaled("phenotype_terms", scale, minimum=10)
+    per_disease = SCALE_1["annotations_per_disease"]
+    write_hp_obo(output_dir / "hp.obo", n_terms, rng)
+    counts = {"hp.obo": n_terms + len(MODE_OF_INHERITANCE_TERMS) + len(FREQUENCY_TERMS) + len(ONSET_TERMS) + 5}
+    counts.update({"phenotype.hpoa": 0, "genes_to_phenotype.txt": 0, "genes_to_disease.txt": 0, "mondo.sssom.tsv": 0})
+
+    with open(output_dir / "phenotype.hpoa", "w") as hpoa, \
+            open(output_dir / "genes_to_phenotype.txt", "w") as g2p, \
+            open(output_dir / "genes_to_disease.txt", "w") as g2d, \
+            open(output_dir / "mondo.sssom.tsv", "w") as sssom:
+        hpoa.write(f'#description: "HPO annotations for rare diseases [{n_diseases}: OMIM; ORPHANET; DECIPHER]"\n'
+                   "#version: 2026-01-08\n"
+                   "#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues\n"
+                   "#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json\n")
+        hpoa.write("\t".join(HPOA_COLUMNS) + "\n")
+        g2p.write("ncbi_gene_id\tgene_symbol\thpo_id\thpo_name\tfrequency\tdisease_id\n")
+        g2d.write("ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource\n")
+        sssom.write("".join(f"#{key}: synthetic\n" for key in ("mapping_set_id", "license", "mapping_date")))
+        sssom.write("subject_id\tsubject_label\tpredicate_id\tobject_id\tobject_label\tmapping_justification\n")
+
+        for d in range(n_diseases):
+            kind = rng.random()
+            prefix = "OMIM" if kind < 0.6 else "ORPHA" if kind < 0.95 else "DECIPHER"
+            disease_id = f"{prefix}:{100000 + d}"
+            disease_name = f"Synthetic disease {d}"
+
+            annotations = []
+            for _ in range(max(1, int(rng.expovariate(1 / per_disease)))):
+                hpo_id = phenotype_term(rng.randrange(n_terms))
+                annotations.append((hpo_id, _frequency(rng)))
+                qualifier = "NOT" if rng.random() < 0.02 else ""
+                sex = rng.choice(["FEMALE", "MALE"]) if rng.random() < 0.01 else ""
+                onset = rng.choice(list(ONSET_TERMS)) if rng.random() < 0.05 else ""
+                evidence = "IEA" if prefix == "ORPHA" else rng.choice(["PCS", "TAS", "TAS", "IEA"])
+                reference = f"{disease_id};PMID:{rng.randrange(40000000)}" if rng.random() < 0.3 else disease_id
+                hpoa.write(f"{disease_id}\t{disease_name}\t{qualifier}\t{hpo_id}\t{reference}\t{evidence}\t{onset}\t"
+                           f"{annotations[-1][1]}\t{sex}\t\tP\t{_biocuration(rng)}\n")
+                counts["phenotype.hpoa"] += 1
+            # Mode of inheritance and clinical course rows
+            for aspect, terms, share in (("I", MODE_OF_INHERITANCE_TERMS, 0.5), ("C", ONSET_TERMS, 0.2)):
+                if rng.random() < share:
+                    hpo_id = rng.choice(list(terms))
+                    hpoa.write(f"{disease_id}\t{disease_name}\t\t{hpo_id}\t{disease_id}\tIEA\t\t\t\t\t{aspect}\t"
+                               f"{_biocuration(rng)}\n")
+                    counts["phenotype.hpoa"] += 1
+
+            if prefix != "DECIPHER":
+                object_id = disease_id.replace("ORPHA:", "Orphanet:")
+                mondo_id = f"MONDO:{d:07d}"
+                predicates = ["skos:exactMatch"] + (["skos:broadMatch"] if rng.random() < 0.1 else [])
+                for predicate in predicates:
+                    sssom.write(f"{mondo_id}\t{disease_name}\t{predicate}\t{object_id}\t{disease_name}\t"
+                                "semapv:ManualMappingCuration\n")
+                    counts["mondo.sssom.tsv"] += 1
+
+                if rng.random() < 0.6:
+                    for gene in rng.sample(range(n_genes), min(n_genes, rng.choice([1, 1, 1, 2]))):
+                        # As upstream, only the (filtered out) medgen rows have non-MENDELIAN types
+                        association_type = "MENDELIAN"
+                        if prefix == "OMIM":
+                            association_type = rng.choices(["MENDELIAN", "POLYGENIC", "UNKNOWN"], [90, 5, 5])[0]
+                        g2d.write(f"NCBIGene:{gene + 1}\tGENE{gene + 1}\t{association_type}\t{disease_id}\t"
+                                  f"{SOURCES[prefix]}\n")
+                        counts["genes_to_disease.txt"] += 1
+                        for hpo_id, frequency in dict(annotations).items():
+                            name = f"Synthetic abnormality {int(hpo_id[3:]) - FIRST_PHENOTYPE_TERM}"
+                            g2p.write(f"{gene + 1}\tGENE{gene + 1}\t{hpo_id}\t{name}\t{frequency or '-'}\t"
+                                      f"{disease_id}\n")
+                            counts["genes_to_phenotype.txt"] += 1
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir", help="Directory to write the files to (e.g. data/)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size relative to the current upstream files")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    for name, rows in write_synthetic_data(args.output_dir, args.scale, args.seed).items():
+        print(f"{name}: {rows:,}")
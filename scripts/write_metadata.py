@@ -1,6 +1,9 @@
 """Emit output/release-metadata.yaml for monarch-phenotype-profile-ingest.
 
 Standard boilerplate — content is in src/versions.py and the schema package.
+Also writes output/release-artifacts.yaml with each artifact's sha256, size
+and row count (see src/artifact_stats.py), and output/release-instrumentation.yaml
+with the per-stage timings of an instrumented run, if any (see src/instrumentation.py).
 """
 
 from __future__ import annotations
@@ -10,8 +13,11 @@ from pathlib import Path
 
 INGEST_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(INGEST_DIR / "src"))
+sys.path.insert(1, str(INGEST_DIR))  # for src.* imports
 
 from versions import get_source_versions  # noqa: E402
+from src.artifact_stats import ARTIFACT_SUFFIXES, write_artifact_stats  # noqa: E402
+from src.instrumentation import write_release_instrumentation  # noqa: E402
 from kozahub_metadata_schema.writer import write_metadata  # noqa: E402
 
 
@@ -25,7 +31,7 @@ if __name__ == "__main__":
     artifacts = sorted(
         p.name
         for p in output_dir.glob("*")
-        if p.is_file() and p.suffix in {".tsv", ".gz", ".jsonl", ".nt"}
+        if p.is_file() and p.suffix in ARTIFACT_SUFFIXES
     )
 
     metadata = write_metadata(
@@ -36,6 +42,11 @@ if __name__ == "__main__":
         output_dir=output_dir,
     )
     print(f"Wrote {output_dir / 'release-metadata.yaml'}")
+    instrumentation_file = write_release_instrumentation(output_dir)
+    if instrumentation_file:
+        print(f"Wrote {instrumentation_file}")
+    # Checksums, sizes and row counts of the artifacts, cached by (path, size, mtime)
+    print(f"Wrote {write_artifact_stats(output_dir, artifacts)}")
     print(f"  build_version: {metadata['build_version']}")
     for s in metadata["sources"]:
         print(
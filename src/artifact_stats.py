@@ -0,0 +1,212 @@
+"""
+Checksums, sizes and row counts of the ingest's output artifacts.
+
+scripts/write_metadata.py lists the files in output/ as release artifacts; this module
+records what is in them, so a downstream loader can verify an artifact without reading
+it first. Each file is read once, in large chunks, feeding the sha256 and the newline
+count from the same buffer (.gz and .zst files are decompressed on the fly for the count,
+at most one chunk's worth of output at a time, however well they compress; Parquet row
+counts come from the file footer). Files are processed in a thread pool,
+since hashing runs outside the GIL.
+
+Results are cached by (path, size, mtime), so rerunning the metadata step over
+unchanged artifacts doesn't read them again.
+
+Usage:
+uv run python -m src.artifact_stats [-o output]
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import duckdb
+import yaml
+from loguru import logger
+
+CHUNK_SIZE = 8 << 20
+ARTIFACT_SUFFIXES = {".tsv", ".gz", ".zst", ".jsonl", ".nt", ".parquet"}
+ARTIFACT_STATS_FILE = "release-artifacts.yaml"
+CACHE_FILE = ".artifact-stats.cache.json"
+
+# Files whose first line is a header rather than a data row
+_HEADER_SUFFIXES = (".tsv", ".tsv.gz", ".tsv.zst", ".csv", ".csv.gz")
+
+
+@dataclass(frozen=True)
+class ArtifactStats:
+    """What a downstream loader needs to verify an artifact."""
+
+    name: str
+    sha256: str
+    size: int
+    rows: int
+
+
+def _count_parquet_rows(path: Path) -> int:
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute("select count(*) from read_parquet(?)", [str(path)]).fetchone()[0]
+    finally:
+        con.close()
+
+
+class _Decompressor:
+    """
+    Streaming decompression of .gz / .zst content, across concatenated members or frames.
+
+    :param suffix: ".gz" or ".zst"
+    :param max_length: most bytes of output returned by one decompress call
+    """
+
+    def __init__(self, suffix: str, max_length: int = CHUNK_SIZE):
+        self._gzip = suffix == ".gz"
+        if self._gzip:
+            self._new = lambda: zlib.decompressobj(zlib.MAX_WBITS | 16)
+        else:
+            from src.compressed_writer import import_zstd
+
+            self._new = import_zstd().ZstdDecompressor
+        self._decompressor = self._new()
+        self._max_length = max_length
+
+    def _has_output(self, out: bytes) -> bool:
+        """Whether the input given so far holds more output than the last call returned."""
+        if self._gzip:
+            # zlib keeps the input it didn't get to in unconsumed_tail
+            return bool(self._decompressor.unconsumed_tail) or len(out) == self._max_length
+        return not self._decompressor.needs_input
+
+    def decompress(self, data) -> Iterator[bytes]:
+        """Yield the content data decompresses to, in pieces of at most max_length bytes."""
+        while True:
+            out = self._decompressor.decompress(data, self._max_length)
+            if out:
+                yield out
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+                self._decompressor = self._new()
+                if not data:
+                    return
+            elif self._has_output(out):
+                data = self._decompressor.unconsumed_tail if self._gzip else b""
+            else:
+                return
+
+
+def compute_artifact_stats(path: Union[str, Path], chunk_size: int = CHUNK_SIZE) -> ArtifactStats:
+    """
+    Read path once and return its checksum, size and number of data rows.
+
+    Rows are lines (not counting a header line for TSV/CSV files), of the decompressed
+    content for .gz and .zst files; for Parquet files they are the rows in the footer.
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    decompressor = _Decompressor(path.suffix, chunk_size) if path.suffix in (".gz", ".zst") else None
+    newlines, size, last_byte = 0, 0, b"\n"
+    count_lines = path.suffix != ".parquet"
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buffer):
+            chunk = view[:n]
+            digest.update(chunk)
+            size += n
+            if not count_lines:
+                continue
+            if decompressor:
+                for data in decompressor.decompress(chunk):
+                    newlines += data.count(b"\n")
+                    last_byte = data[-1:]
+            else:
+                newlines += buffer.count(b"\n", 0, n)
+                last_byte = bytes(chunk[-1:])
+
+    if count_lines:
+        # A final line without a trailing newline is still a row
+        rows = newlines + (last_byte != b"\n")
+        if path.name.endswith(_HEADER_SUFFIXES):
+            rows = max(rows - 1, 0)
+    else:
+        rows = _count_parquet_rows(path)
+    return ArtifactStats(name=path.name, sha256=digest.hexdigest(), size=size, rows=rows)
+
+
+def _cache_key(path: Path) -> str:
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def collect_artifact_stats(
+    paths: Iterable[Union[str, Path]],
+    cache_file: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> List[ArtifactStats]:
+    """
+    Stats for every path, reading only files that changed since they were cached.
+
+    :param paths: artifact files
+    :param cache_file: JSON cache of stats keyed by (path, size, mtime); no caching if None
+    :param max_workers: size of the thread pool (defaults to ThreadPoolExecutor's)
+    :return: stats in the order of paths
+    """
+    paths = [Path(p) for p in paths]
+    cache: Dict[str, dict] = {}
+    if cache_file and cache_file.exists():
+        try:
+            cache = json.loads(cache_file.read_text())
+        except ValueError:
+            cache = {}
+
+    keys = [_cache_key(p) for p in paths]
+    to_read = [(p, key) for p, key in zip(paths, keys, strict=True) if key not in cache]
+    if to_read:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            stats_read = pool.map(compute_artifact_stats, [p for p, _ in to_read])
+            for (_, key), stats in zip(to_read, stats_read, strict=True):
+                cache[key] = dataclasses.asdict(stats)
+                logger.info(f"{stats.name}: {stats.rows} rows, {stats.size} bytes")
+
+    if cache_file and to_read:
+        # Only keep entries for the current artifacts
+        current = {key: cache[key] for key in keys}
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(current, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_file, cache_file)
+    return [ArtifactStats(**cache[key]) for key in keys]
+
+
+def write_artifact_stats(output_dir: Union[str, Path], artifacts: List[str]) -> Path:
+    """
+    Write `release-artifacts.yaml` describing each of the named artifacts in output_dir.
+
+    :param output_dir: directory holding the artifacts
+    :param artifacts: artifact file names
+    :return: path to the file written
+    """
+    output_dir = Path(output_dir)
+    stats = collect_artifact_stats([output_dir / name for name in artifacts], cache_file=output_dir / CACHE_FILE)
+    path = output_dir / ARTIFACT_STATS_FILE
+    with open(path, "w") as f:
+        yaml.safe_dump({"artifacts": [dataclasses.asdict(s) for s in stats]}, f, sort_keys=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output-dir", default="output", help="Path to output directory")
+    args = parser.parse_args()
+
+    names = sorted(p.name for p in Path(args.output_dir).glob("*") if p.is_file() and p.suffix in ARTIFACT_SUFFIXES)
+    print(f"Wrote {write_artifact_stats(args.output_dir, names)}")
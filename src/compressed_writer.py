@@ -0,0 +1,216 @@
+"""
+Compressed TSV output for the koza transforms, compressed in a background thread.
+
+koza's TSVWriter writes plain `{name}_edges.tsv`, which then has to be read back and
+compressed in a separate pass. `CompressedTSVWriter` is a drop-in replacement that writes
+`{name}_edges.tsv.gz` or `{name}_edges.tsv.zst` directly, with the same header and column
+order (rows are rendered by TSVWriter.write_row).
+
+Rows are buffered into ~1 MiB blocks that are handed through a bounded queue to a
+compression thread, which compresses them and writes them to disk. zlib and zstd release
+the GIL while they compress, so compression overlaps with the transform building the
+next rows, and the bounded queue keeps memory flat if the transform is faster.
+
+zstd uses the standard library's `compression.zstd` on Python >= 3.14, or the
+`backports.zstd` dependency before that; it is only imported when zstd output is asked for.
+
+Usage:
+    config, runner = compressed_runner(config_file, output_dir, compression="zstd")
+    runner.run()
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from koza.converter.kgx_converter import KGXConverter
+from koza.io.writer.tsv_writer import TSVWriter
+from koza.model.formats import OutputFormat
+from koza.model.koza import KozaConfig
+from koza.model.writer import WriterConfig
+from koza.runner import KozaRunner
+
+from src.phenotype_ingest_utils import kgx_columns
+
+COMPRESSIONS = {"gzip": ".tsv.gz", "zstd": ".tsv.zst"}
+BLOCK_SIZE = 1 << 20
+QUEUE_BLOCKS = 8
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def import_zstd():
+    """Import the zstd module: `compression.zstd` on Python >= 3.14, otherwise `backports.zstd`."""
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError as e:
+            raise ImportError("zstd output needs Python >= 3.14 or the backports.zstd package") from e
+    return zstd
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _compressor(compression: str):
+    if compression == "gzip":
+        return _GzipCompressor()
+    if compression == "zstd":
+        return import_zstd().ZstdCompressor(level=ZSTD_LEVEL)
+    raise ValueError(f"Unknown compression {compression}, expected one of {list(COMPRESSIONS)}")
+
+
+class BackgroundCompressedFile:
+    """
+    A write-only text file whose content is compressed and written by a background thread.
+
+    :param path: file to write
+    :param compression: "gzip" or "zstd"
+    :param block_size: bytes of text buffered before a block is queued for compression
+    :param queue_blocks: blocks that may wait in the queue before write() blocks
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        compression: str,
+        block_size: int = BLOCK_SIZE,
+        queue_blocks: int = QUEUE_BLOCKS,
+    ):
+        """Open the file and start its compression thread."""
+        self.path = Path(path)
+        self._compressor = _compressor(compression)
+        self._block_size = block_size
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._queue: queue.Queue[Optional[bytes]] = queue.Queue(maxsize=queue_blocks)
+        self._error: Optional[BaseException] = None
+        self._file = open(self.path, "wb")
+        self._thread = threading.Thread(target=self._compress_blocks, name=f"compress:{self.path.name}", daemon=True)
+        self._thread.start()
+        self.closed = False
+
+    def _compress_blocks(self):
+        try:
+            while (block := self._queue.get()) is not None:
+                self._file.write(self._compressor.compress(block))
+            self._file.write(self._compressor.flush())
+        except BaseException as e:
+            self._error = e
+            # Keep draining so a producer blocked on a full queue is released
+            while self._queue.get() is not None:
+                pass
+        finally:
+            self._file.close()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise OSError(f"Compressing {self.path} failed") from self._error
+
+    def _queue_pending(self):
+        self._queue.put("".join(self._pending).encode())
+        self._pending = []
+        self._pending_size = 0
+
+    def write(self, text: str) -> int:
+        self._raise_error()
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self._block_size:
+            self._queue_pending()
+        return len(text)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._pending:
+            self._queue_pending()
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        """Return the file itself."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the file, compressing whatever is still buffered."""
+        self.close()
+
+
+class CompressedTSVWriter(TSVWriter):
+    """TSVWriter writing `{name}_nodes/edges.tsv.gz` or `.tsv.zst` through a BackgroundCompressedFile."""
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path],
+        source_name: str,
+        config: WriterConfig,
+        compression: str = "gzip",
+    ):
+        """Set up as TSVWriter.__init__ does, but open compressed files rather than plain ones."""
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression}, expected one of {list(COMPRESSIONS)}")
+        self.basename = source_name
+        self.dirname = output_dir
+        self.delimiter = "\t"
+        self.list_delimiter = "|"
+        self.converter = KGXConverter()
+        self.config = config
+        self.sssom_config = config.sssom_config
+        suffix = COMPRESSIONS[compression]
+
+        Path(self.dirname).mkdir(parents=True, exist_ok=True)
+
+        if config.node_properties:
+            self.node_columns = kgx_columns(config.node_properties, "node")
+            self.nodes_file_name = Path(self.dirname, f"{self.basename}_nodes{suffix}")
+            self.nodeFH = BackgroundCompressedFile(self.nodes_file_name, compression)
+            self.nodeFH.write(self.delimiter.join(self.node_columns) + "\n")
+
+        if config.edge_properties:
+            edge_properties = list(config.edge_properties)
+            if config.sssom_config:
+                edge_properties = self.add_sssom_columns(edge_properties)
+            self.edge_columns = kgx_columns(edge_properties, "edge")
+            self.edges_file_name = Path(self.dirname, f"{self.basename}_edges{suffix}")
+            self.edgeFH = BackgroundCompressedFile(self.edges_file_name, compression)
+            self.edgeFH.write(self.delimiter.join(self.edge_columns) + "\n")
+
+
+def compressed_runner(
+    config_file: Union[str, Path],
+    output_dir: str,
+    compression: str,
+    **kwargs,
+) -> Tuple[KozaConfig, KozaRunner]:
+    """
+    KozaRunner.from_config_file, with a CompressedTSVWriter in place of the configured writer.
+
+    The runner is built with a passthrough writer so no plain TSV is created alongside.
+
+    :param config_file: koza transform yaml
+    :param output_dir: directory the compressed files are written to
+    :param compression: "gzip" or "zstd"
+    :param kwargs: passed on to KozaRunner.from_config_file (input_files, overrides, ...)
+    """
+    config, runner = KozaRunner.from_config_file(
+        str(config_file), output_dir=output_dir, output_format=OutputFormat.passthrough, **kwargs
+    )
+    runner.writer = CompressedTSVWriter(output_dir, config.name, config.writer, compression=compression)
+    return config, runner
@@ -0,0 +1,126 @@
+"""
+Aggregated data-quality accounting for the transforms.
+
+Problem rows used to be reported one log line at a time (an unparseable frequency, a
+non-inheritance term reaching the mode of inheritance transform), or to stop the run
+(an unknown evidence code). A `DataQuality` collector instead counts each problem
+category, keeps the first few distinct offending values as samples, and logs one
+summary when the transform ends. Rows a transform rejects can also be written to a
+quarantine TSV for inspection.
+
+Each transform keeps its collector in `koza_transform.state` (see `get_data_quality`)
+and closes it from an `@koza.on_data_end` hook with `report_data_quality`, which also
+adds the summary to the run's transform metadata. Two `transform:` fields in a
+transform's yaml (or koza overrides) configure it:
+
+  - quarantine_dir             write rejected rows to `{quarantine_dir}/{name}_quarantine.tsv`
+  - data_quality_sample_size   distinct offending values kept per category (default 5)
+"""
+
+from __future__ import annotations
+
+import csv
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+
+STATE_KEY = "data_quality"
+DEFAULT_SAMPLE_SIZE = 5
+QUARANTINE_SUFFIX = "_quarantine.tsv"
+
+# Problem categories
+INVALID_FREQUENCY = "invalid_frequency"
+UNKNOWN_EVIDENCE = "unknown_evidence"
+NOT_MODE_OF_INHERITANCE = "not_mode_of_inheritance"
+
+
+class DataQuality:
+    """
+    Counts and samples of a transform's data problems, and its quarantined rows.
+
+    :param name: transform name, used in the summary and the quarantine file name
+    :param sample_size: distinct offending values kept per category
+    :param quarantine_dir: directory for the quarantine TSV (rejected rows are only counted if None)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        quarantine_dir: Optional[Union[str, Path]] = None,
+    ):
+        """Start with no problems counted; the quarantine file is opened on the first rejected row."""
+        self.name = name
+        self.sample_size = sample_size
+        self.counts: Counter = Counter()
+        self.samples: Dict[str, List[str]] = {}
+        self.quarantine_file = Path(quarantine_dir) / f"{name}{QUARANTINE_SUFFIX}" if quarantine_dir else None
+        self._quarantine = None
+        self._quarantine_writer = None
+
+    def record(self, category: str, value: Any, count: int = 1):
+        """Count `count` occurrences of a problem, keeping value as a sample if there's room."""
+        self.counts[category] += count
+        samples = self.samples.setdefault(category, [])
+        value = str(value)
+        if len(samples) < self.sample_size and value not in samples:
+            samples.append(value)
+
+    def reject(self, category: str, value: Any, row: Dict[str, Any]):
+        """Record a problem whose row the transform drops, and quarantine the row."""
+        self.record(category, value)
+        if self.quarantine_file is None:
+            return
+        if self._quarantine_writer is None:
+            self.quarantine_file.parent.mkdir(parents=True, exist_ok=True)
+            self._quarantine = open(self.quarantine_file, "w", newline="")
+            self._quarantine_writer = csv.writer(self._quarantine, delimiter="\t", lineterminator="\n")
+            self._quarantine_writer.writerow(["category", "value", *row.keys()])
+        self._quarantine_writer.writerow([category, value, *row.values()])
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return a dict of category to its count and sample values, most frequent first."""
+        return {
+            category: {"count": count, "samples": list(self.samples[category])}
+            for category, count in self.counts.most_common()
+        }
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """Close the quarantine file, log the summary and return it."""
+        if self._quarantine is not None:
+            self._quarantine.close()
+            self._quarantine = self._quarantine_writer = None
+        summary = self.summary()
+        if summary:
+            problems = "; ".join(
+                f"{category}: {entry['count']:,} (e.g. {', '.join(repr(s) for s in entry['samples'])})"
+                for category, entry in summary.items()
+            )
+            quarantined = f", rejected rows in {self.quarantine_file}" if self.quarantine_file else ""
+            logger.warning(f"{self.name} data quality problems: {problems}{quarantined}")
+        return summary
+
+
+def get_data_quality(koza_transform, name: str) -> DataQuality:
+    """Return the transform's collector, created on first use from its `transform:` configuration."""
+    collector = koza_transform.state.get(STATE_KEY)
+    if collector is None:
+        extra_fields = koza_transform.extra_fields
+        collector = koza_transform.state[STATE_KEY] = DataQuality(
+            name,
+            sample_size=extra_fields.get("data_quality_sample_size", DEFAULT_SAMPLE_SIZE),
+            quarantine_dir=extra_fields.get("quarantine_dir"),
+        )
+    return collector
+
+
+def report_data_quality(koza_transform) -> Dict[str, Dict[str, Any]]:
+    """Close the transform's collector, if it has one, and add its summary to the transform metadata."""
+    collector = koza_transform.state.pop(STATE_KEY, None)
+    if collector is None:
+        return {}
+    summary = collector.close()
+    koza_transform.transform_metadata[STATE_KEY] = summary
+    return summary
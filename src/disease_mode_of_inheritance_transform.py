@@ -29,20 +29,25 @@ from biolink_model.datamodel.pydanticmodel_v2 import (
     KnowledgeLevelEnum,
     AgentTypeEnum
 )
+from src.data_quality import NOT_MODE_OF_INHERITANCE, UNKNOWN_EVIDENCE, get_data_quality, report_data_quality
 from src.phenotype_ingest_utils import (
+    build_association,
     evidence_to_eco,
-    read_ontology_to_exclusion_terms
+    get_interner,
+    log_interning_stats,
+    read_ontology_terms_cached
 )
-from loguru import logger
+
+DATA_QUALITY_NAME = "hpoa_disease_mode_of_inheritance"
 
 _modes_of_inheritance = None
 
 
 def get_modes_of_inheritance():
-    """Load HP mode of inheritance terms on first access."""
+    """Load HP mode of inheritance terms on first access (from the closure cache when hp.obo is unchanged)."""
     global _modes_of_inheritance
     if _modes_of_inheritance is None:
-        _modes_of_inheritance = read_ontology_to_exclusion_terms(
+        _modes_of_inheritance = read_ontology_terms_cached(
             "data/hp.obo", umbrella_term="HP:0000005", include=True
         )
     return _modes_of_inheritance
@@ -69,24 +74,31 @@ def transform_record(koza_transform, row):
         # Annotations
 
         # Three letter ECO code to ECO class based on HPO documentation
-        evidence_curie = evidence_to_eco[row["evidence"]]
+        evidence_curie = evidence_to_eco.get(row["evidence"])
+        if evidence_curie is None:
+            get_data_quality(koza_transform, DATA_QUALITY_NAME).reject(UNKNOWN_EVIDENCE, row["evidence"], row)
+            return []
 
         # Publications
+        interner = get_interner(koza_transform)
         publications_field: str = row["reference"]
-        publications: List[str] = publications_field.split(";")
 
         # Filter out some weird NCBI web endpoints
-        publications = [p for p in publications if not p.startswith("http")]
+        publications: List[str] = interner.values(
+            p for p in publications_field.split(";") if not p.startswith("http")
+        )
 
         # Association/Edge
-        association = DiseaseOrPhenotypicFeatureToGeneticInheritanceAssociation(
+        association = build_association(
+            koza_transform,
+            DiseaseOrPhenotypicFeatureToGeneticInheritanceAssociation,
             id="uuid:" + str(uuid.uuid1()),
-            subject=disease_id,
+            subject=interner.value(disease_id),
             predicate=predicate,
-            object=hpo_id,
+            object=interner.value(hpo_id),
             publications=publications,
-            has_evidence=[evidence_curie],
-            aggregator_knowledge_source=["infores:monarchinitiative"],
+            has_evidence=interner.constant_list((evidence_curie,)),
+            aggregator_knowledge_source=interner.constant_list(("infores:monarchinitiative",)),
             primary_knowledge_source="infores:hpo-annotations",
             knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
             agent_type=AgentTypeEnum.manual_agent
@@ -94,5 +106,13 @@ def transform_record(koza_transform, row):
         return [association]
 
     else:
-        logger.warning(f"HPOA ID field value '{str(hpo_id)}' is missing or an invalid disease mode of inheritance?")
+        get_data_quality(koza_transform, DATA_QUALITY_NAME).reject(NOT_MODE_OF_INHERITANCE, hpo_id, row)
         return []
+
+
+log_interned_values = koza.on_data_end()(log_interning_stats)
+
+
+@koza.on_data_end()
+def log_data_quality(koza_transform):
+    report_data_quality(koza_transform)
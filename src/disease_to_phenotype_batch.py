@@ -0,0 +1,265 @@
+"""
+Columnar batch engine for the disease to phenotype transform.
+
+disease_to_phenotype_transform.transform_record runs once per row: it looks up the
+evidence and sex codes, parses the frequency, resolves the primary knowledge source
+and rewrites the ORPHA prefix, then builds and serialises a Biolink association.
+This module does the same work over the whole of phenotype.hpoa at once in DuckDB:
+
+  - the aspect filter, ORPHA rewrite, negation and publication filtering are column
+    expressions;
+  - evidence codes and sex values are joined against small tables built from
+    `evidence_to_eco` and `sex_format`/`sex_to_pato`;
+  - frequencies are parsed by `phenotype_frequency_to_hpo_term`, and primary knowledge
+    sources resolved by `get_primary_knowledge_source`, once per distinct value (a few
+    hundred frequencies, some thousands of diseases) and joined back, so the semantics
+    match the per-row path exactly.
+
+The result is written straight to the edge TSV koza would produce for
+disease_to_phenotype_transform.yaml (same file name, columns and column order);
+only the `id` UUIDs differ. With --output-format parquet the same columns are
+written to `{name}_edges.parquet`, typed as src/parquet_io.edges_to_parquet types
+them, and with --compression gzip or zstd the TSV is written compressed as `.tsv.gz`
+/ `.tsv.zst`.
+Rows with unknown evidence codes are dropped and unparseable frequencies counted, as
+in the per-row transform, with the same data-quality summary and --quarantine-dir
+(see src/data_quality.py).
+
+Usage:
+uv run python -m src.disease_to_phenotype_batch
+"""
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import yaml
+from loguru import logger
+
+from src.compressed_writer import COMPRESSIONS
+from src.data_quality import DEFAULT_SAMPLE_SIZE, INVALID_FREQUENCY, UNKNOWN_EVIDENCE, DataQuality
+from src.disease_to_phenotype_transform import get_primary_knowledge_source
+from src.parquet_io import OUTPUT_FORMATS, PARQUET_COMPRESSION, typed_edge_columns
+from src.phenotype_ingest_utils import (
+    evidence_to_eco,
+    kgx_columns,
+    phenotype_frequency_to_hpo_term,
+    sex_format,
+    sex_to_pato,
+)
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+CONFIG_FILE = INGEST_DIR / "src" / "disease_to_phenotype_transform.yaml"
+HPOA_FILE = INGEST_DIR / "data" / "phenotype.hpoa"
+
+# The rows of the `hpoa` table joined to the lookup tables, in phenotype.hpoa row order
+EDGE_SOURCE_VIEW = """
+create or replace temp view edge_source as
+select hpoa.*, hpoa.rowid as hpoa_row, evidence.has_evidence, sex.sex_qualifier,
+       frequency.frequency_qualifier, frequency.has_count, frequency.has_total,
+       frequency.has_percentage, frequency.has_quotient, knowledge_source.primary_knowledge_source
+from hpoa
+     left outer join evidence on evidence.evidence = hpoa.evidence
+     left outer join sex on sex.sex = hpoa.sex
+     left outer join frequency on frequency.frequency = hpoa.frequency
+     left outer join knowledge_source on knowledge_source.database_id = hpoa.database_id
+"""
+
+# Column expressions over the `edge_source` view, mirroring the association built in
+# disease_to_phenotype_transform.transform_record
+EDGE_COLUMN_EXPRESSIONS = {
+    "id": "'uuid:' || uuid()",
+    "category": "'biolink:DiseaseToPhenotypicFeatureAssociation'",
+    "subject": "replace(database_id, 'ORPHA:', 'Orphanet:')",
+    "predicate": "'biolink:has_phenotype'",
+    "negated": "case when qualifier = 'NOT' then 'True' else 'False' end",
+    "object": "hpo_id",
+    "publications": """nullif(array_to_string(
+        list_filter(string_split(coalesce(reference, ''), ';'), p -> p != database_id and p not in ('', ' ')),
+        '|'), '')""",
+    "onset_qualifier": "onset",
+    "frequency_qualifier": "frequency_qualifier",
+    "has_count": "has_count",
+    "has_total": "has_total",
+    "has_percentage": "has_percentage",
+    "has_quotient": "has_quotient",
+    "sex_qualifier": "sex_qualifier",
+    "has_evidence": "has_evidence",
+    "aggregator_knowledge_source": "'infores:monarchinitiative|infores:hpo-annotations'",
+    "primary_knowledge_source": "primary_knowledge_source",
+    "knowledge_level": "'knowledge_assertion'",
+    "agent_type": "'manual_agent'",
+}
+
+
+def _export_value(value) -> Optional[str]:
+    """Render a value the way koza's TSV writer does (None is written as an empty field)."""
+    return None if value is None else str(value)
+
+
+def _load_hpoa(con: duckdb.DuckDBPyConnection, hpoa_file: Path, reader_config: dict):
+    columns = {column: "VARCHAR" for column in reader_config["columns"]}
+    con.execute(
+        """
+        create or replace temp table hpoa as
+        select * from (
+            select nullif(trim(columns(*)), '')
+            from read_csv(?, delim='\t', skip=?, header=true, quote='"', columns=?)
+        ) where aspect = 'P'
+        """,
+        [str(hpoa_file), reader_config["header_mode"], columns],
+    )
+
+
+def _check_rows(con: duckdb.DuckDBPyConnection, quality: DataQuality):
+    """
+    Raise the same errors the per-row transform would, before writing anything.
+
+    The rows the per-row transform would reject are dropped, and counted.
+    """
+    missing_hpo_id = con.execute("select count(*) from hpoa where hpo_id is null").fetchone()[0]
+    assert not missing_hpo_id, "HPOA Disease to Phenotype has missing HP ontology ('HPO_ID') field identifier?"
+
+    cursor = con.execute(
+        "select * from hpoa where coalesce(evidence, '') not in (select unnest(?)) order by rowid",
+        [list(evidence_to_eco)],
+    )
+    columns = [description[0] for description in cursor.description]
+    for values in cursor.fetchall():
+        row = dict(zip(columns, values, strict=True))
+        quality.reject(UNKNOWN_EVIDENCE, row["evidence"] or "", row)
+    con.execute("delete from hpoa where coalesce(evidence, '') not in (select unnest(?))", [list(evidence_to_eco)])
+
+
+def _load_lookup_tables(con: duckdb.DuckDBPyConnection, derive_frequency_qualifier: bool, quality: DataQuality):
+    con.execute("create or replace temp table evidence (evidence varchar, has_evidence varchar)")
+    con.executemany("insert into evidence values (?, ?)", list(evidence_to_eco.items()))
+
+    con.execute("create or replace temp table sex (sex varchar, sex_qualifier varchar)")
+    con.executemany("insert into sex values (?, ?)", [(sex, sex_to_pato[sex_format[sex]]) for sex in sex_format])
+
+    con.execute(
+        """
+        create or replace temp table frequency (
+            frequency varchar, frequency_qualifier varchar,
+            has_count varchar, has_total varchar, has_percentage varchar, has_quotient varchar
+        )
+        """
+    )
+    distinct_frequencies = con.execute(
+        "select frequency, count(*) from hpoa where frequency is not null group by frequency order by min(rowid)"
+    ).fetchall()
+    rows = []
+    for frequency_field, count in distinct_frequencies:
+        frequency = phenotype_frequency_to_hpo_term(frequency_field, derive_frequency_qualifier)
+        if frequency.unparseable:
+            quality.record(INVALID_FREQUENCY, frequency_field, count)
+        rows.append((
+            frequency_field,
+            frequency.frequency_qualifier,
+            _export_value(frequency.has_count),
+            _export_value(frequency.has_total),
+            _export_value(frequency.has_percentage),
+            _export_value(frequency.has_quotient),
+        ))
+    if rows:
+        con.executemany("insert into frequency values (?, ?, ?, ?, ?, ?)", rows)
+
+    # Raises for an unknown disease prefix, as the per-row transform does
+    con.execute("create or replace temp table knowledge_source (database_id varchar, primary_knowledge_source varchar)")
+    database_ids = con.execute("select distinct database_id from hpoa where database_id is not null").fetchall()
+    if database_ids:
+        con.executemany(
+            "insert into knowledge_source values (?, ?)",
+            [(database_id, get_primary_knowledge_source(database_id)) for database_id, in database_ids],
+        )
+
+
+def transform_batch(
+    hpoa_file: Path = HPOA_FILE,
+    output_dir: str = "output",
+    config_file: Path = CONFIG_FILE,
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    quarantine_dir: Optional[str] = None,
+) -> int:
+    """
+    Write the disease to phenotype edge file for phenotype.hpoa in one DuckDB pass.
+
+    :param hpoa_file: path to phenotype.hpoa
+    :param output_dir: directory the edge file is written to
+    :param config_file: the koza config whose reader columns and edge_properties are followed
+    :param output_format: "tsv" or "parquet"
+    :param compression: None, or "gzip" / "zstd" to compress the TSV
+    :param quarantine_dir: directory for the TSV of rejected rows (none is written if None)
+    :return: number of edges written
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}")
+    if compression and (output_format != "tsv" or compression not in COMPRESSIONS):
+        raise ValueError(f"Can't write {output_format} output with compression {compression}")
+
+    with open(config_file) as f:
+        config = yaml.safe_load(f)
+
+    edge_columns = kgx_columns(config["writer"]["edge_properties"], "edge")
+    unknown_columns = [column for column in edge_columns if column not in EDGE_COLUMN_EXPRESSIONS]
+    if unknown_columns:
+        raise ValueError(f"No batch expression for edge properties {unknown_columns} in {config_file}")
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if output_format == "parquet":
+        edges_file = Path(output_dir) / f"{config['name']}_edges.parquet"
+    else:
+        edges_file = Path(output_dir) / f"{config['name']}_edges{COMPRESSIONS.get(compression, '.tsv')}"
+
+    quality = DataQuality(
+        config["name"],
+        sample_size=config["transform"].get("data_quality_sample_size", DEFAULT_SAMPLE_SIZE),
+        quarantine_dir=quarantine_dir,
+    )
+    con = duckdb.connect(":memory:")
+    try:
+        _load_hpoa(con, Path(hpoa_file), config["reader"])
+        _check_rows(con, quality)
+        _load_lookup_tables(con, config["transform"].get("derive_frequency_qualifier", False), quality)
+
+        con.execute(EDGE_SOURCE_VIEW)
+        # keep phenotype.hpoa row order, as the per-row transform does
+        edges = con.table("edge_source").order("hpoa_row").project(
+            ", ".join(f"{EDGE_COLUMN_EXPRESSIONS[column]} as {column}" for column in edge_columns)
+        )
+        if output_format == "parquet":
+            edges.project(*typed_edge_columns(edge_columns)).write_parquet(
+                str(edges_file), compression=PARQUET_COMPRESSION
+            )
+        else:
+            edges.write_csv(
+                str(edges_file), sep="\t", header=True, quotechar="", escapechar="", compression=compression
+            )
+        edge_count = con.execute("select count(*) from hpoa").fetchone()[0]
+    finally:
+        con.close()
+        quality.close()
+
+    logger.info(f"Wrote {edge_count} edges to {edges_file}")
+    return edge_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-i", "--input", default=str(HPOA_FILE), help="Path to phenotype.hpoa")
+    parser.add_argument("-o", "--output-dir", default="output", help="Path to output directory")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="tsv", help="Format of the edge file")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default=None, help="Compress the TSV edge file")
+    parser.add_argument("--quarantine-dir", default=None, help="Write the rejected rows to a TSV here")
+    args = parser.parse_args()
+
+    transform_batch(
+        hpoa_file=Path(args.input),
+        output_dir=args.output_dir,
+        output_format=args.output_format,
+        compression=args.compression,
+        quarantine_dir=args.quarantine_dir,
+    )
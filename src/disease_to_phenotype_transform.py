@@ -33,15 +33,24 @@ from biolink_model.datamodel.pydanticmodel_v2 import (
     KnowledgeLevelEnum,
     AgentTypeEnum
 )
+from src.data_quality import INVALID_FREQUENCY, UNKNOWN_EVIDENCE, get_data_quality, report_data_quality
+from src.instrumentation import timed
 from src.phenotype_ingest_utils import (
     evidence_to_eco,
     sex_format,
     sex_to_pato,
-    phenotype_frequency_to_hpo_term,
-    Frequency
+    resolve_frequency,
+    build_association,
+    get_interner,
+    log_frequency_cache_stats,
+    log_interning_stats,
+    Frequency,
 )
 
+DATA_QUALITY_NAME = "hpoa_disease_to_phenotype"
 
+
+@timed("knowledge_source")
 def get_primary_knowledge_source(disease_id: str) -> str:
     if disease_id.startswith("OMIM"):
         return "infores:omim"
@@ -55,6 +64,8 @@ def get_primary_knowledge_source(disease_id: str) -> str:
 
 @koza.transform_record()
 def transform_record(koza_transform, row):
+    interner = get_interner(koza_transform)
+
     # Nodes
     disease_id = row["database_id"]
 
@@ -74,7 +85,10 @@ def transform_record(koza_transform, row):
 
     # Translations to curies
     # Three letter ECO code to ECO class based on hpo documentation
-    evidence_curie = evidence_to_eco[row["evidence"]]
+    evidence_curie = evidence_to_eco.get(row["evidence"])
+    if evidence_curie is None:
+        get_data_quality(koza_transform, DATA_QUALITY_NAME).reject(UNKNOWN_EVIDENCE, row["evidence"], row)
+        return []
 
     # female -> PATO:0000383
     # male -> PATO:0000384
@@ -84,37 +98,54 @@ def transform_record(koza_transform, row):
     onset = row["onset"]
 
     # Raw frequencies - HPO term curies, ratios, percentages - normalized to HPO terms
-    frequency: Frequency = phenotype_frequency_to_hpo_term(row["frequency"])
+    frequency: Frequency = resolve_frequency(
+        row["frequency"], koza_transform.extra_fields.get("derive_frequency_qualifier", False)
+    )
+    if frequency.unparseable:
+        # The phenotype association still holds without its frequency
+        get_data_quality(koza_transform, DATA_QUALITY_NAME).record(INVALID_FREQUENCY, row["frequency"])
 
     # Publications
     publications_field: str = row["reference"]
-    publications: List[str] = publications_field.split(";")
 
     # don't populate the reference with the database_id / disease id
-    publications = [p for p in publications if not p == row["database_id"]]
+    publications: List[str] = interner.values(p for p in publications_field.split(";") if not p == disease_id)
 
     primary_knowledge_source = get_primary_knowledge_source(disease_id)
 
     # Association/Edge
-    association = DiseaseToPhenotypicFeatureAssociation(
+    association = build_association(
+        koza_transform,
+        DiseaseToPhenotypicFeatureAssociation,
         id="uuid:" + str(uuid.uuid1()),
-        subject=disease_id.replace("ORPHA:", "Orphanet:"),  # match `Orphanet` as used in Mondo SSSOM
+        subject=interner.disease_id(disease_id),  # match `Orphanet` as used in Mondo SSSOM
         predicate=predicate,
         negated=negated,
-        object=hpo_id,
+        object=interner.value(hpo_id),
         publications=publications,
-        has_evidence=[evidence_curie],
+        has_evidence=interner.constant_list((evidence_curie,)),
         sex_qualifier=sex_qualifier,
-        onset_qualifier=onset,
+        onset_qualifier=interner.value(onset),
         has_percentage=frequency.has_percentage,
         has_quotient=frequency.has_quotient,
         frequency_qualifier=frequency.frequency_qualifier if frequency.frequency_qualifier else None,
         has_count=frequency.has_count,
         has_total=frequency.has_total,
-        aggregator_knowledge_source=["infores:monarchinitiative", "infores:hpo-annotations"],
+        aggregator_knowledge_source=interner.constant_list(("infores:monarchinitiative", "infores:hpo-annotations")),
         primary_knowledge_source=primary_knowledge_source,
         knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
         agent_type=AgentTypeEnum.manual_agent
     )
 
     return [association]
+
+
+log_frequency_stats = koza.on_data_end()(log_frequency_cache_stats)
+
+
+log_interned_values = koza.on_data_end()(log_interning_stats)
+
+
+@koza.on_data_end()
+def log_data_quality(koza_transform):
+    report_data_quality(koza_transform)
@@ -8,6 +8,9 @@ from biolink_model.datamodel.pydanticmodel_v2 import (
     AgentTypeEnum
 )
 from src.phenotype_ingest_utils import (
+    build_association,
+    get_interner,
+    log_interning_stats,
     get_knowledge_sources,
     get_predicate,
     INFORES_MONARCHINITIATIVE,
@@ -20,8 +23,9 @@ def transform_record(koza_transform, row):
     # Handle weird koza behavior that is reading the header as a data row no matter how the reader is configured
     if row["ncbi_gene_id"] == "ncbi_gene_id":
         return []
-    gene_id = row["ncbi_gene_id"]
-    disease_id = row["disease_id"].replace("ORPHA:", "Orphanet:")
+    interner = get_interner(koza_transform)
+    gene_id = interner.value(row["ncbi_gene_id"])
+    disease_id = interner.disease_id(row["disease_id"])
 
     predicate = get_predicate(row["association_type"])
     primary_knowledge_source, aggregator_knowledge_source = get_knowledge_sources(
@@ -34,15 +38,20 @@ def transform_record(koza_transform, row):
     else:
         association_class = CorrelatedGeneToDiseaseAssociation
 
-    association = association_class(
+    association = build_association(
+        koza_transform,
+        association_class,
         id="uuid:" + str(uuid.uuid1()),
         subject=gene_id,
         predicate=predicate,
         object=disease_id,
         primary_knowledge_source=primary_knowledge_source,
-        aggregator_knowledge_source=aggregator_knowledge_source,
+        aggregator_knowledge_source=interner.constant_list(tuple(aggregator_knowledge_source)),
         knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
         agent_type=AgentTypeEnum.manual_agent
     )
 
     return [association]
+
+
+log_interned_values = koza.on_data_end()(log_interning_stats)
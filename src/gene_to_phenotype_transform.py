@@ -1,5 +1,4 @@
 # For generating UUIDs for associations
-import re
 import uuid
 
 import koza
@@ -8,45 +7,59 @@ from biolink_model.datamodel.pydanticmodel_v2 import (
     GeneToPhenotypicFeatureAssociation,
     KnowledgeLevelEnum,
 )
-from src.phenotype_ingest_utils import Frequency, phenotype_frequency_to_hpo_term
+from src.data_quality import INVALID_FREQUENCY, get_data_quality, report_data_quality
+from src.parquet_io import check_intermediate_format
+from src.phenotype_ingest_utils import (
+    NO_FREQUENCY,
+    Frequency,
+    build_association,
+    get_interner,
+    log_frequency_cache_stats,
+    log_interning_stats,
+    resolve_frequency,
+)
+
+DATA_QUALITY_NAME = "hpoa_gene_to_phenotype"
 
 # TO DO: Once biolink is updated with the disease_context_qualifier slot we need to update the association we make
 # https://github.com/biolink/biolink-model/pull/1524
 
 
+# A plain `koza transform` can't honour `intermediate_format: 'parquet'`, so fails rather than read the TSV
+check_intermediate = koza.prepare_data()(check_intermediate_format)
+
+
 @koza.transform_record()
 def transform_record(koza_transform, row):
-    gene_id = "NCBIGene:" + row["ncbi_gene_id"]
-    phenotype_id = row["hpo_id"]
+    interner = get_interner(koza_transform)
+    gene_id = interner.curie("NCBIGene:", row["ncbi_gene_id"])
+    phenotype_id = interner.value(row["hpo_id"])
 
     # No frequency data provided
     if row["frequency"] == "-":
-        frequency = Frequency()
+        frequency = NO_FREQUENCY
     else:
         # Raw frequencies - HPO term curies, ratios, percentages - normalized to HPO terms
-        frequency: Frequency = phenotype_frequency_to_hpo_term(row["frequency"])
-
-    # Convert to mondo id if possible, otherwise leave as is
-    org_id = row["disease_id"].replace("ORPHA:", "Orphanet:")
-    dis_id = org_id
+        frequency: Frequency = resolve_frequency(
+            row["frequency"], koza_transform.extra_fields.get("derive_frequency_qualifier", False)
+        )
+        if frequency.unparseable:
+            get_data_quality(koza_transform, DATA_QUALITY_NAME).record(INVALID_FREQUENCY, row["frequency"])
 
-    # Lookup MONDO ID from mapping
-    try:
-        mondo_id = koza_transform.lookup(org_id, 'subject_id', 'mondo_map')
-        if mondo_id:
-            dis_id = mondo_id
-    except (KeyError, AttributeError):
-        # Not in mapping, keep original ID
-        pass
+    # Disease id converted to a mondo id where possible (otherwise left as is) by the preprocessing join
+    dis_id = interner.value(row["disease_context_qualifier"])
 
-    publications = [pub.strip() for pub in row["publications"].split(";")] if row["publications"] else []
+    publications_field = row["publications"]
+    publications = interner.values(pub.strip() for pub in publications_field.split(";")) if publications_field else []
 
-    association = GeneToPhenotypicFeatureAssociation(
+    association = build_association(
+        koza_transform,
+        GeneToPhenotypicFeatureAssociation,
         id="uuid:" + str(uuid.uuid1()),
         subject=gene_id,
         predicate="biolink:has_phenotype",
         object=phenotype_id,
-        aggregator_knowledge_source=["infores:monarchinitiative"],
+        aggregator_knowledge_source=interner.constant_list(("infores:monarchinitiative",)),
         primary_knowledge_source="infores:hpo-annotations",
         knowledge_level=KnowledgeLevelEnum.logical_entailment,
         agent_type=AgentTypeEnum.automated_agent,
@@ -60,3 +73,14 @@ def transform_record(koza_transform, row):
     )
 
     return [association]
+
+
+log_frequency_stats = koza.on_data_end()(log_frequency_cache_stats)
+
+
+log_interned_values = koza.on_data_end()(log_interning_stats)
+
+
+@koza.on_data_end()
+def log_data_quality(koza_transform):
+    report_data_quality(koza_transform)
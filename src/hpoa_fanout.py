@@ -0,0 +1,247 @@
+"""
+Single-pass driver for the transforms that read phenotype.hpoa.
+
+disease_to_phenotype_transform and disease_mode_of_inheritance_transform read the
+same file with the same reader settings and differ only in the `aspect` filter of
+their reader config. Run separately through `koza transform`, each one reads and
+CSV-parses the whole file just to keep its own aspect.
+
+This driver reads phenotype.hpoa once and hands every row to each transform whose
+configured filters accept it, writing each transform's edge file in the same pass.
+Each transform keeps its own koza config, writer and `transform_record` function, so
+adding another aspect transform (e.g. C or M) only means adding its yaml to
+HPOA_TRANSFORMS. Rows are read with only the columns any of the transforms (their
+`row_columns`, see src/input_rows.py), their filters or the statistics below need.
+
+Since every row passes through here, the per-source statistics src/versions.py needs
+(row counts and latest biocuration dates) are collected in the same pass and written
+to `data/phenotype.hpoa.stats.json` (see src/hpoa_stats.py).
+
+Progress (rows read, rows producing edges in any transform, rows/sec and an ETA) is
+logged every --progress-interval seconds and optionally written to a metrics file per
+run (see src/progress.py). With --instrument, per-stage timings of each transform (and of the shared read, as
+`hpoa_fanout`) are written to `output/instrumentation/` (see src/instrumentation.py), and
+with --memory-profile the memory use of the pass and of loading each transform's mappings
+to `output/memory/` (see src/memory_profile.py). Each transform logs a summary of its data
+problems at the end, and with --quarantine-dir writes the rows it rejected to a TSV there
+(see src/data_quality.py).
+
+Usage:
+uv run python -m src.hpoa_fanout
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from koza import KozaTransform
+from koza.model.koza import KozaConfig
+from koza.runner import KozaRunner, KozaTransformHooks
+from koza.utils.row_filter import RowFilter
+from loguru import logger
+
+from src import instrumentation, memory_profile
+from src.compressed_writer import COMPRESSIONS, compressed_runner
+from src.hpoa_stats import HpoaStats
+from src.input_rows import InputRows, row_columns
+from src.parquet_io import OUTPUT_FORMATS, parquet_runner
+from src.progress import DEFAULT_INTERVAL, METRICS_FORMATS, Progress, ProgressOptions
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = INGEST_DIR / "src"
+
+HPOA_TRANSFORMS = [
+    SRC_DIR / "disease_to_phenotype_transform.yaml",
+    SRC_DIR / "disease_mode_of_inheritance_transform.yaml",
+]
+
+# Columns HpoaStats.add_row reads
+STATS_COLUMNS = ("database_id", "biocuration")
+
+
+@dataclass
+class _Branch:
+    """One transform fed by the shared reader."""
+
+    config: KozaConfig
+    runner: KozaRunner
+    hooks: KozaTransformHooks
+    transform: KozaTransform
+    row_filter: RowFilter
+
+
+def _load_branch(
+    config_file: Path,
+    output_dir: str,
+    input_files: Optional[List[str]],
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    quarantine_dir: Optional[str] = None,
+) -> _Branch:
+    overrides = {"transform": {"quarantine_dir": quarantine_dir}} if quarantine_dir else None
+    if compression:
+        config, runner = compressed_runner(
+            config_file, output_dir, compression, input_files=input_files, overrides=overrides
+        )
+    elif output_format == "parquet":
+        config, runner = parquet_runner(config_file, output_dir, input_files=input_files, overrides=overrides)
+    else:
+        config, runner = KozaRunner.from_config_file(
+            str(config_file), output_dir=output_dir, input_files=input_files, overrides=overrides
+        )
+    hooks = runner.hooks_by_tag.get(None)
+    if hooks is None or not hooks.transform_record:
+        raise ValueError(f"{config.name} must define a `@koza.transform_record` function to be fanned out")
+    if hooks.prepare_data:
+        raise ValueError(f"{config.name} defines `@koza.prepare_data`, which a shared reader can't honour")
+
+    memory_profile.profile_mappings(runner, config.name)
+    transform = KozaTransform(
+        mappings=runner.load_mappings(),
+        writer=runner.writer,
+        input_files_dir=runner.input_files_dir,
+        extra_fields=runner.extra_transform_fields,
+    )
+    instrumentation.instrument_hooks(hooks, runner.writer, config.name)
+    return _Branch(config, runner, hooks, transform, RowFilter(config.reader.filters))
+
+
+def _shared_reader(branches: List[_Branch]):
+    """Return the reader config common to every branch, with the per-transform filters stripped."""
+    shared = dataclasses.replace(branches[0].config.reader, filters=[])
+    for branch in branches[1:]:
+        if dataclasses.replace(branch.config.reader, filters=[]) != shared:
+            raise ValueError(
+                f"{branch.config.name} does not read the same source as {branches[0].config.name}, can't fan out"
+            )
+    return shared
+
+
+def _shared_columns(branches: List[_Branch], stats: bool) -> Optional[List[str]]:
+    """Return the columns any branch's transform or filters (or the statistics) read, or None for all."""
+    needed = list(STATS_COLUMNS) if stats else []
+    for branch in branches:
+        columns = row_columns(branch.config.reader, branch.transform.extra_fields)
+        if columns is None:
+            return None
+        needed.extend(columns)
+        needed.extend(column_filter.column for column_filter in branch.config.reader.filters)
+    return list(dict.fromkeys(needed))
+
+
+def _fan_out(rows: Iterable[Dict[str, Any]], branches: List[_Branch], stats: Optional[HpoaStats], tracker: Progress):
+    for row in instrumentation.timed_rows(rows, "hpoa_fanout"):
+        if stats is not None:
+            stats.add_row(row)
+        edges = 0
+        for branch in branches:
+            if not branch.row_filter.include_row(row):
+                continue
+            for transform_record_fn in branch.hooks.transform_record:
+                result = transform_record_fn(branch.transform, row)
+                if result is not None:
+                    branch.runner.writer.write(result)
+                    edges += len(result)
+        tracker.update(edges)
+
+
+def run_hpoa_fanout(
+    config_files: Optional[List[Path]] = None,
+    output_dir: str = "output",
+    input_files: Optional[List[str]] = None,
+    row_limit: int = 0,
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    progress: Optional[ProgressOptions] = None,
+    quarantine_dir: Optional[str] = None,
+) -> dict:
+    """
+    Read phenotype.hpoa once and run every configured transform over it.
+
+    :param config_files: koza transform yamls sharing one reader; defaults to HPOA_TRANSFORMS
+    :param output_dir: directory the edge files are written to
+    :param input_files: optional override of the reader files (as for `koza transform`)
+    :param row_limit: stop after this many rows of the shared source (0 reads everything)
+    :param output_format: "tsv", or "parquet" to write `{name}_edges.parquet` files (see src/parquet_io.py)
+    :param compression: write `.tsv.gz` ("gzip") or `.tsv.zst` ("zstd") edge files instead of plain TSV
+    :param progress: how progress is reported (by default, logged every DEFAULT_INTERVAL seconds)
+    :param quarantine_dir: directory for the TSVs of rows each transform rejects (none are written if None)
+    :return: dict of transform name to number of edges written
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}")
+    if compression and output_format != "tsv":
+        raise ValueError(f"Compression only applies to TSV output, not {output_format}")
+    config_files = config_files or HPOA_TRANSFORMS
+    branches = [
+        _load_branch(Path(f), output_dir, input_files, output_format, compression, quarantine_dir)
+        for f in config_files
+    ]
+    reader_config = _shared_reader(branches)
+    # Statistics describe a whole file, so only collect them when reading all of a single one
+    stats = HpoaStats() if not row_limit and len(reader_config.files) == 1 else None
+    columns = _shared_columns(branches, stats is not None)
+    source = InputRows(reader_config, Path(config_files[0]).parent, row_limit=row_limit, columns=columns)
+    tracker = Progress("hpoa_fanout", progress, source)
+
+    for branch in branches:
+        for fn in branch.hooks.on_data_begin:
+            fn(branch.transform)
+
+    with memory_profile.memory_stage("transform", "hpoa_fanout"):
+        _fan_out(source, branches, stats, tracker)
+
+    edge_counts = {}
+    for branch in branches:
+        for fn in branch.hooks.on_data_end:
+            fn(branch.transform)
+        branch.runner.writer.finalize()
+        branch.runner.writer.validate_counts()
+        edge_counts[branch.config.name] = branch.runner.writer.edge_count
+        logger.info(f"Finished transform for {branch.config.name}: {branch.runner.writer.edge_count} edges")
+    tracker.close()
+
+    if stats is not None:
+        hpoa_file = Path(source.reader_config.files[0])
+        stats.write(hpoa_file if hpoa_file.is_absolute() else source.base_directory / hpoa_file)
+
+    instrumentation.write_summary(output_dir)
+    memory_profile.write_report(output_dir)
+    return edge_counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output-dir", default="output", help="Path to output directory")
+    parser.add_argument("-n", "--limit", type=int, default=0, help="Number of rows of phenotype.hpoa to process")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="tsv", help="Format of the edge files")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default=None, help="Compress the edge files")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between progress reports (0 only reports at the end)")
+    parser.add_argument("--metrics-dir", default=None, help="Also write progress metrics to files in this directory")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default="prom",
+                        help="Prometheus textfile (prom) or JSON lines (jsonl) metrics")
+    parser.add_argument("--instrument", action="store_true", help="Record per-stage timings in output/instrumentation/")
+    parser.add_argument("--memory-profile", action="store_true", help="Record per-stage memory use in output/memory/")
+    parser.add_argument("--quarantine-dir", default=None, help="Write the rows each transform rejects to TSVs here")
+    args = parser.parse_args()
+
+    if args.instrument:
+        instrumentation.enable()
+    # Timings of an earlier run must not be reported with this one, instrumented or not
+    instrumentation.clear_summaries(args.output_dir)
+    if args.memory_profile:
+        memory_profile.enable()
+
+    run_hpoa_fanout(
+        output_dir=args.output_dir,
+        row_limit=args.limit,
+        output_format=args.output_format,
+        compression=args.compression,
+        progress=ProgressOptions(args.progress_interval, args.metrics_dir, args.metrics_format),
+        quarantine_dir=args.quarantine_dir,
+    )
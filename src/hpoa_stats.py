@@ -0,0 +1,144 @@
+"""
+Per-source statistics of phenotype.hpoa, collected while the transforms read it.
+
+src/versions.py versions each source contributing to HPOA (OMIM, Orphanet, DECIPHER)
+by the latest biocuration date of its rows. Rather than re-reading the whole file for
+that after the transforms have run, `HpoaStats` is fed every row the HPOA fanout reads
+and the totals are written to a small sidecar next to the file:
+
+    data/phenotype.hpoa.stats.json
+
+holding the `#description:` header line, and per `database_id` prefix the row count
+and the latest biocuration date. The sidecar records the size and mtime of the file it
+describes; `read_hpoa_stats` ignores a sidecar that no longer matches. When there is no
+usable sidecar, `scan_hpoa_stats` computes the same statistics by looking only at the
+`database_id` and `biocuration` columns of each line.
+
+Usage:
+uv run python -m src.hpoa_stats [-i data/phenotype.hpoa]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from loguru import logger
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+HPOA_FILE = INGEST_DIR / "data" / "phenotype.hpoa"
+STATS_SUFFIX = ".stats.json"
+
+_BIOCURATION_DATE = re.compile(r"\[(\d{4}-\d{2}-\d{2})\]")
+
+
+def stats_path(hpoa_file: Union[str, Path]) -> Path:
+    """Where the stats sidecar for hpoa_file is stored."""
+    hpoa_file = Path(hpoa_file)
+    return hpoa_file.with_name(hpoa_file.name + STATS_SUFFIX)
+
+
+def _file_signature(path: Path) -> Dict[str, int]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_description(hpoa_file: Union[str, Path]) -> str:
+    """Return the `#description:` line of phenotype.hpoa's header, or "" if there is none."""
+    with open(hpoa_file) as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            if line.startswith("#description:"):
+                return line
+    return ""
+
+
+class HpoaStats:
+    """Row counts and latest biocuration dates, by `database_id` prefix (OMIM, ORPHA, DECIPHER)."""
+
+    def __init__(self):
+        """Start with no rows counted."""
+        self.row_counts: Dict[str, int] = {}
+        self.max_dates: Dict[str, str] = {}
+
+    def add(self, database_id: str, biocuration: Optional[str]):
+        """
+        Count one row.
+
+        :param database_id: the row's database_id (e.g. ORPHA:79474)
+        :param biocuration: the row's biocuration field (e.g. HPO:probinson[2021-06-21];HPO:lccarmody[2018-10-03])
+        """
+        prefix = database_id.split(":", 1)[0]
+        self.row_counts[prefix] = self.row_counts.get(prefix, 0) + 1
+        if not biocuration:
+            return
+        latest = max(_BIOCURATION_DATE.findall(biocuration), default=None)
+        if latest and latest > self.max_dates.get(prefix, ""):
+            self.max_dates[prefix] = latest
+
+    def add_row(self, row: Dict[str, Any]):
+        """Count one row as read by koza's CSV reader."""
+        self.add(row["database_id"], row.get("biocuration"))
+
+    def write(self, hpoa_file: Union[str, Path]) -> Path:
+        """Write the stats sidecar for hpoa_file, which these stats were collected from."""
+        hpoa_file = Path(hpoa_file)
+        path = stats_path(hpoa_file)
+        stats = {
+            "hpoa_file": _file_signature(hpoa_file),
+            "description": read_description(hpoa_file),
+            "row_counts": self.row_counts,
+            "max_biocuration_dates": self.max_dates,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(stats, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote phenotype.hpoa statistics to {path}")
+        return path
+
+
+def read_hpoa_stats(hpoa_file: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Read the stats sidecar for hpoa_file.
+
+    :param hpoa_file: path to phenotype.hpoa
+    :return: the sidecar's contents, or None if it is missing, unreadable or describes another version of the file
+    """
+    hpoa_file = Path(hpoa_file)
+    try:
+        stats = json.loads(stats_path(hpoa_file).read_text())
+        if stats["hpoa_file"] != _file_signature(hpoa_file):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return stats
+
+
+def scan_hpoa_stats(hpoa_file: Union[str, Path]) -> HpoaStats:
+    """
+    Compute the statistics directly from hpoa_file.
+
+    Only the first (`database_id`) and last (`biocuration`) columns of each line are
+    looked at; the lines aren't split into all their fields.
+    """
+    stats = HpoaStats()
+    with open(hpoa_file) as f:
+        for line in f:
+            if line.startswith(("#", "database_id")) or not line.strip():
+                continue
+            database_id = line[:line.find("\t")]
+            stats.add(database_id, line.rpartition("\t")[2])
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-i", "--input", default=str(HPOA_FILE), help="Path to phenotype.hpoa")
+    args = parser.parse_args()
+
+    scan_hpoa_stats(args.input).write(args.input)
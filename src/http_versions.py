@@ -0,0 +1,134 @@
+"""
+Concurrent, cached HTTP Last-Modified probes for src/versions.py.
+
+Sources without an in-file version (the HP ontology, the Mondo SSSOM) are
+versioned by the Last-Modified header of their download URL. Probing them
+one after another costs a network round trip each on every metadata run, so
+`probe_versions`:
+
+  - sends one HEAD request per distinct URL, all at once from a thread pool,
+    each with its own timeout, so wall time stays one round trip however many
+    sources there are and a hung server can't stall the metadata step;
+  - caches the Last-Modified and ETag of every successful probe on disk, keyed
+    by URL. Entries younger than the TTL are used without any request; older
+    ones are revalidated with a conditional request (If-None-Match /
+    If-Modified-Since), so an unchanged file costs a 304.
+
+kozahub's `version_from_http_last_modified` makes its own unconditional request
+without a timeout, so the request is made here. The version is the
+Last-Modified date, as YYYY-MM-DD, with the method "http_last_modified".
+
+A failed or timed out probe keeps the last response cached for its URL, which is
+retried on the next run. A URL that has never been probed successfully is
+reported as ("unknown", "unavailable"), the same as a missing local file,
+rather than failing the metadata step.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import requests
+from loguru import logger
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+CACHE_FILE = INGEST_DIR / "data" / "http_versions.cache.json"
+CACHE_TTL_SECONDS = 6 * 60 * 60
+TIMEOUT_SECONDS = 10.0
+
+UNAVAILABLE = ("unknown", "unavailable")
+
+
+def version_from_last_modified(last_modified: Optional[str]) -> tuple[str, str]:
+    """Return (YYYY-MM-DD, "http_last_modified") for a Last-Modified header value."""
+    if not last_modified:
+        return UNAVAILABLE
+    try:
+        return parsedate_to_datetime(last_modified).date().isoformat(), "http_last_modified"
+    except (TypeError, ValueError):
+        return UNAVAILABLE
+
+
+def _read_cache(cache_file: Path) -> dict[str, dict[str, Any]]:
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_cache(cache_file: Path, cache: dict[str, dict[str, Any]]):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n")
+    os.replace(tmp_file, cache_file)
+
+
+def _probe(session: requests.Session, url: str, cached: Optional[dict[str, Any]], timeout: float):
+    """HEAD url (conditionally, if there is a cached entry). Return the new cache entry, or None on failure."""
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        response = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+    except requests.RequestException as e:
+        logger.warning(f"Could not probe {url}: {e}")
+        return None
+
+    if response.status_code == 304 and cached:
+        return {**cached, "checked_at": time.time()}
+    if not response.ok:
+        logger.warning(f"Could not probe {url}: HTTP {response.status_code}")
+        return None
+    return {
+        "last_modified": response.headers.get("Last-Modified"),
+        "etag": response.headers.get("ETag"),
+        "checked_at": time.time(),
+    }
+
+
+def probe_versions(
+    urls: Iterable[str],
+    cache_file: Path = CACHE_FILE,
+    ttl: float = CACHE_TTL_SECONDS,
+    timeout: float = TIMEOUT_SECONDS,
+) -> dict[str, tuple[str, str]]:
+    """
+    Version each URL by its Last-Modified header.
+
+    :param urls: URLs to version (duplicates are probed once)
+    :param cache_file: JSON file of Last-Modified/ETag responses by URL
+    :param ttl: seconds a cached response is used without revalidating it
+    :param timeout: connect and read timeout of each request, in seconds
+    :return: dict of URL to (version, version_method)
+    """
+    urls = list(dict.fromkeys(urls))
+    cache = _read_cache(cache_file)
+    now = time.time()
+    # Entries without a Last-Modified have no version yet, so are probed whatever their age
+    to_probe = [
+        url
+        for url in urls
+        if not cache.get(url, {}).get("last_modified") or now - cache[url].get("checked_at", 0) >= ttl
+    ]
+
+    if to_probe:
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=len(to_probe)) as pool:
+            entries = pool.map(lambda url: _probe(session, url, cache.get(url), timeout), to_probe)
+            for url, entry in zip(to_probe, entries, strict=True):
+                if entry is not None:
+                    cache[url] = entry
+                elif cache.get(url, {}).get("last_modified"):
+                    # Keep the stale entry (and its age, so the next run retries) rather than losing the version
+                    logger.warning(f"Keeping the last known version of {url}")
+        _write_cache(cache_file, cache)
+
+    return {url: version_from_last_modified(cache.get(url, {}).get("last_modified")) for url in urls}
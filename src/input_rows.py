@@ -0,0 +1,207 @@
+"""
+A transform's input rows, read as koza's Source reads them, with counts and byte offsets.
+
+koza's Source yields only the rows its reader's filters keep, and tells neither how many
+it dropped nor how far into its files it is. `InputRows` reads a reader config's files
+with koza's own `open_resource`, `CSVReader` and `RowFilter`, so its rows are those the
+Source would yield (row limit included), and keeps what src.progress reports:
+
+  - `rows_read`, the rows parsed from the input files, and `rows_dropped`, those the
+    reader's filters dropped;
+  - `bytes_read()`, the offset in the files opened (compressed bytes for .gz inputs) and
+    their total size.
+
+koza's CSVReader builds a dict of every configured column for each line, and then a
+second, typed one, although each transform reads only a few of the columns. Given the
+columns to keep, `InputRows` reads through `ProjectedCSVReader` instead, which builds a
+single dict of just those columns (and those the filters test) from each parsed line. A
+transform lists its columns as `row_columns:` under `transform:` in its yaml (koza's
+reader config takes no extra keys), which `row_columns` returns.
+
+src.pipeline points every transform's runner at an `InputRows` of its `row_columns` (or,
+for a Parquet intermediate, src.parquet_io's `ParquetRows`), and src.hpoa_fanout reads its
+shared source through one. A plain `koza transform` reads koza's full rows, which the
+transforms take just the same. Subclasses read other formats by overriding `_read_rows`.
+
+Usage:
+    rows = InputRows(config.reader, runner.base_directory, columns=["hpo_id", "frequency"])
+    runner.data[None] = rows
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from koza.io.reader.csv_reader import FIELDTYPE_CLASS, CSVReader
+from koza.io.utils import open_resource
+from koza.model.formats import InputFormat
+from koza.model.reader import FieldType
+from koza.utils.row_filter import RowFilter
+
+ROW_COLUMNS_FIELD = "row_columns"
+
+
+def _column_name(column) -> str:
+    return column if isinstance(column, str) else next(iter(column))
+
+
+def row_columns(reader_config, extra_fields: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Return the columns a transform reads: its `row_columns`, or None to read them all.
+
+    :param reader_config: the transform's koza reader config
+    :param extra_fields: the transform's `transform:` fields
+    """
+    projection = extra_fields.get(ROW_COLUMNS_FIELD)
+    if projection is None:
+        return None
+    columns = [_column_name(column) for column in reader_config.columns or []]
+    unknown = [column for column in projection if columns and column not in columns]
+    if unknown:
+        raise ValueError(f"{ROW_COLUMNS_FIELD} {unknown} are not among the reader's columns {columns}")
+    return list(projection)
+
+
+class ProjectedCSVReader(CSVReader):
+    """
+    koza's CSVReader, yielding a dict of only the given columns of each line.
+
+    Header, comment and blank-line handling, and the error on short lines, are CSVReader's.
+
+    :param columns: the columns to keep, which the header must have
+    """
+
+    def __init__(self, io_str: IO[str], config, columns: Sequence[str], *args: Any, **kwargs: Any):
+        """Set up the reader as CSVReader does."""
+        super().__init__(io_str, config, *args, **kwargs)
+        self.columns = list(columns)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the columns of each line."""
+        header = self.header
+        missing = [column for column in self.columns if column not in header]
+        if missing:
+            raise ValueError(f"Columns {missing} are not in the header of {self.io_str.name}: {header}")
+        positions = [(column, header.index(column)) for column in self.columns]
+        # Columns typed other than str in the reader config, converted as CSVReader does
+        converters = [
+            (column, FIELDTYPE_CLASS[field_type])
+            for column in self.columns
+            if (field_type := self.field_type_map.get(column, FieldType.str)) in FIELDTYPE_CLASS
+            and FIELDTYPE_CLASS[field_type] is not str
+        ]
+        comment_char = self.config.comment_char
+
+        for row in self.csv_reader:
+            if not row:
+                if self.config.skip_blank_lines:
+                    continue
+                row = ["NaN"] * len(header)
+            elif comment_char and row[0].startswith(comment_char):
+                continue
+            elif len(row) < len(header):
+                raise ValueError(
+                    f"CSV file {self.io_str.name} is missing {len(header) - len(row)} "
+                    f"column(s) at {self.csv_reader.line_num}"
+                )
+
+            item = {column: row[index].strip() for column, index in positions}
+            for column, converter in converters:
+                item[column] = converter(item[column])
+            yield item
+
+
+def _file_offset(f) -> Optional[Tuple[int, int]]:
+    """(offset, size) of the file under a text reader, or None if it can't be told."""
+    f = getattr(f, "buffer", f)
+    # gzip.GzipFile: report the offset in the compressed file, whose size we know
+    f = getattr(f, "fileobj", None) or f
+    try:
+        return f.tell(), os.fstat(f.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class InputRows:
+    """
+    The rows of a koza reader config's input files, counting the rows read and dropped.
+
+    :param reader_config: the transform's koza reader config
+    :param base_directory: directory relative input files are resolved against (the yaml's)
+    :param row_limit: stop after this many rows kept by the filters (0 reads everything)
+    :param columns: the columns to keep of each row, besides those the filters test (None keeps all)
+    """
+
+    def __init__(
+        self,
+        reader_config,
+        base_directory: Union[str, Path],
+        row_limit: int = 0,
+        columns: Optional[Iterable[str]] = None,
+    ):
+        """Set up the reader; no file is opened until the rows are iterated."""
+        self.reader_config = reader_config
+        self.base_directory = Path(base_directory)
+        self.row_limit = row_limit
+        if columns is not None:
+            filtered = [column_filter.column for column_filter in reader_config.filters]
+            columns = list(dict.fromkeys([*columns, *filtered]))
+        self.columns: Optional[List[str]] = columns
+        self.rows_read = 0
+        self.rows_dropped = 0
+        self._files: List[IO] = []
+
+    def paths(self) -> List[Path]:
+        """Return the input files, resolved against the base directory."""
+        return [self.base_directory / file for file in self.reader_config.files]
+
+    def _read_rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield every row of the input files (of the kept columns), before filtering."""
+        if self.reader_config.format != InputFormat.csv:
+            raise ValueError(f"Input rows are only read from CSV files, not {self.reader_config.format}")
+        for path in self.paths():
+            resource = open_resource(path)
+            if isinstance(resource, tuple):
+                raise ValueError(f"Input rows are not read from archives such as {path}")
+            self._files.append(resource.reader)
+            if self.columns is None:
+                yield from CSVReader(resource.reader, config=self.reader_config)
+            else:
+                yield from ProjectedCSVReader(resource.reader, self.reader_config, self.columns)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the rows the reader's filters keep, up to the row limit."""
+        row_filter = RowFilter(self.reader_config.filters)
+        rows = 0
+        try:
+            for row in self._read_rows():
+                self.rows_read += 1
+                if not row_filter.include_row(row):
+                    self.rows_dropped += 1
+                    continue
+                yield row
+                rows += 1
+                if self.row_limit and rows == self.row_limit:
+                    return
+        finally:
+            for f in self._files:
+                f.close()
+            self._files = []
+
+    def bytes_read(self) -> Optional[Tuple[int, int]]:
+        """Return (bytes read, total bytes) of the input files while they are read, if known."""
+        if not self._files:
+            return None
+        offsets = [_file_offset(f) for f in self._files]
+        if any(offset is None for offset in offsets):
+            return None
+        done = sum(offset for offset, _ in offsets)
+        # Files not opened yet count in full towards the total
+        unopened = self.paths()[len(self._files):]
+        try:
+            total = sum(size for _, size in offsets) + sum(path.stat().st_size for path in unopened)
+        except OSError:
+            return None
+        return done, total
@@ -0,0 +1,245 @@
+"""
+Opt-in timing of the stages inside a transform run.
+
+With instrumentation enabled (`--instrument` on src.pipeline / src.hpoa_fanout, or
+INGEST_INSTRUMENT=1 in the environment), cumulative wall time and call counts are
+recorded per transform for these stages:
+
+  - read               pulling rows from the koza reader (after any @koza.prepare_data)
+  - transform_record   the whole transform_record call, including the stages below
+  - frequency          resolving frequency fields (resolve_frequency, cache hits included)
+  - knowledge_source   knowledge source and predicate resolution
+  - model              building the Biolink association (build_association)
+  - write              handing the associations to the koza writer
+
+The inner stages are marked with the `timed` decorator; read, transform_record and
+write are wrapped around a runner by `instrument_runner`. When instrumentation is off,
+`instrument_runner` does nothing and a `timed` function costs one extra call.
+
+Each driver writes its process's timings to `output/instrumentation/{transform}.json`
+with `write_summary`. Every run of src.pipeline or src.hpoa_fanout, instrumented or not,
+starts by clearing the files of earlier runs with `clear_summaries`, so an uninstrumented
+build never reports an earlier build's timings. scripts/write_metadata.py collects them
+into `output/release-instrumentation.yaml`, next to release-metadata.yaml and
+release-artifacts.yaml, so they can be compared release to release; without timings, it
+removes that file.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import yaml
+
+ENV_VAR = "INGEST_INSTRUMENT"
+INSTRUMENTATION_DIR = "instrumentation"
+RELEASE_INSTRUMENTATION_FILE = "release-instrumentation.yaml"
+
+STAGES = ("read", "transform_record", "frequency", "knowledge_source", "model", "write")
+
+# transform name -> stage -> [seconds, calls]; None while instrumentation is off
+_timings: Optional[Dict[str, Dict[str, List[float]]]] = None
+# The transform whose transform_record is running, which the inner stages are charged to
+_current = "unknown"
+
+
+def enable():
+    """Start recording (keeps anything already recorded)."""
+    global _timings
+    if _timings is None:
+        _timings = {}
+
+
+def disable():
+    """Stop recording and drop what was recorded."""
+    global _timings, _current
+    _timings = None
+    _current = "unknown"
+
+
+def is_enabled() -> bool:
+    return _timings is not None
+
+
+def _stage(transform: str, stage: str) -> List[float]:
+    return _timings.setdefault(transform, {}).setdefault(stage, [0.0, 0])
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Charge a decorated function's calls to `stage` of the running transform."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _timings is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals = _stage(_current, stage)
+                totals[0] += time.perf_counter() - start
+                totals[1] += 1
+
+        return wrapper
+
+    return decorator
+
+
+def timed_rows(rows: Iterable, transform: str) -> Iterator:
+    """Yield rows from an iterable, charging the time spent fetching each to `read` of transform."""
+    if _timings is None:
+        yield from rows
+        return
+    totals = _stage(transform, "read")
+    iterator = iter(rows)
+    while True:
+        start = time.perf_counter()
+        try:
+            row = next(iterator)
+        except StopIteration:
+            totals[0] += time.perf_counter() - start
+            return
+        totals[0] += time.perf_counter() - start
+        totals[1] += 1
+        yield row
+
+
+def _timed_transform_record(fn: Callable, transform: str) -> Callable:
+    totals = _stage(transform, "transform_record")
+
+    def wrapper(koza_transform, row):
+        global _current
+        _current = transform
+        start = time.perf_counter()
+        try:
+            return fn(koza_transform, row)
+        finally:
+            totals[0] += time.perf_counter() - start
+            totals[1] += 1
+
+    return wrapper
+
+
+def _timed_write(fn: Callable, transform: str) -> Callable:
+    totals = _stage(transform, "write")
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            totals[0] += time.perf_counter() - start
+            totals[1] += 1
+
+    return wrapper
+
+
+def instrument_hooks(hooks, writer, transform: str):
+    """
+    Time a transform's transform_record hooks and its writer's write, in place.
+
+    :param hooks: the transform's koza KozaTransformHooks
+    :param writer: the koza writer the transform writes to
+    :param transform: name the timings are recorded under
+    """
+    if _timings is None:
+        return
+    for hook in hooks.transform_record:
+        hook.fn = _timed_transform_record(hook.fn, transform)
+    writer.write = _timed_write(writer.write, transform)
+
+
+def instrument_runner(runner, transform: str):
+    """
+    Time the read, transform_record and write stages of a KozaRunner, in place.
+
+    Reading is timed on the rows the transform receives, i.e. after its @koza.prepare_data
+    function, if any, so that function still gets the reader's own iterator.
+
+    :param runner: runner from KozaRunner.from_config_file
+    :param transform: name the timings are recorded under (the transform's config name)
+    """
+    if _timings is None:
+        return
+    for tag, hooks in runner.hooks_by_tag.items():
+        if hooks.prepare_data:
+            prepare_data = hooks.prepare_data[0].fn
+            hooks.prepare_data[0].fn = lambda koza_transform, data, fn=prepare_data: timed_rows(
+                fn(koza_transform, data), transform
+            )
+        elif tag in runner.data:
+            runner.data[tag] = timed_rows(runner.data[tag], transform)
+        instrument_hooks(hooks, runner.writer, transform)
+
+
+def summary() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Return the recorded timings: dict of transform to stage (in STAGES order) to seconds and calls."""
+    if not _timings:
+        return {}
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    return {
+        transform: {
+            stage: {"seconds": round(stages[stage][0], 3), "calls": int(stages[stage][1])}
+            for stage in sorted(stages, key=lambda s: order.get(s, len(order)))
+        }
+        for transform, stages in sorted(_timings.items())
+    }
+
+
+def write_summary(output_dir: Union[str, Path]) -> List[Path]:
+    """
+    Write this process's timings to `{output_dir}/instrumentation/{transform}.json`.
+
+    :return: the files written (none when instrumentation is off)
+    """
+    timings = summary()
+    if not timings:
+        return []
+    directory = Path(output_dir) / INSTRUMENTATION_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for transform, stages in timings.items():
+        path = directory / f"{transform}.json"
+        path.write_text(json.dumps(stages, indent=2) + "\n")
+        paths.append(path)
+    return paths
+
+
+def clear_summaries(output_dir: Union[str, Path]):
+    """Remove the timings earlier runs wrote into output_dir, so they are not reported with this run's."""
+    for path in (Path(output_dir) / INSTRUMENTATION_DIR).glob("*.json"):
+        path.unlink()
+
+
+def read_summaries(output_dir: Union[str, Path]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Read the timings write_summary wrote into output_dir, by transform."""
+    directory = Path(output_dir) / INSTRUMENTATION_DIR
+    return {path.stem: json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))}
+
+
+def write_release_instrumentation(output_dir: Union[str, Path]) -> Optional[Path]:
+    """
+    Write the timings in output_dir/instrumentation/ to output_dir/release-instrumentation.yaml.
+
+    Without timings, a release-instrumentation.yaml from an earlier build is removed.
+
+    :return: path to the file written, or None if there were no timings
+    """
+    timings = read_summaries(output_dir)
+    path = Path(output_dir) / RELEASE_INSTRUMENTATION_FILE
+    if not timings:
+        path.unlink(missing_ok=True)
+        return None
+    with open(path, "w") as f:
+        yaml.safe_dump({"instrumentation": timings}, f, sort_keys=False)
+    return path
+
+
+if os.environ.get(ENV_VAR, "").lower() not in ("", "0", "false", "no"):
+    enable()
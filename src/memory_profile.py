@@ -0,0 +1,255 @@
+"""
+Opt-in memory accounting of the ingest's expensive stages.
+
+With memory profiling enabled (`--memory-profile` on src.pipeline / src.hpoa_fanout, or
+INGEST_MEMORY_PROFILE=1 in the environment), each stage wrapped in `memory_stage` records:
+
+  - rss_before_mb / rss_after_mb   resident set size around the stage
+  - peak_rss_mb                    the RSS high-water mark during the stage; on Linux
+                                   VmHWM is reset when the stage starts, elsewhere it is
+                                   the process's high-water mark so far
+  - python_peak_mb                 peak of the Python heap traced by tracemalloc
+  - python_growth_mb               Python heap still held when the stage ends
+  - top_sites                      the source lines whose allocations grew the most
+
+RSS includes native memory (DuckDB, numpy) that tracemalloc can't see; the tracemalloc
+figures say which Python code holds what. Stages can nest: a stage's peaks include those
+of the stages inside it.
+
+The stages profiled are the preprocessing DuckDB join (src.pipeline), koza mapping
+loads, the ontology closure (read_ontology_terms_cached) and each transform pass. Each
+driver writes its process's report to `output/memory/{transform}.json` with
+`write_report`, and logs it.
+
+tracemalloc slows allocation-heavy code down several times, so this is for sizing build
+containers and chasing regressions, not for production runs.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import linecache
+import os
+import re
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+ENV_VAR = "INGEST_MEMORY_PROFILE"
+MEMORY_DIR = "memory"
+TOP_SITES = 10
+
+_MB = 1 << 20
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+# Allocations made by the profiler itself
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# transform name -> stage -> report; None while profiling is off
+_reports: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+
+
+@dataclass
+class _Frame:
+    transform: str
+    stage: str
+    # Peaks seen by nested stages, which reset the high-water marks when they start
+    child_peak_rss: int = 0
+    child_peak_traced: int = 0
+
+
+_stack: List[_Frame] = []
+
+
+def enable():
+    """Start profiling (tracemalloc starts with the first stage)."""
+    global _reports
+    if _reports is None:
+        _reports = {}
+
+
+def disable():
+    """Stop profiling and drop the reports."""
+    global _reports
+    _reports = None
+    _stack.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _reports is not None
+
+
+def _rss() -> Tuple[int, int]:
+    """Return (current RSS, RSS high-water mark) in bytes."""
+    try:
+        status = _PROC_STATUS.read_text()
+        rss, hwm = (int(re.search(rf"{key}:\s+(\d+) kB", status).group(1)) << 10 for key in ("VmRSS", "VmHWM"))
+        return rss, hwm
+    except (OSError, AttributeError):
+        # ru_maxrss is in KiB on Linux and bytes on macOS; there's no current RSS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        maxrss = maxrss if sys.platform == "darwin" else maxrss << 10
+        return maxrss, maxrss
+
+
+def _reset_rss_peak() -> bool:
+    """Reset VmHWM to the current RSS (Linux only). Return whether it was reset."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _top_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    sites = []
+    for stat in after.filter_traces(_IGNORED).compare_to(before.filter_traces(_IGNORED), "lineno")[:limit]:
+        if stat.size_diff <= 0:
+            break
+        frame = stat.traceback[0]
+        sites.append({
+            "site": f"{frame.filename}:{frame.lineno}",
+            "growth_mb": round(stat.size_diff / _MB, 2),
+            "blocks": stat.count_diff,
+        })
+    return sites
+
+
+@contextmanager
+def memory_stage(stage: str, transform: Optional[str] = None) -> Iterator[None]:
+    """
+    Record the memory use of the code in the block as `stage` of a transform.
+
+    :param stage: stage name
+    :param transform: transform the stage belongs to (defaults to the enclosing stage's)
+    """
+    if _reports is None:
+        yield
+        return
+    if transform is None:
+        transform = _stack[-1].transform if _stack else "unknown"
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    frame = _Frame(transform, stage)
+    _stack.append(frame)
+    rss_before, _ = _rss()
+    peak_reset = _reset_rss_peak()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    snapshot_before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        snapshot_after = tracemalloc.take_snapshot()
+        traced_after, traced_peak = tracemalloc.get_traced_memory()
+        rss_after, rss_peak = _rss()
+        _stack.pop()
+        rss_peak = max(rss_peak, frame.child_peak_rss)
+        traced_peak = max(traced_peak, frame.child_peak_traced)
+        if _stack:
+            parent = _stack[-1]
+            parent.child_peak_rss = max(parent.child_peak_rss, rss_peak)
+            parent.child_peak_traced = max(parent.child_peak_traced, traced_peak)
+
+        report = {
+            "rss_before_mb": round(rss_before / _MB, 1),
+            "rss_after_mb": round(rss_after / _MB, 1),
+            "peak_rss_mb": round(rss_peak / _MB, 1),
+            "peak_rss_is_process_peak": not peak_reset,
+            "python_peak_mb": round((traced_peak - traced_before) / _MB, 1),
+            "python_growth_mb": round((traced_after - traced_before) / _MB, 1),
+            "top_sites": _top_sites(snapshot_before, snapshot_after, TOP_SITES),
+        }
+        stages = _reports.setdefault(transform, {})
+        previous = stages.get(stage)
+        # A stage run more than once keeps the report of its largest peak
+        report["calls"] = previous["calls"] + 1 if previous else 1
+        if previous is None or report["peak_rss_mb"] >= previous["peak_rss_mb"]:
+            stages[stage] = report
+        else:
+            previous["calls"] = report["calls"]
+
+
+def profiled(stage: str) -> Callable[[Callable], Callable]:
+    """Run the decorated function as a memory_stage of the enclosing stage's transform."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _reports is None:
+                return fn(*args, **kwargs)
+            with memory_stage(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profile_mappings(runner, transform: str):
+    """Profile a KozaRunner's mapping loads (`load_mappings`) as the `mappings` stage, in place."""
+    if _reports is None:
+        return
+    load_mappings = runner.load_mappings
+
+    def wrapper():
+        with memory_stage("mappings", transform):
+            return load_mappings()
+
+    runner.load_mappings = wrapper
+
+
+def summary() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Return the recorded reports: dict of transform to stage to report."""
+    return {transform: dict(stages) for transform, stages in sorted((_reports or {}).items())}
+
+
+def log_report(transform: str, stages: Dict[str, Dict[str, Any]], top_sites: int = 3):
+    for stage, report in stages.items():
+        logger.info(
+            f"{transform} {stage}: peak RSS {report['peak_rss_mb']:,.0f} MB "
+            f"({report['rss_before_mb']:,.0f} -> {report['rss_after_mb']:,.0f} MB), "
+            f"Python peak {report['python_peak_mb']:,.1f} MB, growth {report['python_growth_mb']:,.1f} MB"
+        )
+        for site in report["top_sites"][:top_sites]:
+            logger.info(f"  {site['growth_mb']:,.2f} MB in {site['blocks']:,} blocks at {site['site']}")
+
+
+def write_report(output_dir: Union[str, Path]) -> List[Path]:
+    """
+    Log this process's reports and write them to `{output_dir}/memory/{transform}.json`.
+
+    :return: the files written (none when profiling is off)
+    """
+    reports = summary()
+    if not reports:
+        return []
+    directory = Path(output_dir) / MEMORY_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for transform, stages in reports.items():
+        log_report(transform, stages)
+        path = directory / f"{transform}.json"
+        path.write_text(json.dumps(stages, indent=2) + "\n")
+        paths.append(path)
+    return paths
+
+
+if os.environ.get(ENV_VAR, "").lower() not in ("", "0", "false", "no"):
+    enable()
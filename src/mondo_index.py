@@ -0,0 +1,189 @@
+"""
+Compact exact-match index over mondo.sssom.tsv.
+
+The g2p preprocessing join (scripts/gene_to_phenotype_extras.py) maps disease ids to
+MONDO through the `skos:exactMatch` rows of mondo.sssom.tsv, `object_id` -> `subject_id`,
+the last row for an id winning as it did in koza's `mondo_map` mapping. This module
+compiles that mapping once per download into a sorted, fixed-width numpy array saved
+next to the SSSOM file, read with DuckDB so the 50 metadata lines and the ~300k rows
+aren't parsed in Python. The index file name carries the sha256 of the SSSOM file, so a
+new download is never served a stale index.
+
+Loading memory-maps the array. Lookups are a binary search that return None for
+unmapped ids instead of raising, and `columns` hands the whole mapping to DuckDB for
+the preprocessing join.
+
+Usage:
+uv run python -m src.mondo_index
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import duckdb
+import numpy as np
+from loguru import logger
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+MONDO_SSSOM_FILE = INGEST_DIR / "data" / "mondo.sssom.tsv"
+
+SSSOM_COLUMNS = {
+    name: "VARCHAR"
+    for name in ("subject_id", "subject_label", "predicate_id", "object_id", "object_label", "mapping_justification")
+}
+
+# Exact matches in file order, so that the last mapping for an id wins
+EXACT_MATCH_SQL = """
+create temp table exact_matches as
+select subject_id, object_id
+from read_csv($sssom_file, delim='\t', quote='"', skip=$skip, header=true, columns=$columns)
+where predicate_id = 'skos:exactMatch'
+"""
+
+INDEX_SQL = """
+select object_id, coalesce(arg_max(subject_id, rowid), '') as mondo_id
+from exact_matches
+group by object_id
+order by object_id
+"""
+
+
+def _sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _comment_lines(path: Path) -> int:
+    count = 0
+    with open(path) as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            count += 1
+    return count
+
+
+def index_path(sssom_file: Union[str, Path], sssom_sha256: str) -> Path:
+    """Return where the index for a given version of an SSSOM file is stored."""
+    sssom_file = Path(sssom_file)
+    return sssom_file.with_name(f"{sssom_file.stem}.exact_match.{sssom_sha256[:16]}.npy")
+
+
+class MondoIndex:
+    """Sorted key -> value array searched with np.searchsorted."""
+
+    def __init__(self, entries: np.ndarray):
+        """Wrap a structured array of sorted `key` and `value` byte strings."""
+        self._keys = entries["key"]
+        self._values = entries["value"]
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str]) -> "MondoIndex":
+        return cls(_to_array(mapping))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "MondoIndex":
+        return cls(np.load(path, mmap_mode="r"))
+
+    def __len__(self) -> int:
+        """Return the number of mapped ids."""
+        return len(self._keys)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Return the mapped id for key, or None if it isn't mapped.
+
+        :param key: id to map (e.g. OMIM:614129)
+        :return: the mapped id (e.g. MONDO:0013588) or None
+        """
+        encoded = key.encode()
+        i = int(np.searchsorted(self._keys, encoded))
+        if i < len(self._keys) and self._keys[i] == encoded:
+            return self._values[i].decode() or None
+        return None
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the mapping as `object_id` and `mondo_id` string columns, for DuckDB to scan."""
+        return {"object_id": np.char.decode(self._keys), "mondo_id": np.char.decode(self._values)}
+
+
+def _to_array(mapping: Dict[str, str]) -> np.ndarray:
+    keys = sorted(mapping)
+    encoded_keys = [key.encode() for key in keys]
+    encoded_values = [mapping[key].encode() for key in keys]
+    dtype = [
+        ("key", f"S{max(map(len, encoded_keys), default=1)}"),
+        ("value", f"S{max(map(len, encoded_values), default=1)}"),
+    ]
+    return np.array(list(zip(encoded_keys, encoded_values, strict=True)), dtype=dtype)
+
+
+def read_exact_matches(sssom_file: Union[str, Path]) -> Dict[str, str]:
+    """
+    Read the exact matches of an SSSOM file.
+
+    :param sssom_file: path to mondo.sssom.tsv
+    :return: dict of object_id to the subject_id of its last exact match
+    """
+    sssom_file = Path(sssom_file)
+    con = duckdb.connect(":memory:")
+    try:
+        con.execute(
+            EXACT_MATCH_SQL,
+            {"sssom_file": str(sssom_file), "skip": _comment_lines(sssom_file), "columns": SSSOM_COLUMNS},
+        )
+        return dict(con.execute(INDEX_SQL).fetchall())
+    finally:
+        con.close()
+
+
+def build_mondo_index(sssom_file: Union[str, Path] = MONDO_SSSOM_FILE, sssom_sha256: Optional[str] = None) -> Path:
+    """
+    Compile the exact-match index for sssom_file, unless it is already up to date.
+
+    Indexes for other versions of the file are removed. The index is written to a
+    temporary file and renamed into place, so concurrent readers never see a partial file.
+
+    :param sssom_file: path to mondo.sssom.tsv
+    :param sssom_sha256: the file's sha256, if already known
+    :return: path to the index file
+    """
+    sssom_file = Path(sssom_file)
+    path = index_path(sssom_file, sssom_sha256 or _sha256(sssom_file))
+    if path.exists():
+        return path
+
+    entries = _to_array(read_exact_matches(sssom_file))
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, entries)
+    os.replace(tmp_path, path)
+
+    for stale in sssom_file.parent.glob(f"{sssom_file.stem}.exact_match.*.npy"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    logger.info(f"Wrote {len(entries)} exact matches to {path}")
+    return path
+
+
+def load_mondo_index(
+    sssom_file: Union[str, Path] = MONDO_SSSOM_FILE, sssom_sha256: Optional[str] = None
+) -> MondoIndex:
+    """Memory-map the index for sssom_file, building it first if needed."""
+    return MondoIndex.load(build_mondo_index(sssom_file, sssom_sha256))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-i", "--input", default=str(MONDO_SSSOM_FILE), help="Path to mondo.sssom.tsv")
+    args = parser.parse_args()
+
+    build_mondo_index(args.input)
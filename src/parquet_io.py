@@ -0,0 +1,331 @@
+"""
+Parquet hand-off between the preprocessing step, the transforms and downstream merges.
+
+koza reads and writes delimited text only, so Parquet is handled around it with DuckDB:
+
+  - `ParquetWriter` is a koza writer writing a transform's edges to `{name}_edges.parquet`
+    as the transform runs, with the columns (and column order) of the transform yaml's
+    `edge_properties`; `parquet_runner` builds a runner writing through it;
+  - `edges_to_parquet` rewrites an edge TSV koza already wrote as the same Parquet file;
+  - `ParquetRows` reads the rows of the Parquet siblings of a reader config's input
+    files, applying the reader's filters, row limit and column projection as InputRows
+    does (see src/input_rows.py), and `read_runner_input` has a runner read its transform's input
+    that way when the yaml sets `intermediate_format: 'parquet'`. koza's own reader only
+    reads the TSV, so a plain `koza transform` of such a transform fails rather than
+    silently reading the TSV (`check_intermediate_format`).
+
+Edge columns are typed by the Biolink slot they hold, from the annotations of the Biolink
+pydantic model (`edge_property_types`): counts are BIGINT, percentages and quotients
+DOUBLE, `negated` BOOLEAN and multivalued slots (category, publications, knowledge
+sources, ...) VARCHAR[] rather than `|`-joined strings. `typed_edge_columns` converts
+koza's rendering of the columns to those types, for this module and for the batch engine
+(src/disease_to_phenotype_batch.py). DuckDB dictionary-encodes the repetitive columns
+(predicate, knowledge sources, ...) and compresses the rest.
+
+Usage:
+uv run python -m src.parquet_io src/gene_to_disease_transform.yaml [-o output]
+"""
+
+from __future__ import annotations
+
+import argparse
+import types
+import typing
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import duckdb
+import numpy as np
+import yaml
+from biolink_model.datamodel import pydanticmodel_v2
+from duckdb import ColumnExpression, ConstantExpression, Expression, FunctionExpression
+from koza.converter.kgx_converter import KGXConverter
+from koza.io.utils import build_export_row
+from koza.io.writer.tsv_writer import TSVWriter
+from koza.model.formats import OutputFormat
+from koza.model.koza import KozaConfig
+from koza.model.writer import WriterConfig
+from koza.runner import KozaRunner
+from loguru import logger
+
+from src.input_rows import InputRows, row_columns
+from src.phenotype_ingest_utils import kgx_columns
+
+OUTPUT_FORMATS = ("tsv", "parquet")
+PARQUET_COMPRESSION = "zstd"
+READ_BATCH_SIZE = 10000
+WRITE_BATCH_SIZE = 10000
+# koza joins the values of multivalued slots with this in its TSVs
+LIST_DELIMITER = "|"
+# DuckDB types of the scalar slot types; bool first, as it is a subclass of int
+SCALAR_TYPES = [(bool, "BOOLEAN"), (int, "BIGINT"), (float, "DOUBLE")]
+
+
+def _slot_type(annotation) -> str:
+    """Return the DuckDB type of a pydantic field annotation (VARCHAR unless it is a list or a number)."""
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    if typing.get_origin(annotation) is list:
+        return "VARCHAR[]"
+    for python_type, duckdb_type in SCALAR_TYPES:
+        if annotation is python_type:
+            return duckdb_type
+    return "VARCHAR"
+
+
+@lru_cache(maxsize=None)
+def edge_property_types() -> Dict[str, str]:
+    """Return the DuckDB type of each slot of the Biolink associations."""
+    slot_types: Dict[str, str] = {}
+    for model in vars(pydanticmodel_v2).values():
+        if isinstance(model, type) and issubclass(model, pydanticmodel_v2.Association):
+            for slot, field in model.model_fields.items():
+                slot_types.setdefault(slot, _slot_type(field.annotation))
+    return slot_types
+
+
+def typed_edge_columns(columns: Iterable[str]) -> List[Expression]:
+    """
+    Convert edge columns as koza renders them to their Biolink types.
+
+    The columns may hold strings (as read from a koza TSV, multivalued slots `|`-joined)
+    or values already of their type; empty values are expected as NULLs.
+
+    :param columns: the edge columns, in order
+    :return: one expression per column, named after it, for DuckDBPyRelation.project
+    """
+    slot_types = edge_property_types()
+    expressions = []
+    for column in columns:
+        slot_type = slot_types.get(column, "VARCHAR")
+        value = ColumnExpression(column)
+        if slot_type == "VARCHAR[]":
+            value = FunctionExpression("string_split", value, ConstantExpression(LIST_DELIMITER))
+        elif slot_type != "VARCHAR":
+            value = value.cast(slot_type)
+        expressions.append(value.alias(column))
+    return expressions
+
+
+def tsv_to_parquet(tsv_file: Union[str, Path], columns: List[str], parquet_file: Union[str, Path]) -> int:
+    """
+    Convert a koza edge TSV (unquoted, tab separated, with a header) to typed Parquet.
+
+    :param tsv_file: TSV to read
+    :param columns: the TSV's columns, in order
+    :param parquet_file: Parquet file to write
+    :return: number of rows written
+    """
+    con = duckdb.connect(":memory:")
+    try:
+        edges = con.read_csv(
+            str(tsv_file), sep="\t", header=True, quotechar="", escapechar="",
+            dtype={column: "VARCHAR" for column in columns},
+        )
+        edges.project(*typed_edge_columns(columns)).write_parquet(str(parquet_file), compression=PARQUET_COMPRESSION)
+        return con.read_parquet(str(parquet_file)).aggregate("count(*)").fetchone()[0]
+    finally:
+        con.close()
+
+
+def edges_to_parquet(config_file: Union[str, Path], output_dir: str = "output", keep_tsv: bool = False) -> Path:
+    """
+    Rewrite the edge TSV koza wrote for a transform as `{name}_edges.parquet`.
+
+    :param config_file: the transform yaml (for its name and `edge_properties`)
+    :param output_dir: directory holding the edge TSV
+    :param keep_tsv: keep the TSV next to the Parquet file
+    :return: path to the Parquet file
+    """
+    with open(config_file) as f:
+        config = yaml.safe_load(f)
+
+    tsv_file = Path(output_dir) / f"{config['name']}_edges.tsv"
+    parquet_file = tsv_file.with_suffix(".parquet")
+    columns = kgx_columns(config["writer"]["edge_properties"], "edge")
+
+    row_count = tsv_to_parquet(tsv_file, columns, parquet_file)
+    if not keep_tsv:
+        tsv_file.unlink()
+    logger.info(f"Wrote {row_count} edges to {parquet_file}")
+    return parquet_file
+
+
+class ParquetWriter(TSVWriter):
+    """
+    TSVWriter writing `{name}_edges.parquet` as the transform runs, rather than a TSV to convert.
+
+    Edges are rendered as TSVWriter renders them and appended in batches to a DuckDB table,
+    which `finalize` writes out typed as tsv_to_parquet types an edge TSV, so the file is
+    the one edges_to_parquet would have written. The table is kept in memory (DuckDB
+    spills it to its temp directory past its memory limit). Nodes aren't supported.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], source_name: str, config: WriterConfig):
+        """Set up as TSVWriter.__init__ does, but collect the edges in DuckDB rather than open a TSV."""
+        if config.node_properties:
+            raise ValueError(f"{source_name}: ParquetWriter only writes edges, not node_properties")
+        self.basename = source_name
+        self.dirname = output_dir
+        self.delimiter = "\t"
+        self.list_delimiter = LIST_DELIMITER
+        self.converter = KGXConverter()
+        self.config = config
+        self.sssom_config = config.sssom_config
+
+        Path(self.dirname).mkdir(parents=True, exist_ok=True)
+
+        edge_properties = list(config.edge_properties or [])
+        if config.sssom_config:
+            edge_properties = self.add_sssom_columns(edge_properties)
+        self.edge_columns = kgx_columns(edge_properties, "edge")
+        self.edges_file_name = Path(self.dirname, f"{self.basename}_edges.parquet")
+        self._batch: List[List[Optional[str]]] = [[] for _ in self.edge_columns]
+        self._batch_rows = 0
+        self._con = duckdb.connect(":memory:")
+        self._table_created = False
+
+    def write_row(self, record: dict, record_type: str) -> None:
+        """Add an edge to the current batch, as TSVWriter would render it (empty values as NULLs)."""
+        if record_type != "edge":
+            raise ValueError(f"ParquetWriter only writes edges, not {record_type}s")
+        row = build_export_row(record, list_delimiter=self.list_delimiter)
+        for values, column in zip(self._batch, self.edge_columns, strict=True):
+            # Empty values (e.g. an empty list, rendered as "") are NULLs, as tsv_to_parquet reads them
+            values.append((str(row[column]) or None) if column in row else None)
+        self._batch_rows += 1
+        if self._batch_rows >= WRITE_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        """Append the current batch to the edges table (creating it, even if the batch is empty)."""
+        if not self._batch_rows and self._table_created:
+            return
+        self._con.register("batch", {
+            column: np.array(values, dtype=object)
+            for column, values in zip(self.edge_columns, self._batch, strict=True)
+        })
+        # Cast, as DuckDB infers no type for a column of NULLs only
+        batch = self._con.table("batch").project(
+            *[ColumnExpression(column).cast("VARCHAR").alias(column) for column in self.edge_columns]
+        )
+        if self._table_created:
+            batch.insert_into("edges")
+        else:
+            batch.create("edges")
+            self._table_created = True
+        self._con.unregister("batch")
+        self._batch = [[] for _ in self.edge_columns]
+        self._batch_rows = 0
+
+    def finalize(self):
+        """Write the Parquet file."""
+        if self._con is None:
+            return
+        self._flush()
+        self._con.table("edges").project(*typed_edge_columns(self.edge_columns)).write_parquet(
+            str(self.edges_file_name), compression=PARQUET_COMPRESSION
+        )
+        self._con.close()
+        self._con = None
+        logger.info(f"Wrote {self.edge_count} edges to {self.edges_file_name}")
+
+
+def parquet_runner(config_file: Union[str, Path], output_dir: str, **kwargs) -> Tuple[KozaConfig, KozaRunner]:
+    """
+    KozaRunner.from_config_file, with a ParquetWriter in place of the configured writer.
+
+    The runner is built with a passthrough writer so no TSV is created alongside.
+
+    :param config_file: koza transform yaml
+    :param output_dir: directory the Parquet file is written to
+    :param kwargs: passed on to KozaRunner.from_config_file (input_files, overrides, ...)
+    """
+    config, runner = KozaRunner.from_config_file(
+        str(config_file), output_dir=output_dir, output_format=OutputFormat.passthrough, **kwargs
+    )
+    runner.writer = ParquetWriter(output_dir, config.name, config.writer)
+    return config, runner
+
+
+class ParquetRows(InputRows):
+    """
+    Rows of the Parquet files next to a reader config's input files, as koza's readers yield them.
+
+    For `data/x.tsv` this reads `data/x.parquet`. NULLs are returned as empty strings,
+    as koza's CSV reader does for empty fields. Filters, the row limit and the counts are
+    those of InputRows; byte offsets are not known.
+    """
+
+    def paths(self) -> List[Path]:
+        """Return the Parquet siblings of the input files."""
+        return [path.with_suffix(".parquet") for path in super().paths()]
+
+    def _read_rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield every row of the Parquet files (of the kept columns), before filtering."""
+        con = duckdb.connect(":memory:")
+        try:
+            for parquet_file in self.paths():
+                relation = con.read_parquet(str(parquet_file))
+                if self.columns is not None:
+                    relation = relation.project(*[ColumnExpression(column) for column in self.columns])
+                columns = relation.columns
+                while batch := relation.fetchmany(READ_BATCH_SIZE):
+                    for values in batch:
+                        yield {
+                            column: "" if value is None else value
+                            for column, value in zip(columns, values, strict=True)
+                        }
+        finally:
+            con.close()
+
+    def bytes_read(self) -> Optional[Tuple[int, int]]:
+        """Return None: DuckDB doesn't tell how far into the files it has read."""
+        return None
+
+
+def read_runner_input(runner, reader_config, row_limit: int = 0) -> InputRows:
+    """
+    Have a single-reader runner read its transform's `row_columns` through InputRows.
+
+    The input is read from Parquet (see ParquetRows) if the transform's yaml sets
+    `intermediate_format: 'parquet'`.
+
+    :param runner: the KozaRunner of a single-reader transform
+    :param reader_config: the transform's koza reader config
+    :param row_limit: stop after this many rows (0 reads everything)
+    :return: the rows the runner now reads
+    """
+    parquet = runner.extra_transform_fields.get("intermediate_format") == "parquet"
+    columns = row_columns(reader_config, runner.extra_transform_fields)
+    rows = (ParquetRows if parquet else InputRows)(reader_config, runner.base_directory, row_limit, columns)
+    runner.data[None] = rows
+    return rows
+
+
+def check_intermediate_format(koza_transform, data):
+    """
+    `@koza.prepare_data` hook failing a plain `koza transform` of a transform set to read Parquet.
+
+    A prepare_data hook is handed koza's row iterator without its reader config, so it
+    can't find the Parquet files to read instead; only runs whose input read_runner_input
+    set up (src.pipeline, the benchmarks) honour `intermediate_format: 'parquet'`.
+    """
+    if koza_transform.extra_fields.get("intermediate_format") == "parquet" and not isinstance(data, InputRows):
+        raise ValueError(
+            "intermediate_format: 'parquet' is only read through src.parquet_io.read_runner_input "
+            "(e.g. by src.pipeline); a plain `koza transform` reads the TSV intermediate"
+        )
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config_files", nargs="+", help="Transform yamls whose edge TSVs to convert")
+    parser.add_argument("-o", "--output-dir", default="output", help="Path to output directory")
+    parser.add_argument("--keep-tsv", action="store_true", help="Keep the TSVs next to the Parquet files")
+    args = parser.parse_args()
+
+    for config_file in args.config_files:
+        edges_to_parquet(config_file, output_dir=args.output_dir, keep_tsv=args.keep_tsv)
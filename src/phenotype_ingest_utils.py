@@ -2,12 +2,20 @@
 HPOA processing utility methods
 """
 
-from typing import Optional, List, Dict
-from pronto import Ontology
-
-
+import hashlib
+import os
+import sqlite3
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, List, Dict, Iterable, Set, Tuple, Type, Union
+
+import numpy as np
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from src.instrumentation import timed
+from src.memory_profile import profiled
 
 # Knowledge sources
 INFORES_MONARCHINITIATIVE = "infores:monarchinitiative"
@@ -21,6 +29,14 @@ BIOLINK_CONTRIBUTES_TO = "biolink:contributes_to"
 BIOLINK_GENE_ASSOCIATED_WITH_CONDITION = "biolink:gene_associated_with_condition"
 
 
+# Association validation modes, set with `validation:` under `transform:` in a transform's yaml
+VALIDATION_ALL = "all"
+VALIDATION_SAMPLE = "sample"
+VALIDATION_NONE = "none"
+DEFAULT_VALIDATION_SAMPLE_RATE = 1000
+VALIDATION_MODE_ENV = "PHENOTYPE_INGEST_VALIDATION"
+
+
 # Evidence Code translations - https://www.ebi.ac.uk/ols4/ontologies/eco
 evidence_to_eco: Dict = {"IEA": "ECO:0000501", # "inferred from electronic annotation",
                          "PCS": "ECO:0006017", # "published clinical study evidence",
@@ -37,6 +53,29 @@ sex_to_pato: Dict = {"female": "PATO:0000383",
                      "male":   "PATO:0000384"}
 
 
+# KGX columns koza's TSV writer puts first, in this order, when they are among a file's properties
+KGX_CORE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "node": ("id", "category", "name", "description", "xref", "provided_by", "synonym"),
+    "edge": ("id", "subject", "predicate", "object", "category", "provided_by"),
+}
+
+
+def kgx_columns(properties: Iterable[str], record_type: str = "edge") -> List[str]:
+    """
+    Order node or edge properties as the columns of koza's KGX TSV files.
+
+    The core columns come first, then the others sorted, with `_`-prefixed (internal) ones last.
+
+    :param properties: the writer's node_properties or edge_properties
+    :param record_type: "node" or "edge"
+    :return: the column names, in order
+    """
+    properties = set(properties)
+    core = [column for column in KGX_CORE_COLUMNS[record_type] if column in properties]
+    others = sorted(properties.difference(core))
+    return core + [c for c in others if not c.startswith("_")] + [c for c in others if c.startswith("_")]
+
+
 class FrequencyHpoTerm(BaseModel):
     """
     Data class to store relevant information
@@ -50,12 +89,25 @@ class FrequencyHpoTerm(BaseModel):
 class Frequency(BaseModel):
     """
     Converts fields to pydantic field declarations
+
+    Frozen, so that parsed instances can be shared between rows (see resolve_frequency)
     """
+    model_config = ConfigDict(frozen=True)
+
     frequency_qualifier: Optional[str] = None
     has_percentage: Optional[float] = None
     has_quotient: Optional[float] = None
     has_count: Optional[int] = None
     has_total: Optional[int] = None
+    # Set when the raw value couldn't be parsed; callers count these with src.data_quality
+    unparseable: bool = False
+
+
+# Shared result for rows without frequency data
+NO_FREQUENCY = Frequency()
+
+# Shared result for frequency values that can't be parsed
+UNPARSEABLE_FREQUENCY = Frequency(unparseable=True)
 
 
 # HPO "HP:0040279": representing the frequency of phenotypic abnormalities within a patient cohort.
@@ -95,6 +147,39 @@ def get_hpo_term(hpo_id: str) -> Optional[FrequencyHpoTerm]:
         return None
 
 
+# Frequency bands as sorted intervals. The point bands (Excluded at 0%, Obligate at 100%) match exactly;
+# the others are closed below and open above, each running up to the next band's lower bound, so that
+# values falling between the integer ranges of the term definitions (e.g. 79.5%) still get a band.
+# Values in (0%, 1%) are counted as Very rare.
+_point_bands: Dict[float, str] = {term.lower: term.curie
+                                  for term in hpo_term_to_frequency.values() if term.lower == term.upper}
+_interval_bands = sorted((term for term in hpo_term_to_frequency.values() if term.lower != term.upper),
+                         key=lambda term: term.lower)
+_interval_band_edges = np.array([term.lower for term in _interval_bands[1:]])
+_interval_band_curies = np.array([term.curie for term in _interval_bands], dtype=object)
+
+
+def classify_frequency(values: Union[float, np.ndarray, List[float]], quotient: bool = False):
+    """
+    Classify percentages (or quotients) into HPO frequency band CURIEs (HP:0040280 to HP:0040285).
+
+    :param values: a single value, or an array/list of values to classify in one call
+    :param quotient: values are quotients in 0.0 to 1.0 rather than percentages in 0.0 to 100.0
+    :return: the band CURIE for a single value, or an object array of CURIEs for an array;
+             None for values outside 0% to 100% or NaN
+    """
+    percentages = np.asarray(values, dtype=float)
+    if quotient:
+        percentages = percentages * 100.0
+
+    curies = _interval_band_curies[np.searchsorted(_interval_band_edges, percentages, side="right")]
+    for point, curie in _point_bands.items():
+        curies = np.where(percentages == point, curie, curies)
+    curies = np.where((percentages >= 0.0) & (percentages <= 100.0), curies, None)
+
+    return curies.item() if curies.ndim == 0 else curies
+
+
 def map_percentage_frequency_to_hpo_term(percentage_or_quotient: float) -> Optional[FrequencyHpoTerm]:
     """
     Map phenotypic percentage frequency to a corresponding HPO term corresponding to (HP:0040280 to HP:0040285).
@@ -102,14 +187,11 @@ def map_percentage_frequency_to_hpo_term(percentage_or_quotient: float) -> Optio
     :param percentage_or_quotient: int, should be in range 0.0 to 100.0
     :return: str, HPO term mapping onto percentage range of term definition; None if outside range
     """
-    for hpo_id, details in hpo_term_to_frequency.items():
-        if details.lower <= percentage_or_quotient <= details.upper:
-            return details
-
-    return None
+    curie = classify_frequency(percentage_or_quotient)
+    return hpo_term_to_frequency[curie] if curie else None
 
 
-def phenotype_frequency_to_hpo_term(frequency_field: Optional[str]) -> Frequency:
+def phenotype_frequency_to_hpo_term(frequency_field: Optional[str], derive_qualifier: bool = False) -> Frequency:
     """
     Maps a raw frequency field onto HPO, for consistency. This is needed since the **phenotypes.hpoa**
     file field #8 which tracks phenotypic frequency, has a variable values. There are three allowed options for this field:
@@ -119,9 +201,12 @@ def phenotype_frequency_to_hpo_term(frequency_field: Optional[str]) -> Frequency
     3. A count of patients affected within a cohort. For instance, 7/13 would indicate that 7 of the 13 patients with the specified disease were found to have the phenotypic abnormality referred to by the HPO term in question in the study referred to by the DB_Reference;
 
         :param frequency_field: str, raw frequency value in one of the three above forms
+        :param derive_qualifier: bool, also set the frequency_qualifier of percentages and ratios
+                                 to the HPO frequency band they fall in
         :return: Optional[FrequencyHpoTerm, float, float], raw frequency mapped to its HPO term, quotient or percentage
                  respectively (as applicable); return None if unmappable;
-                 percentage and/or quotient returned are also None, if not applicable
+                 percentage and/or quotient returned are also None, if not applicable;
+                 the shared UNPARSEABLE_FREQUENCY if the value can't be parsed
     """
     hpo_term: Optional[FrequencyHpoTerm] = None
     quotient: Optional[float] = None
@@ -148,11 +233,13 @@ def phenotype_frequency_to_hpo_term(frequency_field: Optional[str]) -> Frequency
 
         except Exception:
             # expected ratio not recognized
-            logger.error(f"hpoa_frequency(): invalid frequency ratio '{frequency_field}'")
-            frequency_field = None
+            return UNPARSEABLE_FREQUENCY
     else:
         # may be None, if original field was empty or has an invalid value
-        return Frequency()
+        return NO_FREQUENCY
+
+    if derive_qualifier and percentage is not None:
+        hpo_term = map_percentage_frequency_to_hpo_term(percentage)
 
     return Frequency(
         frequency_qualifier=hpo_term.curie if hpo_term else None,
@@ -163,6 +250,37 @@ def phenotype_frequency_to_hpo_term(frequency_field: Optional[str]) -> Frequency
     )
 
 
+# Distinct frequency values number in the hundreds, so this comfortably holds a full release
+FREQUENCY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FREQUENCY_CACHE_SIZE)
+def _resolve_frequency(frequency_field: Optional[str], derive_qualifier: bool) -> Frequency:
+    return phenotype_frequency_to_hpo_term(frequency_field, derive_qualifier)
+
+
+@timed("frequency")
+def resolve_frequency(frequency_field: Optional[str], derive_qualifier: bool = False) -> Frequency:
+    """
+    Memoized phenotype_frequency_to_hpo_term, so parse cost scales with distinct values instead of rows.
+
+    Returns shared, frozen Frequency instances. Hit/miss statistics are available from
+    resolve_frequency.cache_info().
+    """
+    return _resolve_frequency(frequency_field, derive_qualifier)
+
+
+# The cache's statistics and clearing, as on the lru_cache function itself
+resolve_frequency.cache_info = _resolve_frequency.cache_info
+resolve_frequency.cache_clear = _resolve_frequency.cache_clear
+
+
+def log_frequency_cache_stats(koza_transform):
+    """Log the hit/miss statistics of resolve_frequency; register it with koza.on_data_end()."""
+    koza_transform.log(f"Frequency cache: {resolve_frequency.cache_info()}")
+
+
+@timed("knowledge_source")
 def get_knowledge_sources(original_source: str, additional_source: str) -> (str, List[str]):
     """
     Return a tuple of the primary_knowledge_source and original_knowledge_source
@@ -185,6 +303,7 @@ def get_knowledge_sources(original_source: str, additional_source: str) -> (str,
     return _primary_knowledge_source, _aggregator_knowledge_source
 
 
+@timed("knowledge_source")
 def get_predicate(original_predicate: str) -> str:
     """
     Convert the association column into a Biolink Model predicate
@@ -199,33 +318,378 @@ def get_predicate(original_predicate: str) -> str:
         raise ValueError(f"Unknown predicate: {original_predicate}")
 
 
-# General function to read an .obo ontontolgy file into memory using pronto to gather all terms that do not fall under a particular parent class
+def normalize_disease_id(disease_id: str) -> str:
+    """Match `Orphanet` as used in Mondo SSSOM."""
+    return disease_id.replace("ORPHA:", "Orphanet:")
+
+
+class ValueInterner:
+    """
+    One shared instance per distinct edge value, within a transform run.
+
+    Hundreds of thousands of edges hold only a few thousand distinct subjects, objects,
+    evidence codes, knowledge sources and publications, yet every row used to build its
+    own copies (a fresh `"NCBIGene:" + id`, a fresh `[evidence_curie]` list). Edges built
+    from interned values share them, so edges kept in memory cost only their own slots.
+
+    Strings are interned, and so are constant lists such as the knowledge sources
+    (`constant_list`); lists of a row's own values, such as its publications, are built
+    afresh from interned strings, as caching them costs more than it saves. Constant lists
+    are shared between edges: never mutate one.
+    """
+
+    def __init__(self):
+        """Start with nothing interned."""
+        self._values: Dict[str, str] = {}
+        self._lists: Dict[Tuple[str, ...], List[str]] = {}
+        self._curies: Dict[Tuple[str, str], str] = {}
+        self._disease_ids: Dict[str, str] = {}
+
+    def value(self, value: str) -> str:
+        """Return the shared string equal to value."""
+        return self._values.setdefault(value, value)
+
+    def values(self, values: Iterable[str]) -> List[str]:
+        """Return a new list of the shared strings equal to values."""
+        setdefault = self._values.setdefault
+        return [setdefault(value, value) for value in values]
+
+    def constant_list(self, values: Tuple[str, ...]) -> List[str]:
+        """Return the shared list of these values, for lists repeated across edges."""
+        shared = self._lists.get(values)
+        if shared is None:
+            shared = self._lists[values] = self.values(values)
+        return shared
+
+    def curie(self, prefix: str, local_id: str) -> str:
+        """Return the shared `prefix + local_id`, concatenated once per distinct local id."""
+        key = (prefix, local_id)
+        curie = self._curies.get(key)
+        if curie is None:
+            curie = self._curies[key] = self.value(prefix + local_id)
+        return curie
+
+    def disease_id(self, disease_id: str) -> str:
+        """Return the shared normalize_disease_id(disease_id)."""
+        normalized = self._disease_ids.get(disease_id)
+        if normalized is None:
+            normalized = self._disease_ids[disease_id] = self.value(normalize_disease_id(disease_id))
+        return normalized
+
+    def info(self) -> Dict[str, int]:
+        """Return the numbers of distinct values and constant lists held."""
+        return {"values": len(self._values), "lists": len(self._lists)}
+
+
+class NoInterning(ValueInterner):
+    """A ValueInterner that builds every value afresh, to measure what interning saves."""
+
+    def value(self, value: str) -> str:
+        """Return value itself."""
+        return value
+
+    def values(self, values: Iterable[str]) -> List[str]:
+        """Return a new list of values."""
+        return list(values)
+
+    def constant_list(self, values: Tuple[str, ...]) -> List[str]:
+        """Return a new list of values."""
+        return list(values)
+
+    def curie(self, prefix: str, local_id: str) -> str:
+        """Return a new `prefix + local_id`."""
+        return prefix + local_id
+
+    def disease_id(self, disease_id: str) -> str:
+        """Return normalize_disease_id(disease_id)."""
+        return normalize_disease_id(disease_id)
+
+
+def get_interner(koza_transform) -> ValueInterner:
+    """
+    Return the interner of a transform run, kept in the transform's state.
+
+    Interning is opt-in, with `intern_values: true` under `transform:` in the transform's
+    yaml; otherwise this is a NoInterning. Values are shared within the run only, so
+    nothing outlives it.
+    """
+    interner = koza_transform.state.get("value_interner")
+    if interner is None:
+        intern_values = koza_transform.extra_fields.get("intern_values", False)
+        interner = koza_transform.state["value_interner"] = ValueInterner() if intern_values else NoInterning()
+    return interner
+
+
+def log_interning_stats(koza_transform):
+    """Log the numbers of values the run's interner holds; register with `koza.on_data_end()`."""
+    koza_transform.log(f"Interned values: {get_interner(koza_transform).info()}")
+
+
+_association_templates: Dict[type, BaseModel] = {}
+
+
+def get_validation_settings(koza_transform) -> Tuple[str, int]:
+    """
+    Return the association validation mode and sample rate for a transform run.
+
+    The PHENOTYPE_INGEST_VALIDATION environment variable, when set, overrides the configured mode.
+    Both are checked when the run builds its first association and kept in the transform's state.
+    """
+    settings = koza_transform.state.get("validation_settings")
+    if settings is None:
+        mode = os.environ.get(VALIDATION_MODE_ENV) or koza_transform.extra_fields.get("validation", VALIDATION_ALL)
+        if mode not in (VALIDATION_ALL, VALIDATION_SAMPLE, VALIDATION_NONE):
+            raise ValueError(f"Unknown validation mode: {mode}")
+        rate = koza_transform.extra_fields.get("validation_sample_rate", DEFAULT_VALIDATION_SAMPLE_RATE)
+        if isinstance(rate, bool) or not isinstance(rate, int) or rate < 1:
+            raise ValueError(f"validation_sample_rate must be a positive integer, not {rate!r}")
+        settings = koza_transform.state["validation_settings"] = (mode, rate)
+    return settings
+
+
+@timed("model")
+def build_association(koza_transform, association_class: Type[BaseModel], **fields: Any) -> BaseModel:
+    """
+    Build a Biolink association, running pydantic validation only as configured for the transform.
+
+    The mode is set with `validation:` under `transform:` in the transform's yaml:
+
+    - "all" (the default) validates every association
+    - "sample" validates the first association and every `validation_sample_rate`-th
+      (default 1000) after it
+    - "none" never validates
+
+    Unvalidated associations are shallow copies of a per-class template holding the field defaults,
+    which is several times cheaper than validating the wide Biolink models (and than `model_construct`,
+    which recomputes every default on each call). They serialise exactly as validated ones do, but
+    only the field names are checked.
+    """
+    mode, sample_rate = get_validation_settings(koza_transform)
+    if mode == VALIDATION_ALL:
+        return association_class(**fields)
+
+    if mode == VALIDATION_SAMPLE:
+        count = koza_transform.state.get("association_count", 0)
+        koza_transform.state["association_count"] = count + 1
+        if count % sample_rate == 0:
+            return association_class(**fields)
+
+    if not association_class.model_fields.keys() >= fields.keys():
+        unknown = sorted(fields.keys() - association_class.model_fields.keys())
+        raise ValueError(f"Unknown {association_class.__name__} fields: {', '.join(unknown)}")
+    template = _association_templates.get(association_class)
+    if template is None:
+        template = _association_templates[association_class] = association_class.model_construct()
+    # The models are configured with use_enum_values, so store what validation would have stored
+    return template.model_copy(
+        update={key: value.value if isinstance(value, Enum) else value for key, value in fields.items()}
+    )
+
+
+def read_obo_is_a(ontology_obo_file: Union[str, Path]) -> Tuple[Dict[str, Optional[str]], Dict[str, List[str]]]:
+    """
+    Stream the [Term] stanzas of an .obo file, keeping only ids, names and is_a parents.
+
+    :param ontology_obo_file: path to the .obo file
+    :return: dict of term id to name, and dict of term id to its direct is_a parents
+    """
+    names: Dict[str, Optional[str]] = {}
+    parents: Dict[str, List[str]] = {}
+    term_id = None
+    in_term = False
+    with open(ontology_obo_file, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("["):
+                term_id = None
+                in_term = line.rstrip() == "[Term]"
+                continue
+            if term_id is None:
+                if line.startswith("id:") and in_term:
+                    term_id = line[3:].strip()
+                    names.setdefault(term_id, None)
+                    parents.setdefault(term_id, [])
+            elif line.startswith("name:"):
+                names[term_id] = line[5:].strip()
+            elif line.startswith("is_a:"):
+                # is_a: HP:0000005 {source="..."} ! Mode of inheritance
+                parents[term_id].append(line[5:].split()[0])
+    return names, parents
+
+
+class IsAGraph:
+    """
+    Adjacency-list view of an ontology's is_a hierarchy.
+
+    Subclass closures follow pronto's `superclasses()` semantics (is_a is reflexive, so an
+    umbrella term belongs to its own subtree) but are computed for any number of umbrella
+    terms in a single pass over the graph in topological order.
+    """
+
+    def __init__(self, names: Dict[str, Optional[str]], parents: Dict[str, List[str]]):
+        """Wrap the term names and direct is_a parents returned by read_obo_is_a."""
+        self.names = names
+        self.parents = parents
+        self._order: Optional[List[str]] = None
+
+    @classmethod
+    def from_obo(cls, ontology_obo_file: Union[str, Path]) -> "IsAGraph":
+        return cls(*read_obo_is_a(ontology_obo_file))
+
+    def topological_order(self) -> List[str]:
+        """Every term after all of its is_a ancestors (Kahn's algorithm)."""
+        if self._order is None:
+            children: Dict[str, List[str]] = {}
+            pending_parents = {}
+            for term_id, term_parents in self.parents.items():
+                pending_parents[term_id] = len(term_parents)
+                for parent in term_parents:
+                    children.setdefault(parent, []).append(term_id)
+                    pending_parents.setdefault(parent, 0)
+
+            order = [term_id for term_id, count in pending_parents.items() if count == 0]
+            for term_id in order:
+                for child in children.get(term_id, ()):
+                    pending_parents[child] -= 1
+                    if pending_parents[child] == 0:
+                        order.append(child)
+
+            if len(order) != len(pending_parents):
+                cycle = sorted(term_id for term_id, count in pending_parents.items() if count)
+                raise ValueError(f"is_a cycle between ontology terms: {cycle[:10]}")
+            self._order = order
+        return self._order
+
+    def descendants(self, umbrella_terms: Iterable[str]) -> Dict[str, Set[str]]:
+        """
+        Return the subclasses of each umbrella term, including the umbrella term itself.
+
+        :param umbrella_terms: terms to compute closures for
+        :return: dict of umbrella term to the set of term ids in its subtree
+        """
+        umbrella_terms = list(umbrella_terms)
+        umbrella_bits = {term_id: 1 << i for i, term_id in enumerate(umbrella_terms)}
+
+        # Each term's mask has a bit set for every umbrella term above it
+        masks: Dict[str, int] = {}
+        for term_id in self.topological_order():
+            mask = umbrella_bits.get(term_id, 0)
+            for parent in self.parents.get(term_id, ()):
+                mask |= masks.get(parent, 0)
+            if mask:
+                masks[term_id] = mask
+
+        subtrees: Dict[str, Set[str]] = {term_id: set() for term_id in umbrella_terms}
+        for term_id, mask in masks.items():
+            if term_id not in self.names:
+                continue
+            for umbrella_term, bit in umbrella_bits.items():
+                if mask & bit:
+                    subtrees[umbrella_term].add(term_id)
+        return subtrees
+
+    def split_terms(self, umbrella_term: str, include: bool) -> Dict[str, Optional[str]]:
+        """
+        Terms inside (include=True) or outside (include=False) the subtree of umbrella_term.
+
+        :return: dict of term id to term name
+        """
+        subtree = self.descendants([umbrella_term])[umbrella_term]
+        return {term_id: name for term_id, name in self.names.items() if (term_id in subtree) == include}
+
+
+# General function to read an .obo ontology file and gather all terms that do (include=True)
+# or do not (include=False) fall under a particular parent class
 def read_ontology_to_exclusion_terms(ontology_obo_file, umbrella_term="HP:0000118", include=False):
-    
-    # Read ontology file into memory
-    onto = Ontology(ontology_obo_file)
-    exclude_terms = {}
-    term_count = len(list(onto.terms()))
-    
-    for term in onto.terms():
-        
-        # Gather ancestor terms and update our filtering datastructure accordingly
-        parent_terms = {ancestor.id: ancestor.name for ancestor in term.superclasses()}
-        if include == False:
-            if umbrella_term not in parent_terms:
-                exclude_terms.update({term.id:term.name})
-
-        elif include == True:
-            if umbrella_term in parent_terms:
-                exclude_terms.update({term.id:term.name})
-    
-    print("- Terms from ontology found that do not belong to parent class {} {}/{}".format(umbrella_term,
-                                                                                           format(len(exclude_terms)), 
-                                                                                           format(term_count)))
+    graph = IsAGraph.from_obo(ontology_obo_file)
+    exclude_terms = graph.split_terms(umbrella_term, include)
+
+    logger.info(
+        f"Terms from ontology found that do not belong to parent class {umbrella_term} "
+        f"{len(exclude_terms)}/{len(graph.names)}"
+    )
     return exclude_terms
 
 
-# This is depricated... We now use pronto + hp.obo file to pull these terms in dynamically 
+# Closures computed by read_ontology_to_exclusion_terms are cached in SQLite next to the ontology file
+ONTOLOGY_CACHE_SUFFIX = ".closure.sqlite"
+
+_ONTOLOGY_CACHE_SCHEMA = """
+create table if not exists closures (
+    obo_sha256 text, umbrella_term text, include integer,
+    primary key (obo_sha256, umbrella_term, include)
+);
+create table if not exists closure_terms (
+    obo_sha256 text, umbrella_term text, include integer, term_id text, term_name text,
+    primary key (obo_sha256, umbrella_term, include, term_id)
+) without rowid;
+"""
+_SELECT_CLOSURE_SQL = "select 1 from closures where obo_sha256 = ? and umbrella_term = ? and include = ?"
+_SELECT_CLOSURE_TERMS_SQL = (
+    "select term_id, term_name from closure_terms where obo_sha256 = ? and umbrella_term = ? and include = ?"
+)
+# Closures of other versions of the ontology
+_DELETE_STALE_SQL = (
+    "delete from closures where obo_sha256 != ?",
+    "delete from closure_terms where obo_sha256 != ?",
+)
+_INSERT_CLOSURE_TERM_SQL = "insert or ignore into closure_terms values (?, ?, ?, ?, ?)"
+_INSERT_CLOSURE_SQL = "insert or ignore into closures values (?, ?, ?)"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@profiled("ontology")
+def read_ontology_terms_cached(ontology_obo_file: Union[str, Path],
+                               umbrella_term: str = "HP:0000118",
+                               include: bool = False,
+                               cache_file: Optional[Union[str, Path]] = None) -> Dict[str, Optional[str]]:
+    """
+    Return the result of read_ontology_to_exclusion_terms, from the cache if it holds one.
+
+    Results are stored in a SQLite file (by default `<ontology_obo_file>.closure.sqlite`) keyed by
+    the sha256 of the ontology file, the umbrella term and the include flag, so a changed ontology
+    is never served a stale closure. Only a miss parses the ontology; closures for
+    other versions of the ontology are dropped from the cache when a new one is written.
+    Several processes can share the cache file: readers never block each other and racing
+    writers insert identical rows.
+
+    :param ontology_obo_file: path to the ontology .obo file
+    :param umbrella_term: the term whose subclasses are included/excluded
+    :param include: True for the subclasses of umbrella_term, False for every other term
+    :param cache_file: path to the SQLite cache (defaults to a file next to the ontology)
+    :return: dict of term id to term name
+    """
+    obo_path = Path(ontology_obo_file)
+    cache_path = Path(cache_file) if cache_file else obo_path.with_name(obo_path.name + ONTOLOGY_CACHE_SUFFIX)
+    key = (_file_sha256(obo_path), umbrella_term, int(include))
+
+    con = sqlite3.connect(cache_path, timeout=60)
+    try:
+        con.execute("pragma journal_mode=wal")
+        con.executescript(_ONTOLOGY_CACHE_SCHEMA)
+        if con.execute(_SELECT_CLOSURE_SQL, key).fetchone():
+            return dict(con.execute(_SELECT_CLOSURE_TERMS_SQL, key))
+
+        terms = read_ontology_to_exclusion_terms(str(obo_path), umbrella_term=umbrella_term, include=include)
+        with con:
+            for delete_sql in _DELETE_STALE_SQL:
+                con.execute(delete_sql, key[:1])
+            con.executemany(_INSERT_CLOSURE_TERM_SQL,
+                            [(*key, term_id, term_name) for term_id, term_name in terms.items()])
+            con.execute(_INSERT_CLOSURE_SQL, key)
+        logger.info(f"Cached {len(terms)} terms for {umbrella_term} (include={include}) in {cache_path}")
+        return terms
+    finally:
+        con.close()
+
+
+# This is depricated... We now use the hp.obo file to pull these terms in dynamically 
 # from hp ontology using the read_ontology_to_exclusion_terms function above
 # # HPO "Mode of Inheritance" terms - https://www.ebi.ac.uk/ols4/ontologies/hp
 # hpo_to_mode_of_inheritance: Dict = {"HP:0001417": "X-linked inheritance",
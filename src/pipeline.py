@@ -0,0 +1,276 @@
+"""
+Pipeline runner for the full ingest: download, preprocess and every transform.
+
+The stages form a small dependency graph:
+
+    download -> preprocess -> gene_to_phenotype_transform
+    download -> gene_to_disease_transform
+    download -> hpoa_fanout (disease_to_phenotype + disease_mode_of_inheritance)
+
+Tasks whose dependencies have finished are run concurrently in a process pool, so
+end-to-end wall time is roughly that of the slowest branch rather than the sum of
+all stages. Each task's wall time is logged as it finishes and summarised at the
+end. The first failing task stops the run: nothing further is scheduled, queued
+tasks are cancelled and a PipelineError is raised once running tasks have drained.
+
+With --output-format parquet the preprocessed intermediate and every edge file are
+written as Parquet instead of TSV, the edge files directly by the transforms' writers
+(see src/parquet_io.py). With --compression gzip or zstd the edge files are written as
+`.tsv.gz` / `.tsv.zst` directly, compressed in a background thread (see
+src/compressed_writer.py). Every transform logs its progress every --progress-interval
+seconds, and with --metrics-dir also writes it to a Prometheus
+textfile or JSON lines file per transform (see src/progress.py). With --instrument every transform
+records per-stage timings in `output/instrumentation/` (see src/instrumentation.py),
+which `just metadata` adds to the release metadata, and with --memory-profile the RSS
+high-water marks and top allocation sites of each stage in `output/memory/` (see
+src/memory_profile.py). Transforms log a summary of their data problems, and with
+--quarantine-dir write the rows they reject to a TSV per transform (see src/data_quality.py).
+
+Must be run from the repository root, like the justfile recipes, since the
+transforms and the preprocessing script resolve `data/...` against the working
+directory.
+
+Usage:
+uv run python -m src.pipeline
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import runpy
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src import instrumentation, memory_profile
+from src.progress import DEFAULT_INTERVAL, METRICS_FORMATS, ProgressOptions
+
+INGEST_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = INGEST_DIR / "src"
+DOWNLOAD_YAML = INGEST_DIR / "download.yaml"
+PREPROCESS_SCRIPT = INGEST_DIR / "scripts" / "gene_to_phenotype_extras.py"
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline task fails."""
+
+
+@dataclass(frozen=True)
+class Task:
+    """
+    A named unit of work and the names of the tasks it waits on.
+
+    `fn` and `args` are sent to a worker process, so both must be picklable
+    (i.e. `fn` must be a module level function).
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    depends_on: Tuple[str, ...] = ()
+
+
+def download():
+    from kghub_downloader.download_utils import download_from_yaml
+
+    report = download_from_yaml(yaml_file=str(DOWNLOAD_YAML), output_dir=str(INGEST_DIR))
+    # kghub-downloader < 0.5 returns None and raises on a failed download itself
+    if report is not None and report.failed:
+        raise RuntimeError(f"Failed to download {len(report.failed)} file(s) listed in {DOWNLOAD_YAML.name}")
+
+
+def preprocess(output_format: str = "tsv", output_dir: str = "output"):
+    # A no-op when the inputs haven't changed since the last run (see the script's manifest)
+    with memory_profile.memory_stage("duckdb_join", "preprocess"):
+        runpy.run_path(str(PREPROCESS_SCRIPT))["preprocess"](output_format=output_format)
+    memory_profile.write_report(output_dir)
+
+
+def koza_transform(
+    name: str,
+    output_dir: str,
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    progress: Optional[ProgressOptions] = None,
+    quarantine_dir: Optional[str] = None,
+):
+    from koza.runner import KozaRunner
+
+    from src.compressed_writer import compressed_runner
+    from src.parquet_io import parquet_runner, read_runner_input
+    from src.progress import track_runner
+
+    config_file = SRC_DIR / f"{name}.yaml"
+    overrides = {"transform": {"quarantine_dir": quarantine_dir}} if quarantine_dir else None
+    if compression:
+        config, runner = compressed_runner(config_file, output_dir, compression, overrides=overrides)
+    elif output_format == "parquet":
+        config, runner = parquet_runner(config_file, output_dir, overrides=overrides)
+    else:
+        config, runner = KozaRunner.from_config_file(str(config_file), output_dir=output_dir, overrides=overrides)
+    # Transforms reading a preprocessed intermediate read it in the format it was written in
+    if "intermediate_format" in runner.extra_transform_fields:
+        runner.extra_transform_fields["intermediate_format"] = output_format
+    read_runner_input(runner, config.reader)
+    tracker = track_runner(runner, config.name, progress)
+    instrumentation.instrument_runner(runner, config.name)
+    memory_profile.profile_mappings(runner, config.name)
+    with memory_profile.memory_stage("transform", config.name):
+        runner.run()
+    tracker.close()
+    instrumentation.write_summary(output_dir)
+    memory_profile.write_report(output_dir)
+
+
+def hpoa_fanout(
+    output_dir: str,
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    progress: Optional[ProgressOptions] = None,
+    quarantine_dir: Optional[str] = None,
+):
+    from src.hpoa_fanout import run_hpoa_fanout
+
+    run_hpoa_fanout(
+        output_dir=output_dir,
+        output_format=output_format,
+        compression=compression,
+        progress=progress,
+        quarantine_dir=quarantine_dir,
+    )
+
+
+def ingest_tasks(
+    output_dir: str = "output",
+    output_format: str = "tsv",
+    compression: Optional[str] = None,
+    progress: Optional[ProgressOptions] = None,
+    quarantine_dir: Optional[str] = None,
+) -> List[Task]:
+    """Build the ingest's task graph (add new transforms here)."""
+    if compression and output_format != "tsv":
+        raise ValueError(f"Compression only applies to TSV output, not {output_format}")
+    return [
+        Task("download", download),
+        Task("preprocess", preprocess, (output_format, output_dir), depends_on=("download",)),
+        Task("gene_to_phenotype_transform", koza_transform,
+             ("gene_to_phenotype_transform", output_dir, output_format, compression, progress, quarantine_dir),
+             depends_on=("preprocess",)),
+        Task("gene_to_disease_transform", koza_transform,
+             ("gene_to_disease_transform", output_dir, output_format, compression, progress, quarantine_dir),
+             depends_on=("download",)),
+        Task("hpoa_fanout", hpoa_fanout, (output_dir, output_format, compression, progress, quarantine_dir),
+             depends_on=("download",)),
+    ]
+
+
+def _check_graph(tasks: List[Task]):
+    names = [task.name for task in tasks]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate task names in pipeline: {names}")
+    for task in tasks:
+        unknown = set(task.depends_on) - set(names)
+        if unknown:
+            raise ValueError(f"Task {task.name} depends on unknown task(s): {sorted(unknown)}")
+
+    # Kahn's algorithm; anything left over sits on a cycle
+    remaining = {task.name: set(task.depends_on) for task in tasks}
+    while True:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            break
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if remaining:
+        raise ValueError(f"Dependency cycle between tasks: {sorted(remaining)}")
+
+
+def _timed(fn: Callable[..., Any], args: Tuple[Any, ...]) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run_tasks(tasks: List[Task], max_workers: Optional[int] = None) -> Dict[str, float]:
+    """
+    Run tasks in dependency order, concurrently where the graph allows.
+
+    :param tasks: the task graph
+    :param max_workers: size of the process pool (defaults to the number of CPUs)
+    :return: dict of task name to wall time in seconds, in completion order
+    """
+    _check_graph(tasks)
+    pending = {task.name: task for task in tasks}
+    running: Dict[Future, str] = {}
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [task for task in pending.values() if all(dep in timings for dep in task.depends_on)]
+            for task in ready:
+                logger.info(f"Starting {task.name}")
+                running[pool.submit(_timed, task.fn, task.args)] = task.name
+                del pending[task.name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    timings[name] = future.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    raise PipelineError(f"Task {name} failed, stopping pipeline") from e
+                logger.info(f"Finished {name} in {timings[name]:.1f}s")
+
+    logger.info(f"Pipeline finished in {time.perf_counter() - start:.1f}s")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logger.info(f"  {name}: {seconds:.1f}s")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output-dir", default="output", help="Path to output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--output-format", choices=["tsv", "parquet"], default="tsv",
+                        help="Format of the preprocessed intermediate and the edge files")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None,
+                        help="Write compressed TSV edge files (.tsv.gz / .tsv.zst)")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between each transform's progress reports (0 only reports at the end)")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="Also write each transform's progress metrics to a file in this directory")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default="prom",
+                        help="Prometheus textfile (prom) or JSON lines (jsonl) metrics")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Record per-stage timings of each transform in OUTPUT_DIR/instrumentation/")
+    parser.add_argument("--memory-profile", action="store_true",
+                        help="Record the memory use of each stage in OUTPUT_DIR/memory/ (slows the run down)")
+    parser.add_argument("--quarantine-dir", default=None,
+                        help="Write the rows each transform rejects to a TSV per transform in this directory")
+    args = parser.parse_args()
+
+    if args.instrument:
+        # Forked workers inherit the enabled module; spawned ones see the environment variable
+        instrumentation.enable()
+        os.environ[instrumentation.ENV_VAR] = "1"
+    # Timings of an earlier build must not be reported with this one, instrumented or not
+    instrumentation.clear_summaries(args.output_dir)
+    if args.memory_profile:
+        memory_profile.enable()
+        os.environ[memory_profile.ENV_VAR] = "1"
+
+    progress = ProgressOptions(args.progress_interval, args.metrics_dir, args.metrics_format)
+    run_tasks(
+        ingest_tasks(args.output_dir, args.output_format, args.compression, progress, args.quarantine_dir),
+        max_workers=args.workers,
+    )
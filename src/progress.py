@@ -0,0 +1,239 @@
+"""
+Progress and throughput telemetry for long transform runs.
+
+A full transform of phenotype.hpoa or the g2p intermediate otherwise runs silently until
+it finishes. `Progress` counts the rows read from the input files, those the reader's
+filters dropped, and of the rows the transform received, those that produce edges
+(emitted) and those that produce none. Every `interval` seconds it logs them with the
+overall and recent rows/sec, and the share of the input read so far with an ETA. Rows
+read and dropped and the byte offsets come from the InputRows the transform reads (see
+src/input_rows.py); the ETA is based on the byte offset in the input files (compressed
+bytes for .gz inputs), so it needs no row count up front, and is unavailable when the
+offset isn't known (e.g. the Parquet intermediate).
+
+With a metrics directory, every report also goes to `{metrics_dir}/{transform}.prom`, a
+Prometheus textfile (replaced atomically, as node_exporter's textfile collector expects),
+or is appended to `{metrics_dir}/{transform}.jsonl`, so a slow nightly build shows where
+and when it slowed down.
+
+src.pipeline and src.hpoa_fanout report progress for every transform they run
+(--progress-interval, --metrics-dir, --metrics-format); `track_runner` adds it to any
+KozaRunner reading an InputRows.
+
+Usage:
+    read_runner_input(runner, config.reader)
+    progress = track_runner(runner, config.name, ProgressOptions(metrics_dir="output/metrics"))
+    runner.run()
+    progress.close()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.input_rows import InputRows
+
+DEFAULT_INTERVAL = 30.0
+METRICS_FORMATS = ("prom", "jsonl")
+# Rows between clock checks, so counting a row costs a few increments
+CHECK_EVERY = 1000
+
+_PROMETHEUS_METRICS = [
+    ("rows_read_total", "counter", "Rows read from the input files"),
+    ("rows_dropped_total", "counter", "Rows dropped by the reader's filters"),
+    ("rows_emitted_total", "counter", "Rows received by the transform that produced at least one edge"),
+    ("rows_without_edges_total", "counter", "Rows received by the transform that produced no edges"),
+    ("rows_per_second", "gauge", "Rows read per second since the transform started"),
+    ("bytes_read", "gauge", "Bytes of the input files read so far"),
+    ("bytes_total", "gauge", "Bytes of the input files"),
+    ("eta_seconds", "gauge", "Estimated seconds until the input is read"),
+    ("elapsed_seconds", "gauge", "Seconds since the transform started"),
+    ("finished", "gauge", "1 once the transform has finished"),
+]
+
+
+@dataclass(frozen=True)
+class ProgressOptions:
+    """
+    How progress is reported.
+
+    :param interval: seconds between reports (0 only reports when the transform finishes)
+    :param metrics_dir: directory for a metrics file per transform (none if None)
+    :param metrics_format: "prom" (Prometheus textfile) or "jsonl"
+    """
+
+    interval: float = DEFAULT_INTERVAL
+    metrics_dir: Optional[str] = None
+    metrics_format: str = "prom"
+
+    def __post_init__(self):
+        """Reject an unknown metrics format."""
+        if self.metrics_format not in METRICS_FORMATS:
+            raise ValueError(f"Unknown metrics format {self.metrics_format}, expected one of {METRICS_FORMATS}")
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class Progress:
+    """
+    Row counts, throughput and ETA of one transform run.
+
+    :param name: transform name, used in log lines, metric labels and metrics file names
+    :param options: reporting options
+    :param rows: the InputRows the transform reads, for the rows read and dropped and the
+        byte offsets (if None, the rows received count as read, and there is no ETA)
+    """
+
+    def __init__(self, name: str, options: Optional[ProgressOptions] = None, rows: Optional[InputRows] = None):
+        """Start the clock and the row counts from now."""
+        self.name = name
+        self.options = options or ProgressOptions()
+        self.rows = rows
+        self.rows_received = 0
+        self.rows_emitted = 0
+        self.started = time.perf_counter()
+        self._last_report: Tuple[float, int] = (self.started, 0)
+        self._next_report = self.started + self.options.interval if self.options.interval else float("inf")
+        self._countdown = CHECK_EVERY
+        self._metrics_file: Optional[Path] = None
+        if self.options.metrics_dir:
+            metrics_dir = Path(self.options.metrics_dir)
+            metrics_dir.mkdir(parents=True, exist_ok=True)
+            self._metrics_file = metrics_dir / f"{name}.{self.options.metrics_format}"
+            if self.options.metrics_format == "jsonl":
+                self._metrics_file.write_text("")
+
+    def update(self, edges: int):
+        """Count a row the transform received and the number of edges it produced."""
+        self.rows_received += 1
+        if edges:
+            self.rows_emitted += 1
+        self._countdown -= 1
+        if not self._countdown:
+            self._countdown = CHECK_EVERY
+            if time.perf_counter() >= self._next_report:
+                self.report()
+
+    @property
+    def rows_read(self) -> int:
+        """Rows read from the input files (the rows received, without InputRows)."""
+        return self.rows.rows_read if self.rows is not None else self.rows_received
+
+    def bytes_read(self) -> Optional[Tuple[int, int]]:
+        """(bytes read, total bytes) of the input files, if known."""
+        return self.rows.bytes_read() if self.rows is not None else None
+
+    def snapshot(self, finished: bool = False) -> Dict[str, Any]:
+        now = time.perf_counter()
+        elapsed = now - self.started
+        last_time, last_rows = self._last_report
+        rows_read = self.rows_read
+        snapshot = {
+            "transform": self.name,
+            "time": time.time(),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_read_total": rows_read,
+            "rows_dropped_total": self.rows.rows_dropped if self.rows is not None else 0,
+            "rows_emitted_total": self.rows_emitted,
+            "rows_without_edges_total": self.rows_received - self.rows_emitted,
+            "rows_per_second": round(rows_read / elapsed, 1) if elapsed else 0.0,
+            "recent_rows_per_second": round((rows_read - last_rows) / (now - last_time), 1)
+            if now > last_time else 0.0,
+            "finished": int(finished),
+        }
+        byte_counts = None if finished else self.bytes_read()
+        if byte_counts:
+            done, total = byte_counts
+            snapshot["bytes_read"], snapshot["bytes_total"] = done, total
+            if done:
+                snapshot["eta_seconds"] = round(elapsed * (total - done) / done, 1)
+        return snapshot
+
+    def report(self, finished: bool = False) -> Dict[str, Any]:
+        """Log the current counts and rates, write them to the metrics file, and return them."""
+        snapshot = self.snapshot(finished)
+        message = (
+            f"{self.name}: {snapshot['rows_read_total']:,} rows read, {snapshot['rows_dropped_total']:,} dropped "
+            f"by the reader's filters, {snapshot['rows_emitted_total']:,} emitted, "
+            f"{snapshot['rows_without_edges_total']:,} without edges, {snapshot['rows_per_second']:,.0f} rows/sec"
+        )
+        if finished:
+            message += f", finished in {_format_seconds(snapshot['elapsed_seconds'])}"
+        else:
+            message += f" ({snapshot['recent_rows_per_second']:,.0f} recently)"
+            if "eta_seconds" in snapshot:
+                share = snapshot["bytes_read"] / snapshot["bytes_total"] if snapshot["bytes_total"] else 1.0
+                message += f", {share:.0%} of input read, ETA {_format_seconds(snapshot['eta_seconds'])}"
+        logger.info(message)
+
+        if self._metrics_file is not None:
+            self._write_metrics(snapshot)
+        now = time.perf_counter()
+        self._last_report = (now, self.rows_read)
+        self._next_report = now + self.options.interval if self.options.interval else float("inf")
+        return snapshot
+
+    def _write_metrics(self, snapshot: Dict[str, Any]):
+        if self.options.metrics_format == "jsonl":
+            with open(self._metrics_file, "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+            return
+
+        lines: List[str] = []
+        for metric, kind, description in _PROMETHEUS_METRICS:
+            if metric not in snapshot:
+                continue
+            lines += [
+                f"# HELP ingest_{metric} {description}",
+                f"# TYPE ingest_{metric} {kind}",
+                f'ingest_{metric}{{transform="{self.name}"}} {snapshot[metric]}',
+            ]
+        tmp_file = self._metrics_file.with_name(f"{self._metrics_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text("\n".join(lines) + "\n")
+        os.replace(tmp_file, self._metrics_file)
+
+    def close(self) -> Dict[str, Any]:
+        """Report the final counts."""
+        return self.report(finished=True)
+
+
+def counting(fn: Callable, progress: Progress) -> Callable:
+    """Wrap a transform_record function to count each row and the edges it returns."""
+
+    def wrapper(koza_transform, row):
+        result = fn(koza_transform, row)
+        progress.update(len(result) if result else 0)
+        return result
+
+    return wrapper
+
+
+def track_runner(runner, name: str, options: Optional[ProgressOptions] = None) -> Progress:
+    """
+    Report the progress of a KozaRunner's transform_record hooks, in place.
+
+    The rows read and dropped and the byte offsets are those of the runner's InputRows (see
+    src.parquet_io.read_runner_input), so call before anything else wraps the runner's data
+    (e.g. instrumentation.instrument_runner). Call `close()` on the result after the run.
+
+    :param runner: runner from KozaRunner.from_config_file
+    :param name: transform name (the transform's config name)
+    :param options: reporting options
+    """
+    rows = runner.data.get(None)
+    progress = Progress(name, options, rows if isinstance(rows, InputRows) else None)
+    for hooks in runner.hooks_by_tag.values():
+        for hook in hooks.transform_record:
+            hook.fn = counting(hook.fn, progress)
+    return progress
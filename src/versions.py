@@ -5,6 +5,9 @@ Three top-level sources:
   - infores:hp    — the HP ontology .obo (HTTP Last-Modified)
   - infores:mondo — Mondo SSSOM mapping (HTTP Last-Modified)
 
+The Last-Modified probes run concurrently and are cached on disk (see
+src/http_versions.py).
+
 Nested under infores:hpoa, one SourceVersion per contributing primary source
 (OMIM, Orphanet, DECIPHER) — discovered from the `#description:` header line
 of phenotype.hpoa. Edges in this ingest's output carry per-row
@@ -19,6 +22,11 @@ attributed to a given source is the best in-file signal we have for "as-of
 when did HPOA last touch this source's content" — notably surfaces frozen
 sources like DECIPHER (max date ~2013) that the bundle date would obscure.
 We do not reach outside HPOA to upstream APIs.
+
+Those dates are collected by the HPOA fanout transform as it reads the file and
+written to `data/phenotype.hpoa.stats.json` (see src/hpoa_stats.py), so writing
+the metadata doesn't re-read phenotype.hpoa; the file is only scanned when the
+sidecar is missing or out of date.
 """
 
 from __future__ import annotations
@@ -31,9 +39,11 @@ from kozahub_metadata_schema import (
     now_iso,
     urls_from_download_yaml,
     version_from_file_header,
-    version_from_http_last_modified,
 )
 
+from src.hpoa_stats import read_description, read_hpoa_stats, scan_hpoa_stats
+from src.http_versions import probe_versions
+
 
 INGEST_DIR = Path(__file__).resolve().parents[1]
 DOWNLOAD_YAML = INGEST_DIR / "download.yaml"
@@ -47,34 +57,20 @@ HPOA_SUB_SOURCES = {
     "DECIPHER": {"row_prefix": "DECIPHER", "infores": "infores:decipher", "name": "DECIPHER"},
 }
 
-_BIOCURATION_DATE = re.compile(r"\[(\d{4}-\d{2}-\d{2})\]")
-
 
 def _scan_hpoa(hpoa_file: Path) -> tuple[str, dict[str, str]]:
-    """Read phenotype.hpoa once. Return (description_line, {row_prefix: max_date}).
+    """Return (description_line, {row_prefix: max_date}) for phenotype.hpoa.
 
     `description_line` is the `#description:` header (used to discover which
     sub-sources are present). The dict maps `database_id` row prefix
     (OMIM/ORPHA/DECIPHER) to the latest biocuration date observed for rows
-    of that source.
+    of that source. Read from the stats sidecar when it matches the file,
+    otherwise computed with a scan of the `database_id` and `biocuration` columns.
     """
-    description = ""
-    max_dates: dict[str, str] = {}
-    with hpoa_file.open() as f:
-        for line in f:
-            if line.startswith("#"):
-                if line.startswith("#description:") and not description:
-                    description = line
-                continue
-            if line.startswith("database_id"):
-                continue
-            row_prefix = line.split(":", 1)[0]
-            for m in _BIOCURATION_DATE.finditer(line):
-                d = m.group(1)
-                cur = max_dates.get(row_prefix)
-                if cur is None or d > cur:
-                    max_dates[row_prefix] = d
-    return description, max_dates
+    stats = read_hpoa_stats(hpoa_file)
+    if stats is not None:
+        return stats["description"], stats["max_biocuration_dates"]
+    return read_description(hpoa_file), scan_hpoa_stats(hpoa_file).max_dates
 
 
 def _hpoa_sub_sources(hpoa_file: Path, hpoa_url: str, hpoa_version: str, now: str) -> list[dict[str, Any]]:
@@ -118,6 +114,8 @@ def get_source_versions() -> list[dict[str, Any]]:
     hp_urls = urls_from_download_yaml(DOWNLOAD_YAML, contains=["obo/hp.obo"])
     mondo_urls = urls_from_download_yaml(DOWNLOAD_YAML, contains=["data.monarchinitiative.org/mappings"])
     now = now_iso()
+    # Probe every Last-Modified-versioned source at once
+    http_versions = probe_versions(urls[0] for urls in (hp_urls, mondo_urls) if urls)
 
     sources: list[dict[str, Any]] = []
 
@@ -144,7 +142,7 @@ def get_source_versions() -> list[dict[str, Any]]:
         sources.append(entry)
 
     if hp_urls:
-        ver, method = version_from_http_last_modified(hp_urls[0])
+        ver, method = http_versions[hp_urls[0]]
         sources.append({
             "id": "infores:hp",
             "name": "Human Phenotype Ontology (HP)",
@@ -155,7 +153,7 @@ def get_source_versions() -> list[dict[str, Any]]:
         })
 
     if mondo_urls:
-        ver, method = version_from_http_last_modified(mondo_urls[0])
+        ver, method = http_versions[mondo_urls[0]]
         sources.append({
             "id": "infores:mondo",
             "name": "Mondo Disease Ontology (SSSOM)",
@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+
+import duckdb
+import pytest
+import yaml
+
+from src import artifact_stats
+from src.artifact_stats import ARTIFACT_STATS_FILE, collect_artifact_stats, compute_artifact_stats, write_artifact_stats
+from src.compressed_writer import import_zstd
+
+EDGES_TSV = "id\tsubject\tpredicate\tobject\n" + "".join(
+    f"uuid:{i}\tOMIM:{i}\tbiolink:has_phenotype\tHP:{i:07d}\n" for i in range(1000)
+)
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    (tmp_path / "edges.tsv").write_text(EDGES_TSV)
+    (tmp_path / "edges.tsv.gz").write_bytes(gzip.compress(EDGES_TSV.encode()))
+    # Two zstd frames, as written by appending to a file
+    half = len(EDGES_TSV) // 2
+    zstd = import_zstd()
+    frames = zstd.compress(EDGES_TSV[:half].encode()) + zstd.compress(EDGES_TSV[half:].encode())
+    (tmp_path / "edges.tsv.zst").write_bytes(frames)
+    (tmp_path / "nodes.jsonl").write_text('{"id": "a"}\n{"id": "b"}')  # no trailing newline
+    duckdb.sql("select range as i from range(42)").write_parquet(str(tmp_path / "edges.parquet"))
+    return tmp_path
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_compute_artifact_stats(output_dir, chunk_size):
+    tsv = compute_artifact_stats(output_dir / "edges.tsv", chunk_size=chunk_size)
+    assert tsv.rows == 1000
+    assert tsv.size == len(EDGES_TSV)
+    assert tsv.sha256 == hashlib.sha256(EDGES_TSV.encode()).hexdigest()
+
+    gz = compute_artifact_stats(output_dir / "edges.tsv.gz", chunk_size=chunk_size)
+    assert gz.rows == 1000
+    assert gz.sha256 == hashlib.sha256((output_dir / "edges.tsv.gz").read_bytes()).hexdigest()
+    assert compute_artifact_stats(output_dir / "edges.tsv.zst", chunk_size=chunk_size).rows == 1000
+
+    assert compute_artifact_stats(output_dir / "nodes.jsonl", chunk_size=chunk_size).rows == 2
+    assert compute_artifact_stats(output_dir / "edges.parquet", chunk_size=chunk_size).rows == 42
+
+
+def test_collect_artifact_stats_is_cached(output_dir, monkeypatch):
+    paths = [output_dir / name for name in ("edges.parquet", "edges.tsv", "edges.tsv.gz")]
+    cache_file = output_dir / "cache.json"
+    first = collect_artifact_stats(paths, cache_file=cache_file)
+
+    reads = []
+    compute = artifact_stats.compute_artifact_stats
+    monkeypatch.setattr(artifact_stats, "compute_artifact_stats", lambda path: reads.append(path) or compute(path))
+
+    assert collect_artifact_stats(paths, cache_file=cache_file) == first
+    assert reads == []
+
+    # Only the changed file is read again
+    (output_dir / "edges.tsv").write_text(EDGES_TSV + "uuid:x\tOMIM:x\tbiolink:has_phenotype\tHP:x\n")
+    stats = collect_artifact_stats(paths, cache_file=cache_file)
+    assert reads == [output_dir / "edges.tsv"]
+    assert [s.rows for s in stats] == [42, 1001, 1000]
+
+
+def test_write_artifact_stats(output_dir):
+    path = write_artifact_stats(output_dir, ["edges.tsv", "nodes.jsonl"])
+
+    assert path == output_dir / ARTIFACT_STATS_FILE
+    artifacts = yaml.safe_load(path.read_text())["artifacts"]
+    assert [(a["name"], a["rows"]) for a in artifacts] == [("edges.tsv", 1000), ("nodes.jsonl", 2)]
+    assert set(artifacts[0]) == {"name", "sha256", "size", "rows"}
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".zst"])
+def test_decompression_is_bounded(suffix):
+    content = b"HP:0000118\n" * 100_000
+    compress = gzip.compress if suffix == ".gz" else import_zstd().compress
+    # Two members/frames, each expanding to over 500 KB
+    compressed = compress(content[:550_000]) + compress(content[550_000:])
+    decompressor = artifact_stats._Decompressor(suffix, max_length=4096)
+
+    pieces = [
+        piece for i in range(0, len(compressed), 1000) for piece in decompressor.decompress(compressed[i:i + 1000])
+    ]
+
+    assert b"".join(pieces) == content
+    assert max(map(len, pieces)) <= 4096
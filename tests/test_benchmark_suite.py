@@ -0,0 +1,99 @@
+import csv
+import runpy
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.hpoa_fanout import run_hpoa_fanout
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+
+def synthetic_data():
+    return runpy.run_path(str(SCRIPTS_DIR / "synthetic_data.py"))
+
+
+def benchmark_suite(monkeypatch):
+    monkeypatch.syspath_prepend(str(SCRIPTS_DIR))
+    module = runpy.run_path(str(SCRIPTS_DIR / "benchmark_suite.py"))
+    # The script puts the repo root on sys.path; don't leave it there
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    return module
+
+
+def test_synthetic_data_is_deterministic(tmp_path):
+    write_synthetic_data = synthetic_data()["write_synthetic_data"]
+    counts = write_synthetic_data(tmp_path / "a", scale=0.005, seed=3)
+    write_synthetic_data(tmp_path / "b", scale=0.005, seed=3)
+
+    for name, rows in counts.items():
+        assert (tmp_path / "a" / name).read_bytes() == (tmp_path / "b" / name).read_bytes()
+        assert rows > 0
+
+
+def test_synthetic_data_row_counts(tmp_path):
+    counts = synthetic_data()["write_synthetic_data"](tmp_path, scale=0.005)
+
+    with open(tmp_path / "phenotype.hpoa") as f:
+        lines = [line for line in f if not line.startswith("#")]
+    assert len(lines) - 1 == counts["phenotype.hpoa"]
+    with open(tmp_path / "genes_to_disease.txt") as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+    assert len(rows) == counts["genes_to_disease.txt"]
+    # Non-MENDELIAN associations only come from medgen, as upstream
+    assert all(row["association_type"] == "MENDELIAN" for row in rows if "orphadata" in row["source"])
+    assert (tmp_path / "hp.obo").read_text().count("[Term]") == counts["hp.obo"]
+
+
+def test_synthetic_data_runs_through_the_transforms(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    counts = synthetic_data()["write_synthetic_data"]("data", scale=0.005)
+
+    edge_counts = run_hpoa_fanout(output_dir="output", input_files=[str(tmp_path / "data" / "phenotype.hpoa")])
+
+    assert 0 < edge_counts["hpoa_disease_to_phenotype"] < counts["phenotype.hpoa"]
+    assert edge_counts["hpoa_disease_mode_of_inheritance"] > 0
+
+
+def test_compare_flags_regressions(monkeypatch):
+    compare = benchmark_suite(monkeypatch)["compare"]
+    baseline = {
+        "fast": {"rows_per_second": 1000.0, "peak_rss_mb": 100.0},
+        "slow": {"rows_per_second": 1000.0, "peak_rss_mb": 100.0},
+        "big": {"rows_per_second": 1000.0, "peak_rss_mb": 100.0},
+    }
+    results = {
+        "fast": {"rows_per_second": 900.0, "peak_rss_mb": 110.0},
+        "slow": {"rows_per_second": 700.0, "peak_rss_mb": 100.0},
+        "big": {"rows_per_second": 1000.0, "peak_rss_mb": 130.0},
+        "new": {"rows_per_second": 1.0, "peak_rss_mb": 1000.0},
+    }
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("slow: 700 rows/sec")
+    assert regressions[1].startswith("big: peak RSS 130 MB")
+
+
+def test_prepare_fails_clearly_without_a_step(tmp_path, monkeypatch):
+    module = benchmark_suite(monkeypatch)
+    monkeypatch.setitem(module["REQUIRES"], "gene_to_disease_transform.read", ("not_synthetic.tsv",))
+
+    with pytest.raises(FileNotFoundError, match="gene_to_disease_transform.read needs data/not_synthetic.tsv"):
+        module["prepare"](str(tmp_path), "gene_to_disease_transform.read")
+
+
+def test_benchmark_runs_alone_with_its_prerequisites():
+    # Without the preprocessing benchmark, the preprocessed g2p file is prepared first
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, str(SCRIPTS_DIR / "benchmark_suite.py"), "--scale", "0.005", "--baseline", "",
+         "--only", "gene_to_phenotype_transform.read"],
+        capture_output=True, text=True, check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "gene_to_phenotype_transform.read" in result.stdout
+    assert "| DEBUG" not in result.stderr
@@ -0,0 +1,40 @@
+import gzip
+
+import pytest
+
+from src.compressed_writer import BackgroundCompressedFile, import_zstd
+
+LINES = [f"uuid:{i}\tOMIM:{i}\tbiolink:has_phenotype\tHP:{i:07d}\n" for i in range(5000)]
+
+
+def decompress(path):
+    if path.suffix == ".gz":
+        return gzip.decompress(path.read_bytes()).decode()
+    return import_zstd().decompress(path.read_bytes()).decode()
+
+
+@pytest.mark.parametrize("compression,suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_background_compressed_file_round_trip(tmp_path, compression, suffix):
+    path = tmp_path / f"edges.tsv{suffix}"
+
+    # Small blocks and a one-block queue, so the writer waits on the compression thread
+    with BackgroundCompressedFile(path, compression, block_size=1000, queue_blocks=1) as f:
+        for line in LINES:
+            f.write(line)
+
+    assert decompress(path) == "".join(LINES)
+
+
+def test_background_compressed_file_reports_compression_errors(tmp_path):
+    f = BackgroundCompressedFile(tmp_path / "edges.tsv.gz", "gzip", block_size=10)
+    f._compressor = None  # compress() now raises in the compression thread
+
+    with pytest.raises(OSError, match="Compressing .*edges.tsv.gz failed"):
+        for line in LINES:
+            f.write(line)
+        f.close()
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError, match="Unknown compression"):
+        BackgroundCompressedFile(tmp_path / "edges.tsv.bz2", "bzip2")
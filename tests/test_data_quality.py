@@ -0,0 +1,141 @@
+import csv
+from unittest.mock import patch
+
+import pytest
+from koza import KozaTransform
+from koza.io.writer.passthrough_writer import PassthroughWriter
+
+from src import disease_mode_of_inheritance_transform, disease_to_phenotype_transform
+from src.data_quality import DataQuality, report_data_quality
+from src.hpoa_fanout import run_hpoa_fanout
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [3: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50%\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0000347\tOMIM:117650\tXYZ\t\t3/10\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:615654\tDFNA58\t\tHP:0007663\tPMID:32337552\tPCS\t\tabout half\t\t\tP\tHPO:probinson[2024-03-15]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0001249\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+"""
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005
+"""
+
+
+def _row(**fields):
+    row = {
+        "database_id": "OMIM:117650",
+        "disease_name": "Cerebrocostomandibular syndrome",
+        "qualifier": "",
+        "hpo_id": "HP:0001249",
+        "reference": "OMIM:117650",
+        "evidence": "TAS",
+        "onset": "",
+        "frequency": "",
+        "sex": "",
+        "modifier": "",
+        "aspect": "P",
+        "biocuration": "HPO:probinson[2009-02-17]",
+    }
+    row.update(fields)
+    return row
+
+
+def _transform(**extra_fields):
+    return KozaTransform(mappings={}, writer=PassthroughWriter(), extra_fields=extra_fields)
+
+
+def _read_tsv(path):
+    with open(path) as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+
+def test_collector_counts_and_samples_distinct_values():
+    quality = DataQuality("test", sample_size=2)
+    for value in ["a", "a", "b", "c"]:
+        quality.record("bad_value", value)
+    quality.record("other", "x", count=5)
+
+    assert quality.close() == {
+        "other": {"count": 5, "samples": ["x"]},
+        "bad_value": {"count": 4, "samples": ["a", "b"]},
+    }
+
+
+def test_unparseable_frequency_is_counted_and_the_edge_kept():
+    koza_transform = _transform()
+
+    entities = disease_to_phenotype_transform.transform_record(koza_transform, _row(frequency="about half"))
+    entities += disease_to_phenotype_transform.transform_record(koza_transform, _row(frequency="about half"))
+
+    assert len(entities) == 2
+    assert entities[0].has_percentage is None and entities[0].frequency_qualifier is None
+    assert report_data_quality(koza_transform) == {"invalid_frequency": {"count": 2, "samples": ["about half"]}}
+    assert koza_transform.transform_metadata["data_quality"]["invalid_frequency"]["count"] == 2
+
+
+def test_unknown_evidence_rows_are_quarantined(tmp_path):
+    koza_transform = _transform(quarantine_dir=str(tmp_path))
+
+    assert disease_to_phenotype_transform.transform_record(koza_transform, _row(evidence="XYZ")) == []
+    report_data_quality(koza_transform)
+
+    quarantined = _read_tsv(tmp_path / "hpoa_disease_to_phenotype_quarantine.tsv")
+    assert len(quarantined) == 1
+    assert quarantined[0]["category"] == "unknown_evidence"
+    assert quarantined[0]["value"] == "XYZ"
+    assert quarantined[0]["hpo_id"] == "HP:0001249"
+
+
+def test_non_inheritance_terms_are_counted():
+    koza_transform = _transform()
+
+    with patch.object(disease_mode_of_inheritance_transform, "get_modes_of_inheritance", return_value={"HP:0000006"}):
+        assert disease_mode_of_inheritance_transform.transform_record(koza_transform, _row(aspect="I")) == []
+
+    assert report_data_quality(koza_transform) == {"not_mode_of_inheritance": {"count": 1, "samples": ["HP:0001249"]}}
+
+
+@pytest.mark.parametrize("quarantine", [False, True])
+def test_fanout_quarantines_rejected_rows(tmp_path, monkeypatch, quarantine):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "hp.obo").write_text(HP_OBO_FIXTURE)
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+    hpoa_file.write_text(HPOA_FIXTURE)
+    monkeypatch.chdir(tmp_path)
+    quarantine_dir = tmp_path / "quarantine"
+
+    edge_counts = run_hpoa_fanout(
+        output_dir=str(tmp_path / "output"),
+        input_files=[str(hpoa_file)],
+        quarantine_dir=str(quarantine_dir) if quarantine else None,
+    )
+
+    assert edge_counts == {"hpoa_disease_to_phenotype": 2, "hpoa_disease_mode_of_inheritance": 1}
+    if not quarantine:
+        assert not quarantine_dir.exists()
+        return
+    d2p = _read_tsv(quarantine_dir / "hpoa_disease_to_phenotype_quarantine.tsv")
+    assert [(row["category"], row["value"]) for row in d2p] == [("unknown_evidence", "XYZ")]
+    moi = _read_tsv(quarantine_dir / "hpoa_disease_mode_of_inheritance_quarantine.tsv")
+    assert [(row["category"], row["value"]) for row in moi] == [("not_mode_of_inheritance", "HP:0001249")]
@@ -0,0 +1,141 @@
+import csv
+import gzip
+from pathlib import Path
+
+import duckdb
+import pytest
+from koza.runner import KozaRunner
+
+from src.disease_to_phenotype_batch import CONFIG_FILE, transform_batch
+from src.parquet_io import edges_to_parquet
+
+HPOA_HEADER = """\
+#description: "HPO annotations for rare diseases [5: OMIM; 1: DECIPHER; 2: ORPHANET]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+"""
+
+HPOA_ROWS = [
+    "OMIM:614856\tOsteogenesis imperfecta, type XIII\tNOT\tHP:0000343\tOMIM:614856\tTAS\t"
+    "HP:0003593\t1/1\tFEMALE\t\tP\tHPO:skoehler[2012-11-16]",
+    "OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t"
+    "\t50%\t\t\tP\tHPO:probinson[2009-02-17]",
+    "OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001545\tOMIM:117650;PMID:12345\tTAS\t"
+    "\tHP:0040283\tmale\t\tP\tHPO:skoehler[2017-07-13]",
+    "OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001546\tOMIM:117650\tPCS\t"
+    "\t3/20\t\t\tP\tHPO:skoehler[2017-07-13]",
+    "OMIM:615654\tDeafness, autosomal dominant 58\t\tHP:0007663\tPMID:32337552\tPCS\t"
+    "\t0/20\t\t\tP\tHPO:probinson[2024-03-15]",
+    "OMIM:615654\tDeafness, autosomal dominant 58\t\tHP:0007664\tPMID:32337552\tICE\t"
+    "\t40.7%\tMALE\t\tP\tHPO:probinson[2024-03-15]",
+    "OMIM:615654\tDeafness, autosomal dominant 58\t\tHP:0007665\t\tIEA\t"
+    "\tnot-a-frequency\t\t\tP\tHPO:probinson[2024-03-15]",
+    "ORPHA:79474\tAtypical Werner syndrome\t\tHP:0000347\tORPHA:79474\tTAS\t"
+    "\tHP:0040281\t\t\tP\tORPHA:orphadata[2024-06-25]",
+    "ORPHA:79474\tAtypical Werner syndrome\t\tHP:0000348\tORPHA:79474;PMID:1;PMID:2\tTAS\t"
+    "\t7/13\tfemale\t\tP\tORPHA:orphadata[2024-06-25]",
+    "DECIPHER:1\tWolf-Hirschhorn Syndrome\t\tHP:0000252\tDECIPHER:1\tIEA\t\t\t\t\tP\tHPO:skoehler[2013-05-29]",
+    "OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0001417\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]",
+    "OMIM:614856\tOsteogenesis imperfecta, type XIII\t\tHP:0003593\tOMIM:614856\tTAS\t"
+    "\t\t\t\tC\tHPO:skoehler[2012-11-16]",
+]
+
+
+def _read_edges(path: Path):
+    with path.open() as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = next(reader)
+        return header, [dict(zip(header, row, strict=True)) for row in reader]
+
+
+def _without_ids(edges):
+    return [{k: v for k, v in edge.items() if k != "id"} for edge in edges]
+
+
+@pytest.fixture
+def hpoa_file(tmp_path):
+    p = tmp_path / "phenotype.hpoa"
+    p.write_text(HPOA_HEADER + "\n".join(HPOA_ROWS) + "\n")
+    return p
+
+
+def test_batch_matches_per_row_transform(hpoa_file, tmp_path):
+    _, runner = KozaRunner.from_config_file(
+        str(CONFIG_FILE), output_dir=str(tmp_path / "per_row"), input_files=[str(hpoa_file)]
+    )
+    runner.run()
+
+    edge_count = transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path / "batch"))
+
+    per_row_header, per_row_edges = _read_edges(tmp_path / "per_row" / "hpoa_disease_to_phenotype_edges.tsv")
+    batch_header, batch_edges = _read_edges(tmp_path / "batch" / "hpoa_disease_to_phenotype_edges.tsv")
+
+    assert edge_count == 10
+    assert batch_header == per_row_header
+    assert _without_ids(batch_edges) == _without_ids(per_row_edges)
+    assert all(edge["id"].startswith("uuid:") for edge in batch_edges)
+
+
+def _read_parquet(path: Path):
+    cursor = duckdb.execute("select * from read_parquet(?)", [str(path)])
+    header = [description[0] for description in cursor.description]
+    types = {description[0]: description[1] for description in cursor.description}
+    return header, types, [dict(zip(header, values, strict=True)) for values in cursor.fetchall()]
+
+
+def test_batch_parquet_output(hpoa_file, tmp_path):
+    transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path / "tsv"))
+    edges_to_parquet(CONFIG_FILE, output_dir=str(tmp_path / "tsv"))
+    edge_count = transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path / "parquet"), output_format="parquet")
+
+    header, types, tsv_edges = _read_parquet(tmp_path / "tsv" / "hpoa_disease_to_phenotype_edges.parquet")
+    parquet_header, parquet_types, parquet_edges = _read_parquet(
+        tmp_path / "parquet" / "hpoa_disease_to_phenotype_edges.parquet"
+    )
+
+    assert edge_count == 10
+    # Written directly, the edges are typed as the edge TSV converted by edges_to_parquet
+    assert parquet_header == header
+    assert parquet_types == types
+    assert _without_ids(parquet_edges) == _without_ids(tsv_edges)
+    assert {edge["negated"] for edge in parquet_edges} == {True, False}
+    assert all(isinstance(edge["aggregator_knowledge_source"], list) for edge in parquet_edges)
+
+
+def test_batch_compressed_output(hpoa_file, tmp_path):
+    transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path / "tsv"))
+    transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path / "gz"), compression="gzip")
+
+    header, tsv_edges = _read_edges(tmp_path / "tsv" / "hpoa_disease_to_phenotype_edges.tsv")
+    gz_file = tmp_path / "gz" / "hpoa_disease_to_phenotype_edges.tsv.gz"
+    gz_file.with_suffix("").write_bytes(gzip.decompress(gz_file.read_bytes()))
+    gz_header, gz_edges = _read_edges(gz_file.with_suffix(""))
+
+    assert gz_header == header
+    assert _without_ids(gz_edges) == _without_ids(tsv_edges)
+
+    with pytest.raises(ValueError, match="Can't write parquet output with compression gzip"):
+        transform_batch(hpoa_file=hpoa_file, output_dir=str(tmp_path), output_format="parquet", compression="gzip")
+
+
+def test_batch_quarantines_unknown_evidence_code(tmp_path):
+    p = tmp_path / "phenotype.hpoa"
+    p.write_text(HPOA_HEADER + HPOA_ROWS[0].replace("\tTAS\t", "\tXYZ\t") + "\n" + HPOA_ROWS[1] + "\n")
+
+    edge_count = transform_batch(hpoa_file=p, output_dir=str(tmp_path / "batch"), quarantine_dir=str(tmp_path / "q"))
+
+    _, quarantined = _read_edges(tmp_path / "q" / "hpoa_disease_to_phenotype_quarantine.tsv")
+    assert edge_count == 1
+    assert [(row["category"], row["value"], row["hpo_id"]) for row in quarantined] == [
+        ("unknown_evidence", "XYZ", "HP:0000343")
+    ]
+
+
+def test_batch_rejects_unknown_disease_prefix(tmp_path):
+    p = tmp_path / "phenotype.hpoa"
+    p.write_text(HPOA_HEADER + HPOA_ROWS[1].replace("OMIM:117650", "FOO:1") + "\n")
+
+    with pytest.raises(ValueError, match="Unknown disease ID prefix"):
+        transform_batch(hpoa_file=p, output_dir=str(tmp_path / "batch"))
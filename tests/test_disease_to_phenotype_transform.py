@@ -283,3 +283,16 @@ def test_evidence_code_to_eco(evidence_code, expected_eco):
     entities = _transform_evidence(evidence_code)
     association = [entity for entity in entities if isinstance(entity, DiseaseToPhenotypicFeatureAssociation)][0]
     assert association.has_evidence == [expected_eco]
+
+
+def test_derived_frequency_qualifier():
+    row = {**_evidence_row("PCS"), "frequency": "3/20"}
+    koza_transform = KozaTransform(
+        mappings={},
+        writer=PassthroughWriter(),
+        extra_fields={"derive_frequency_qualifier": True}
+    )
+    association = transform_record(koza_transform, row)[0]
+    assert association.has_count == 3
+    assert association.has_total == 20
+    assert association.frequency_qualifier == "HP:0040283"  # 15% is Occasional
@@ -0,0 +1,160 @@
+import csv
+import json
+import runpy
+from pathlib import Path
+
+import duckdb
+import pytest
+import yaml
+
+PREPROCESS_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "gene_to_phenotype_extras.py"
+
+
+def preprocess_script():
+    return runpy.run_path(str(PREPROCESS_SCRIPT))
+
+PHENOTYPE_HPOA = """\
+#description: "HPO annotations for rare diseases [5: OMIM; 1: DECIPHER; 2: ORPHANET]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:614129\tCOXPD1\t\tHP:0000252\tPMID:1234567\tPCS\t\t3/10\t\t\tP\tHPO:probinson[2013-05-29]
+OMIM:614129\tCOXPD1\t\tHP:0000252\tOMIM:614129\tTAS\t\t3/10\t\t\tP\tHPO:probinson[2013-05-29]
+OMIM:614129\tCOXPD1\t\tHP:0000252\tPMID:1234567; OMIM:614129\tTAS\t\t3/10\t\t\tP\tHPO:probinson[2013-05-29]
+OMIM:614129\tCOXPD1\t\tHP:0000252\t\tIEA\t\t3/10\t\t\tP\tHPO:probinson[2013-05-29]
+ORPHA:79474\tAtypical Werner syndrome\t\tHP:0000347\tORPHA:79474\tTAS\t\t-\t\t\tP\tORPHA:orphadata[2024-06-25]
+OMIM:613287\tDisease without a Mondo match\t\tHP:0001284\tPMID:2345678\tPCS\t\t-\t\t\tP\tHPO:probinson[2013-05-29]
+"""
+
+GENES_TO_PHENOTYPE = """\
+ncbi_gene_id\tgene_symbol\thpo_id\thpo_name\tfrequency\tdisease_id
+8192\tCLPP\tHP:0000252\tMicrocephaly\t3/10\tOMIM:614129
+9839\tZEB2\tHP:0000347\tMicrognathia\t-\tORPHA:79474
+9839\tZEB2\tHP:0000347\tMicrognathia\t-\tORPHA:79474
+16\tAARS1\tHP:0000252\tMicrocephaly\t1/2\tOMIM:613287
+16\tAARS1\tHP:0001284\tAreflexia\t-\tOMIM:613287
+"""
+
+GENES_TO_DISEASE = """\
+ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource
+NCBIGene:8192\tCLPP\tMENDELIAN\tOMIM:614129\tftp://ftp.omim.org/omim/genemap2.txt
+NCBIGene:9839\tZEB2\tMENDELIAN\tORPHA:79474\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:16\tAARS1\tPOLYGENIC\tOMIM:613287\tftp://ftp.omim.org/omim/genemap2.txt
+"""
+
+MONDO_SSSOM = "".join(f"#line_{i}: metadata\n" for i in range(50)) + """\
+subject_id\tsubject_label\tpredicate_id\tobject_id\tobject_label\tmapping_justification
+MONDO:0013588\tCOXPD1\tskos:exactMatch\tOMIM:614129\tCOXPD1\tsemapv:ManualMappingCuration
+MONDO:0000001\tWerner, broad\tskos:broadMatch\tOrphanet:79474\tAtypical Werner syndrome\tsemapv:ManualMappingCuration
+MONDO:0000002\tWerner\tskos:exactMatch\tOrphanet:79474\tAtypical Werner syndrome\tsemapv:ManualMappingCuration
+MONDO:0000003\tWerner 2\tskos:exactMatch\tOrphanet:79474\tAtypical Werner syndrome\tsemapv:ManualMappingCuration
+"""
+
+
+@pytest.fixture
+def preprocessed(tmp_path, monkeypatch):
+    # The preprocessing script reads and writes data/... relative to the working directory
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "phenotype.hpoa").write_text(PHENOTYPE_HPOA)
+    (data / "genes_to_phenotype.txt").write_text(GENES_TO_PHENOTYPE)
+    (data / "genes_to_disease.txt").write_text(GENES_TO_DISEASE)
+    (data / "mondo.sssom.tsv").write_text(MONDO_SSSOM)
+    monkeypatch.chdir(tmp_path)
+
+    assert preprocess_script()["preprocess"]()
+
+    with (data / "genes_to_phenotype_preprocessed.tsv").open() as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+
+    # Duplicate g2p rows are collapsed; the second AARS1 row is the only g2p row without HPOA references
+    assert len(rows) == 4
+    no_references = [row for row in rows if row["hpo_id"] == "HP:0000252" and row["ncbi_gene_id"] == "16"]
+    assert no_references[0]["publications"] == ""
+    return {row["ncbi_gene_id"]: row for row in rows if row is not no_references[0]}
+
+
+def test_preprocessing_resolves_disease_context_qualifier(preprocessed):
+    assert {gene: row["disease_context_qualifier"] for gene, row in preprocessed.items()} == {
+        "8192": "MONDO:0013588",
+        "9839": "MONDO:0000003",
+        "16": "OMIM:613287",
+    }
+
+
+def test_preprocessing_joins_publications_and_association_types(preprocessed):
+    # One row per g2p row, with the references of every matching HPOA row split, deduplicated and sorted
+    assert preprocessed["8192"]["publications"] == "OMIM:614129;PMID:1234567"
+    assert preprocessed["9839"]["publications"] == "ORPHA:79474"
+    assert preprocessed["8192"]["gene_to_disease_association_types"] == "MENDELIAN"
+    assert preprocessed["16"]["gene_to_disease_association_types"] == "POLYGENIC"
+
+
+def test_preprocessing_skipped_when_inputs_unchanged(preprocessed, tmp_path):
+    script = preprocess_script()
+    output = tmp_path / "data" / "genes_to_phenotype_preprocessed.tsv"
+    manifest = tmp_path / "data" / "genes_to_phenotype_preprocessed.tsv.manifest.json"
+    assert manifest.exists()
+
+    assert not script["preprocess"]()
+    assert script["preprocess"](force=True)
+
+    (tmp_path / "data" / "genes_to_disease.txt").write_text(GENES_TO_DISEASE.replace("POLYGENIC", "MENDELIAN"))
+    assert script["preprocess"]()
+    assert not script["preprocess"]()
+
+    # An output changed behind the manifest's back is rebuilt too
+    output.write_text("")
+    assert script["preprocess"]()
+    assert output.read_text()
+
+
+def test_preprocessing_rebuilds_output_with_other_columns(preprocessed, tmp_path):
+    manifest_file = tmp_path / "data" / "genes_to_phenotype_preprocessed.tsv.manifest.json"
+    # A manifest from before the output had its current columns
+    manifest = json.loads(manifest_file.read_text())
+    del manifest["columns"]
+    manifest_file.write_text(json.dumps(manifest))
+
+    assert preprocess_script()["preprocess"]()
+    assert json.loads(manifest_file.read_text())["columns"] == preprocess_script()["OUTPUT_COLUMNS"]
+
+
+def test_output_columns_match_the_transform_reader():
+    transform_config = Path(__file__).resolve().parents[1] / "src" / "gene_to_phenotype_transform.yaml"
+    with open(transform_config) as f:
+        reader_columns = yaml.safe_load(f)["reader"]["columns"]
+
+    assert preprocess_script()["OUTPUT_COLUMNS"] == reader_columns
+
+
+def test_preprocessing_with_resource_limits_and_profile(preprocessed, tmp_path):
+    output = tmp_path / "data" / "genes_to_phenotype_preprocessed.tsv"
+    expected = output.read_text()
+    profile = tmp_path / "profile.txt"
+
+    rebuilt = preprocess_script()["preprocess"](
+        threads=1, memory_limit="256MB", temp_directory=str(tmp_path / "spill"), profile=str(profile)
+    )
+
+    assert rebuilt
+    assert output.read_text() == expected
+    assert "Total Time" in profile.read_text()
+
+
+def test_preprocessing_parquet_output(preprocessed, tmp_path):
+    assert preprocess_script()["preprocess"](output_format="parquet")
+
+    parquet_file = tmp_path / "data" / "genes_to_phenotype_preprocessed.parquet"
+    assert (tmp_path / "data" / "genes_to_phenotype_preprocessed.parquet.manifest.json").exists()
+    cursor = duckdb.execute("select * from read_parquet(?)", [str(parquet_file)])
+    columns = [description[0] for description in cursor.description]
+    rows = [dict(zip(columns, values, strict=True)) for values in cursor.fetchall()]
+
+    tsv_columns = list(next(iter(preprocessed.values())))
+    assert columns == tsv_columns
+    assert len(rows) == 4
+    assert {row["ncbi_gene_id"]: row["disease_context_qualifier"] for row in rows} == {
+        gene: row["disease_context_qualifier"] for gene, row in preprocessed.items()
+    }
@@ -7,17 +7,13 @@ from koza.io.writer.passthrough_writer import PassthroughWriter
 from src.gene_to_phenotype_transform import transform_record
 
 
-@pytest.fixture
-def mondo_map():
-    """
-    Mimicks the mondo.sssom file that allows us to map disease_ids back to mondo.
-    Original structure had MONDO as keys mapping to OMIM values.
-    """
-    return {
-        "MONDO:0013588": {"subject_id": "OMIM:614129"},
-        "MONDO:0009341": {"subject_id": "OMIM:235730"},
-        "MONDO:0013212": {"subject_id": "OMIM:613287"}
-    }
+def _transform(row, **extra_fields):
+    koza_transform = KozaTransform(
+        mappings={},
+        writer=PassthroughWriter(),
+        extra_fields=extra_fields
+    )
+    return transform_record(koza_transform, row)
 
 
 @pytest.fixture
@@ -33,7 +29,8 @@ def test_row():
         "publications": "PMID:1234567;OMIM:614129",
         "frequency": "3/10",
         "disease_id": "OMIM:614129",
-        "gene_to_disease_association_types": "MENDELIAN"
+        "gene_to_disease_association_types": "MENDELIAN",
+        "disease_context_qualifier": "OMIM:614129"
     }
 
 
@@ -50,7 +47,8 @@ def test_row_v2():
         "publications": "PMID:1234567",
         "frequency": "40.7%",
         "disease_id": "OMIM:235730",
-        "gene_to_disease_association_types": "MENDELIAN"
+        "gene_to_disease_association_types": "MENDELIAN",
+        "disease_context_qualifier": "OMIM:235730"
     }
 
 
@@ -67,47 +65,33 @@ def test_row_v3():
         "publications": "PMID:1234567;PMID:2345678",
         "frequency": "-",
         "disease_id": "OMIM:613287",
-        "gene_to_disease_association_types": "MENDELIAN"
+        "gene_to_disease_association_types": "MENDELIAN",
+        "disease_context_qualifier": "OMIM:613287"
     }
 
 
 @pytest.fixture
-def basic_hpoa(test_row, mondo_map):
+def basic_hpoa(test_row):
     """
     Koza run for HPOA Gene to Phenotype ingest.
     """
-    koza_transform = KozaTransform(
-        mappings={"mondo_map": mondo_map},
-        writer=PassthroughWriter(),
-        extra_fields={}
-    )
-    return transform_record(koza_transform, test_row)
+    return _transform(test_row)
 
 
 @pytest.fixture
-def basic_hpoa_v2(test_row_v2, mondo_map):
+def basic_hpoa_v2(test_row_v2):
     """
     Koza run for HPOA Gene to Phenotype ingest.
     """
-    koza_transform = KozaTransform(
-        mappings={"mondo_map": mondo_map},
-        writer=PassthroughWriter(),
-        extra_fields={}
-    )
-    return transform_record(koza_transform, test_row_v2)
+    return _transform(test_row_v2)
 
 
 @pytest.fixture
-def basic_hpoa_v3(test_row_v3, mondo_map):
+def basic_hpoa_v3(test_row_v3):
     """
     Koza run for HPOA Gene to Phenotype ingest.
     """
-    koza_transform = KozaTransform(
-        mappings={"mondo_map": mondo_map},
-        writer=PassthroughWriter(),
-        extra_fields={}
-    )
-    return transform_record(koza_transform, test_row_v3)
+    return _transform(test_row_v3)
 
 
 @pytest.mark.parametrize("cls", [GeneToPhenotypicFeatureAssociation])
@@ -189,3 +173,31 @@ def test_hpoa_g2p_association_v3(basic_hpoa_v3):
     assert association.disease_context_qualifier == "OMIM:613287"
     assert "infores:monarchinitiative" in association.aggregator_knowledge_source
     assert association.publications == ["PMID:1234567", "PMID:2345678"]
+
+
+def test_hpoa_g2p_disease_context_from_preprocessing(test_row):
+    association = _transform({**test_row, "disease_context_qualifier": "MONDO:0013588"})[0]
+    assert association.disease_context_qualifier == "MONDO:0013588"
+
+
+def test_hpoa_g2p_edges_share_interned_values(test_row):
+    # Validated associations hold copies of their lists
+    koza_transform = KozaTransform(
+        mappings={}, writer=PassthroughWriter(), extra_fields={"validation": "none", "intern_values": True}
+    )
+    # Copies of the row's strings, as another line of the file would hold
+    copy = {key: "".join(value) for key, value in test_row.items()}
+    first = transform_record(koza_transform, test_row)[0]
+    second = transform_record(koza_transform, copy)[0]
+    other_run = _transform(copy, intern_values=True)[0]
+    fresh = _transform(test_row)[0]
+
+    assert first.subject is second.subject
+    assert first.publications[0] is second.publications[0]
+    # Constant lists are shared, the lists of each row's values are not
+    assert first.aggregator_knowledge_source is second.aggregator_knowledge_source
+    assert first.publications is not second.publications
+    # Each run interns into its own table
+    assert other_run.subject is not first.subject
+    assert fresh.subject is not first.subject
+    assert fresh.model_dump(exclude={"id"}) == first.model_dump(exclude={"id"})
@@ -0,0 +1,151 @@
+import csv
+import gzip
+import io
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from src.compressed_writer import import_zstd
+from src.hpoa_fanout import run_hpoa_fanout
+from src.hpoa_stats import read_hpoa_stats, scan_hpoa_stats
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [3: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50%\t\t\tP\tHPO:probinson[2009-02-17]
+ORPHA:79474\tAtypical Werner syndrome\t\tHP:0000347\tORPHA:79474\tTAS\t\tHP:0040281\t\t\tP\tORPHA:orphadata[2024-06-25]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+OMIM:614856\tOsteogenesis imperfecta, type XIII\t\tHP:0003593\tOMIM:614856\tTAS\t\t\t\t\tC\tHPO:skoehler[2012-11-16]
+"""
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001 ! All
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005 ! Mode of inheritance
+"""
+
+
+def _read_edges(path: Path):
+    with path.open() as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+
+def _decompress(path: Path) -> str:
+    if path.suffix == ".gz":
+        return gzip.decompress(path.read_bytes()).decode()
+    return import_zstd().decompress(path.read_bytes()).decode()
+
+
+def _without_ids(edges):
+    return [{k: v for k, v in edge.items() if k != "id"} for edge in edges]
+
+
+@pytest.fixture
+def fanout_output(tmp_path, monkeypatch):
+    # get_modes_of_inheritance() reads data/hp.obo relative to the working directory
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "hp.obo").write_text(HP_OBO_FIXTURE)
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+    hpoa_file.write_text(HPOA_FIXTURE)
+    monkeypatch.chdir(tmp_path)
+
+    output_dir = tmp_path / "output"
+    edge_counts = run_hpoa_fanout(output_dir=str(output_dir), input_files=[str(hpoa_file)])
+    return output_dir, edge_counts
+
+
+def test_fanout_routes_rows_by_aspect(fanout_output):
+    output_dir, edge_counts = fanout_output
+
+    assert edge_counts == {"hpoa_disease_to_phenotype": 2, "hpoa_disease_mode_of_inheritance": 1}
+
+    d2p_edges = _read_edges(output_dir / "hpoa_disease_to_phenotype_edges.tsv")
+    assert [edge["subject"] for edge in d2p_edges] == ["OMIM:117650", "Orphanet:79474"]
+    assert {edge["predicate"] for edge in d2p_edges} == {"biolink:has_phenotype"}
+
+    moi_edges = _read_edges(output_dir / "hpoa_disease_mode_of_inheritance_edges.tsv")
+    assert len(moi_edges) == 1
+    assert moi_edges[0]["subject"] == "OMIM:300425"
+    assert moi_edges[0]["predicate"] == "biolink:has_mode_of_inheritance"
+    assert moi_edges[0]["object"] == "HP:0000006"
+
+
+def test_fanout_writes_hpoa_stats(fanout_output, tmp_path):
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+
+    stats = read_hpoa_stats(hpoa_file)
+
+    # Collected over every row read, whatever its aspect
+    assert stats["row_counts"] == {"OMIM": 3, "ORPHA": 1}
+    assert stats["max_biocuration_dates"] == {"OMIM": "2012-11-16", "ORPHA": "2024-06-25"}
+    assert stats["description"].startswith("#description:")
+    # Same as the fallback scan versions.py would otherwise run
+    scanned = scan_hpoa_stats(hpoa_file)
+    assert (stats["row_counts"], stats["max_biocuration_dates"]) == (scanned.row_counts, scanned.max_dates)
+
+
+@pytest.mark.parametrize("compression,suffix", [("gzip", ".tsv.gz"), ("zstd", ".tsv.zst")])
+def test_fanout_writes_compressed_edges(fanout_output, tmp_path, compression, suffix):
+    output_dir, _ = fanout_output
+    compressed_dir = tmp_path / "compressed"
+
+    edge_counts = run_hpoa_fanout(
+        output_dir=str(compressed_dir), input_files=[str(tmp_path / "data" / "phenotype.hpoa")], compression=compression
+    )
+
+    assert edge_counts == {"hpoa_disease_to_phenotype": 2, "hpoa_disease_mode_of_inheritance": 1}
+    assert sorted(p.name for p in compressed_dir.iterdir()) == [
+        f"hpoa_disease_mode_of_inheritance_edges{suffix}", f"hpoa_disease_to_phenotype_edges{suffix}"
+    ]
+    for name in edge_counts:
+        plain = (output_dir / f"{name}_edges.tsv").read_text()
+        compressed = _decompress(compressed_dir / f"{name}_edges{suffix}")
+        assert compressed.splitlines()[0] == plain.splitlines()[0]
+        assert _without_ids(csv.DictReader(io.StringIO(compressed), delimiter="\t")) == _without_ids(
+            csv.DictReader(io.StringIO(plain), delimiter="\t")
+        )
+
+
+def test_fanout_writes_parquet_edges(fanout_output, tmp_path):
+    output_dir, _ = fanout_output
+    parquet_dir = tmp_path / "parquet"
+
+    edge_counts = run_hpoa_fanout(
+        output_dir=str(parquet_dir), input_files=[str(tmp_path / "data" / "phenotype.hpoa")], output_format="parquet"
+    )
+
+    assert edge_counts == {"hpoa_disease_to_phenotype": 2, "hpoa_disease_mode_of_inheritance": 1}
+    assert sorted(p.name for p in parquet_dir.iterdir()) == [
+        "hpoa_disease_mode_of_inheritance_edges.parquet", "hpoa_disease_to_phenotype_edges.parquet"
+    ]
+    for name in edge_counts:
+        edges = duckdb.read_parquet(str(parquet_dir / f"{name}_edges.parquet")).fetchall()
+        assert [edge[1:3] for edge in edges] == [
+            (edge["subject"], edge["predicate"]) for edge in _read_edges(output_dir / f"{name}_edges.tsv")
+        ]
+
+
+def test_fanout_rejects_transforms_with_different_sources(tmp_path):
+    src_dir = Path(__file__).resolve().parents[1] / "src"
+    with pytest.raises(ValueError, match="does not read the same source"):
+        run_hpoa_fanout(
+            config_files=[src_dir / "disease_to_phenotype_transform.yaml", src_dir / "gene_to_disease_transform.yaml"],
+            output_dir=str(tmp_path / "output"),
+        )
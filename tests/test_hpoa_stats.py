@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.hpoa_stats import HpoaStats, read_hpoa_stats, scan_hpoa_stats, stats_path
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [10: OMIM; 2: DECIPHER; 5 ORPHANET]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:619340\tFoo\t\tHP:0001\tPMID:1\tPCS\t\t\t\t\tP\tHPO:probinson[2024-03-14]
+OMIM:619340\tFoo [2030-01-01]\t\tHP:0002\tPMID:1\tPCS\t\t\t\t\tP\tHPO:probinson[2021-06-21];HPO:lccarmody[2018-10-03]
+ORPHA:33364\tBaz\t\tHP:0004\t\tIEA\t\t\t\t\tP\tORPHA:orphadata[2026-01-08]
+DECIPHER:1\tQux\t\tHP:0006\t\tIEA\t\t\t\t\tP\tHPO:skoehler[2013-05-29]
+DECIPHER:1\tQux\t\tHP:0007\t\tIEA\t\t\t\t\tP\t
+"""
+
+
+@pytest.fixture
+def hpoa_file(tmp_path):
+    p = tmp_path / "phenotype.hpoa"
+    p.write_text(HPOA_FIXTURE)
+    return p
+
+
+def test_scan_hpoa_stats(hpoa_file):
+    stats = scan_hpoa_stats(hpoa_file)
+
+    assert stats.row_counts == {"OMIM": 2, "ORPHA": 1, "DECIPHER": 2}
+    # Only the biocuration column is searched for dates, not the disease name
+    assert stats.max_dates == {"OMIM": "2024-03-14", "ORPHA": "2026-01-08", "DECIPHER": "2013-05-29"}
+
+
+def test_stats_sidecar_round_trip(hpoa_file):
+    assert read_hpoa_stats(hpoa_file) is None
+
+    path = scan_hpoa_stats(hpoa_file).write(hpoa_file)
+
+    assert path == stats_path(hpoa_file) == hpoa_file.with_name("phenotype.hpoa.stats.json")
+    stats = read_hpoa_stats(hpoa_file)
+    assert stats["description"].startswith('#description: "HPO annotations for rare diseases')
+    assert stats["row_counts"]["DECIPHER"] == 2
+    assert stats["max_biocuration_dates"]["OMIM"] == "2024-03-14"
+
+
+def test_stats_sidecar_ignored_once_file_changes(hpoa_file):
+    HpoaStats().write(hpoa_file)
+    assert read_hpoa_stats(hpoa_file) is not None
+
+    hpoa_file.write_text(HPOA_FIXTURE + "OMIM:1\tNew\t\tHP:0008\t\tIEA\t\t\t\t\tP\tHPO:x[2026-02-01]\n")
+    assert read_hpoa_stats(hpoa_file) is None
+
+
+def test_stats_sidecar_ignored_when_unreadable(hpoa_file):
+    stats_path(hpoa_file).write_text("{not json")
+    assert read_hpoa_stats(hpoa_file) is None
+
+    stat = hpoa_file.stat()
+    stats_path(hpoa_file).write_text(json.dumps({"hpoa_file": {"size": stat.st_size}}))
+    assert read_hpoa_stats(hpoa_file) is None
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.http_versions import UNAVAILABLE, probe_versions
+
+LAST_MODIFIED = "Thu, 08 Jan 2026 10:15:00 GMT"
+ETAG = '"hp-2026-01-08"'
+VERSION = ("2026-01-08", "http_last_modified")
+RESPONSE_DELAY = 0.3
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """HEAD responses with a Last-Modified and ETag, a 304 for the ETag, and failing or hung paths."""
+
+    def do_HEAD(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+            failing = self.path in server.failing
+        time.sleep(RESPONSE_DELAY if self.path != "/hung" else 5)
+        if self.path == "/missing" or failing:
+            self.send_response(404)
+        elif self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.failing = set()
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_probes_run_concurrently(stub_server, tmp_path):
+    server, base_url = stub_server
+    urls = [f"{base_url}/source_{i}" for i in range(6)]
+
+    start = time.perf_counter()
+    versions = probe_versions(urls + urls[:2], cache_file=tmp_path / "cache.json")
+    elapsed = time.perf_counter() - start
+
+    assert versions == {url: VERSION for url in urls}
+    # One request per distinct URL, all in flight at once
+    assert len(server.requests) == 6
+    assert elapsed < RESPONSE_DELAY * 3
+
+
+def test_cached_probes_are_revalidated_after_ttl(stub_server, tmp_path):
+    server, base_url = stub_server
+    cache_file = tmp_path / "cache.json"
+    url = f"{base_url}/hp.obo"
+
+    assert probe_versions([url], cache_file=cache_file)[url] == VERSION
+    assert probe_versions([url], cache_file=cache_file)[url] == VERSION
+    assert server.requests == [("/hp.obo", None)]
+    assert json.loads(cache_file.read_text())[url]["etag"] == ETAG
+
+    # Past the TTL the cached entry is revalidated with its ETag, and a 304 keeps it
+    assert probe_versions([url], cache_file=cache_file, ttl=0)[url] == VERSION
+    assert server.requests[1] == ("/hp.obo", ETAG)
+
+
+def test_hung_servers_time_out(stub_server, tmp_path):
+    _, base_url = stub_server
+    hung, url = f"{base_url}/hung", f"{base_url}/hp.obo"
+
+    start = time.perf_counter()
+    versions = probe_versions([hung, url], cache_file=tmp_path / "cache.json", timeout=1)
+
+    assert versions == {hung: UNAVAILABLE, url: VERSION}
+    assert time.perf_counter() - start < 3
+
+
+def test_failed_probes_keep_the_last_known_version(stub_server, tmp_path):
+    server, base_url = stub_server
+    cache_file = tmp_path / "cache.json"
+    known, missing = f"{base_url}/hp.obo", f"{base_url}/missing"
+
+    probe_versions([known], cache_file=cache_file)
+    server.failing.add("/hp.obo")
+
+    assert probe_versions([known, missing], cache_file=cache_file, ttl=0) == {known: VERSION, missing: UNAVAILABLE}
+    assert set(json.loads(cache_file.read_text())) == {known}
+    # The URL without a version is probed again on the next run, whatever the TTL
+    probe_versions([known, missing], cache_file=cache_file)
+    assert [path for path, _ in server.requests].count("/hp.obo") == 2
+    assert [path for path, _ in server.requests].count("/missing") == 2
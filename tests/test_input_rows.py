@@ -0,0 +1,114 @@
+import gzip
+
+import pytest
+from koza.model.reader import CSVReaderConfig
+from koza.model.source import Source
+
+from src.input_rows import InputRows, row_columns
+
+GENES_TO_DISEASE = """\
+ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource
+NCBIGene:8192\tCLPP\tMENDELIAN\tORPHA:79474\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:100\tADA\tMENDELIAN\tOMIM:102700\tftp://ftp.ncbi.nlm.nih.gov/gene/DATA/mim2gene_medgen
+NCBIGene:9839\tZEB2\tPOLYGENIC\tORPHA:2126\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:7157\tTP53\tUNKNOWN\tOMIM:151623\thttps://www.orphadata.com/data/xml/en_product6.xml
+"""
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [2: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50% \t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+
+OMIM:614856\tOsteogenesis imperfecta, type XIII\tNOT\tHP:0000343\tOMIM:614856\tTAS\t\t1/1\tFEMALE\t\tP\t\
+HPO:skoehler[2012-11-16]
+"""
+
+HPOA_COLUMNS = [
+    "database_id", "disease_name", "qualifier", "hpo_id", "reference", "evidence",
+    "onset", "frequency", "sex", "modifier", "aspect", "biocuration",
+]
+
+
+def _hpoa_config(path):
+    return CSVReaderConfig(
+        files=[str(path)],
+        delimiter="\t",
+        header_mode=4,
+        columns=HPOA_COLUMNS,
+        filters=[{"inclusion": "include", "column": "aspect", "filter_code": "eq", "value": "P"}],
+    )
+
+
+def _config(*paths):
+    return CSVReaderConfig(
+        files=[str(path) for path in paths],
+        delimiter="\t",
+        filters=[{"inclusion": "exclude", "column": "association_type", "filter_code": "eq", "value": "MENDELIAN"}],
+    )
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_input_rows_match_koza_source(tmp_path, compressed):
+    path = tmp_path / ("genes_to_disease.txt.gz" if compressed else "genes_to_disease.txt")
+    if compressed:
+        path.write_bytes(gzip.compress(GENES_TO_DISEASE.encode()))
+    else:
+        path.write_text(GENES_TO_DISEASE)
+    rows = InputRows(_config(path), tmp_path)
+
+    assert list(rows) == list(Source(_config(path), tmp_path))
+    assert (rows.rows_read, rows.rows_dropped) == (4, 2)
+    assert rows.bytes_read() is None
+
+
+def test_input_rows_limit_and_offsets(tmp_path):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text(GENES_TO_DISEASE)
+    second.write_text(GENES_TO_DISEASE)
+    total = first.stat().st_size + second.stat().st_size
+
+    rows = InputRows(_config(first.name, second.name), tmp_path, row_limit=3)
+    iterator = iter(rows)
+    next(iterator)
+    done, size = rows.bytes_read()
+    assert size == total
+    assert 0 < done <= first.stat().st_size
+
+    assert len([next(iterator), *iterator]) == 2
+    # The third row kept is the first POLYGENIC row of the second file
+    assert (rows.rows_read, rows.rows_dropped) == (7, 4)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_projected_rows_match_koza_rows(tmp_path, compressed):
+    path = tmp_path / ("phenotype.hpoa.gz" if compressed else "phenotype.hpoa")
+    if compressed:
+        path.write_bytes(gzip.compress(HPOA_FIXTURE.encode()))
+    else:
+        path.write_text(HPOA_FIXTURE)
+    columns = ["database_id", "qualifier", "hpo_id", "frequency"]
+
+    # The filtered column is read along with the projected ones
+    source = Source(_hpoa_config(path), tmp_path)
+    koza_rows = [{column: row[column] for column in [*columns, "aspect"]} for row in source]
+    rows = InputRows(_hpoa_config(path), tmp_path, columns=columns)
+
+    assert list(rows) == koza_rows
+    assert [row["frequency"] for row in koza_rows] == ["50%", "1/1"]
+    assert (rows.rows_read, rows.rows_dropped) == (3, 1)
+    assert list(InputRows(_hpoa_config(path), tmp_path, row_limit=1, columns=columns)) == koza_rows[:1]
+    with pytest.raises(ValueError, match="not in the header"):
+        list(InputRows(_hpoa_config(path), tmp_path, columns=["hpo_name"]))
+
+
+def test_row_columns():
+    config = CSVReaderConfig(files=[], columns=HPOA_COLUMNS)
+
+    assert row_columns(config, {}) is None
+    assert row_columns(config, {"row_columns": ["hpo_id"]}) == ["hpo_id"]
+    with pytest.raises(ValueError, match="not among the reader's columns"):
+        row_columns(config, {"row_columns": ["hpo_name"]})
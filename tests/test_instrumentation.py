@@ -0,0 +1,150 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from koza.model.formats import OutputFormat
+from koza.runner import KozaRunner
+
+from src import instrumentation
+from src.hpoa_fanout import run_hpoa_fanout
+from src.phenotype_ingest_utils import resolve_frequency
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [2: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50%\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0000347\tOMIM:117650\tTAS\t\t3/10\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+"""
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005
+"""
+
+GENES_TO_DISEASE = """\
+ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource
+NCBIGene:8192\tCLPP\tMENDELIAN\tORPHA:79474\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:9839\tZEB2\tMENDELIAN\tORPHA:2126\thttps://www.orphadata.com/data/xml/en_product6.xml
+"""
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+
+
+def test_timed_records_nothing_when_disabled():
+    calls = []
+    fn = instrumentation.timed("model")(lambda x: calls.append(x) or x)
+
+    assert fn(1) == 1
+    assert calls == [1]
+    assert not instrumentation.is_enabled()
+    assert instrumentation.summary() == {}
+
+
+def test_timed_records_calls(enabled):
+    fn = instrumentation.timed("model")(lambda x: x)
+
+    for i in range(3):
+        fn(i)
+    assert list(instrumentation.timed_rows(["a", "b"], "rows")) == ["a", "b"]
+
+    timings = instrumentation.summary()
+    assert timings["unknown"]["model"]["calls"] == 3
+    assert timings["rows"] == {"read": {"seconds": pytest.approx(0, abs=0.1), "calls": 2}}
+
+
+def test_fanout_records_stages(enabled, tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "hp.obo").write_text(HP_OBO_FIXTURE)
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+    hpoa_file.write_text(HPOA_FIXTURE)
+    monkeypatch.chdir(tmp_path)
+    # Resolved frequencies are timed whether or not they are cached
+    resolve_frequency("50%")
+
+    run_hpoa_fanout(output_dir=str(tmp_path / "output"), input_files=[str(hpoa_file)])
+
+    timings = instrumentation.read_summaries(tmp_path / "output")
+    assert timings["hpoa_fanout"]["read"]["calls"] == 3
+    d2p = timings["hpoa_disease_to_phenotype"]
+    assert list(d2p) == ["transform_record", "frequency", "knowledge_source", "model", "write"]
+    assert d2p["transform_record"]["calls"] == 2
+    assert d2p["frequency"]["calls"] == 2
+    assert d2p["model"]["calls"] == 2
+    assert timings["hpoa_disease_mode_of_inheritance"]["transform_record"]["calls"] == 1
+
+
+def test_runner_records_stages(enabled, tmp_path):
+    input_file = tmp_path / "genes_to_disease.txt"
+    input_file.write_text(GENES_TO_DISEASE)
+    config, runner = KozaRunner.from_config_file(
+        str(SRC_DIR / "gene_to_disease_transform.yaml"),
+        output_format=OutputFormat.passthrough,
+        input_files=[str(input_file)],
+    )
+
+    instrumentation.instrument_runner(runner, config.name)
+    runner.run()
+
+    g2d = instrumentation.summary()[config.name]
+    assert list(g2d) == ["read", "transform_record", "knowledge_source", "model", "write"]
+    assert g2d["read"]["calls"] == 2
+    assert g2d["transform_record"]["calls"] == 2
+    # get_predicate and get_knowledge_sources for each row
+    assert g2d["knowledge_source"]["calls"] == 4
+    assert g2d["model"]["calls"] == 2
+    assert g2d["write"]["calls"] == 2
+
+
+def test_write_release_instrumentation(enabled, tmp_path):
+    assert instrumentation.write_release_instrumentation(tmp_path) is None
+
+    instrumentation.timed("model")(lambda: None)()
+    instrumentation.write_summary(tmp_path)
+
+    path = instrumentation.write_release_instrumentation(tmp_path)
+    assert path == tmp_path / "release-instrumentation.yaml"
+    timings = yaml.safe_load(path.read_text())["instrumentation"]
+    assert timings["unknown"]["model"]["calls"] == 1
+
+    # A build without timings doesn't keep the previous build's
+    instrumentation.clear_summaries(tmp_path)
+    assert instrumentation.write_release_instrumentation(tmp_path) is None
+    assert not path.exists()
+
+
+def test_clear_summaries(enabled, tmp_path):
+    instrumentation.clear_summaries(tmp_path)
+    stale = tmp_path / "instrumentation" / "removed_transform.json"
+    stale.parent.mkdir()
+    stale.write_text("{}")
+
+    instrumentation.clear_summaries(tmp_path)
+    instrumentation.timed("model")(lambda: None)()
+    instrumentation.write_summary(tmp_path)
+
+    assert list(instrumentation.read_summaries(tmp_path)) == ["unknown"]
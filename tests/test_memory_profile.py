@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from src import memory_profile
+from src.hpoa_fanout import run_hpoa_fanout
+from src.memory_profile import memory_stage
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [2: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50%\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+"""
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005
+"""
+
+
+@pytest.fixture
+def enabled():
+    memory_profile.enable()
+    yield
+    memory_profile.disable()
+
+
+def test_memory_stage_records_nothing_when_disabled():
+    with memory_stage("load", "test"):
+        pass
+
+    assert memory_profile.summary() == {}
+
+
+def test_memory_stage_reports_growth_and_sites(enabled):
+    with memory_stage("load", "test"):
+        held = [bytearray(1024) for _ in range(20000)]
+
+    report = memory_profile.summary()["test"]["load"]
+    assert len(held) == 20000
+    assert report["python_growth_mb"] >= 19
+    assert report["python_peak_mb"] >= report["python_growth_mb"]
+    assert report["peak_rss_mb"] >= report["rss_before_mb"]
+    assert report["calls"] == 1
+    assert report["top_sites"][0]["site"].startswith(__file__)
+    assert report["top_sites"][0]["blocks"] >= 20000
+
+
+def test_nested_stage_peaks_count_towards_the_outer_stage(enabled):
+    with memory_stage("outer", "test"):
+        with memory_stage("inner"):
+            transient = bytearray(50 << 20)
+            del transient
+
+    stages = memory_profile.summary()["test"]
+    assert stages["inner"]["python_peak_mb"] >= 50
+    assert stages["inner"]["python_growth_mb"] < 1
+    assert stages["outer"]["python_peak_mb"] >= 50
+    assert stages["outer"]["peak_rss_mb"] >= stages["inner"]["peak_rss_mb"]
+
+
+def test_fanout_writes_memory_report(enabled, tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "hp.obo").write_text(HP_OBO_FIXTURE)
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+    hpoa_file.write_text(HPOA_FIXTURE)
+    monkeypatch.chdir(tmp_path)
+
+    run_hpoa_fanout(output_dir=str(tmp_path / "output"), input_files=[str(hpoa_file)])
+
+    memory_dir = tmp_path / "output" / "memory"
+    fanout = json.loads((memory_dir / "hpoa_fanout.json").read_text())
+    # The mode of inheritance terms are loaded on the first I row
+    assert set(fanout) == {"transform", "ontology"}
+    assert fanout["transform"]["peak_rss_mb"] >= fanout["ontology"]["peak_rss_mb"]
+    for name in ("hpoa_disease_to_phenotype", "hpoa_disease_mode_of_inheritance"):
+        assert set(json.loads((memory_dir / f"{name}.json").read_text())) == {"mappings"}
@@ -0,0 +1,68 @@
+import duckdb
+import pytest
+
+from src.mondo_index import MondoIndex, build_mondo_index, load_mondo_index, read_exact_matches
+
+# mondo.sssom.tsv starts with 50 lines of YAML metadata
+SSSOM_HEADER = "".join(f"#line_{i}: metadata\n" for i in range(50)) + (
+    "subject_id\tsubject_label\tpredicate_id\tobject_id\tobject_label\tmapping_justification\n"
+)
+
+SSSOM_ROWS = [
+    "MONDO:0013588\tOI type XIII\tskos:exactMatch\tOMIM:614129\tOI XIII\tsemapv:ManualMappingCuration",
+    "MONDO:0000001\tdisease\tskos:closeMatch\tOMIM:235730\tdisease\tsemapv:ManualMappingCuration",
+    "MONDO:0000002\tWerner\tskos:exactMatch\tOrphanet:79474\tWerner\tsemapv:ManualMappingCuration",
+    "MONDO:0000003\tWerner again\tskos:exactMatch\tOrphanet:79474\tWerner\tsemapv:ManualMappingCuration",
+]
+
+
+@pytest.fixture
+def sssom_file(tmp_path):
+    p = tmp_path / "mondo.sssom.tsv"
+    p.write_text(SSSOM_HEADER + "\n".join(SSSOM_ROWS) + "\n")
+    return p
+
+
+def test_read_exact_matches(sssom_file):
+    # Only exact matches, keyed by object_id; as in koza's mapping loader the last row wins
+    assert read_exact_matches(sssom_file) == {
+        "OMIM:614129": "MONDO:0013588",
+        "Orphanet:79474": "MONDO:0000003",
+    }
+
+
+def test_lookup(sssom_file):
+    index = load_mondo_index(sssom_file)
+
+    assert len(index) == 2
+    assert index.lookup("OMIM:614129") == "MONDO:0013588"
+    assert index.lookup("Orphanet:79474") == "MONDO:0000003"
+    assert index.lookup("OMIM:235730") is None
+    assert index.lookup("OMIM:6141290") is None
+    assert index.lookup("") is None
+
+
+def test_columns_scan_in_duckdb(sssom_file):
+    con = duckdb.connect(":memory:")
+    con.register("mondo", load_mondo_index(sssom_file).columns())
+
+    assert con.execute("select * from mondo order by object_id").fetchall() == [
+        ("OMIM:614129", "MONDO:0013588"),
+        ("Orphanet:79474", "MONDO:0000003"),
+    ]
+
+
+def test_index_is_rebuilt_when_sssom_changes(sssom_file):
+    first = build_mondo_index(sssom_file)
+    assert build_mondo_index(sssom_file) == first
+
+    sssom_file.write_text(SSSOM_HEADER + SSSOM_ROWS[0] + "\n")
+    second = build_mondo_index(sssom_file)
+
+    assert second != first
+    assert not first.exists()
+    assert load_mondo_index(sssom_file).lookup("Orphanet:79474") is None
+
+
+def test_empty_index():
+    assert MondoIndex.from_mapping({}).lookup("OMIM:614129") is None
@@ -0,0 +1,151 @@
+import csv
+from pathlib import Path
+
+import duckdb
+import pytest
+from koza.runner import KozaRunner
+
+from src import parquet_io
+from src.parquet_io import ParquetRows, edges_to_parquet, parquet_runner, read_runner_input
+
+G2P_CONFIG = Path(__file__).resolve().parents[1] / "src" / "gene_to_phenotype_transform.yaml"
+
+PREPROCESSED_HEADER = [
+    "ncbi_gene_id", "gene_symbol", "hpo_id", "hpo_name", "frequency", "disease_id",
+    "publications", "gene_to_disease_association_types", "disease_context_qualifier",
+]
+
+PREPROCESSED_ROWS = [
+    ["8192", "CLPP", "HP:0000252", "Microcephaly", "3/10", "OMIM:614129",
+     "OMIM:614129;PMID:1234567", "MENDELIAN", "MONDO:0013588"],
+    ["9839", "ZEB2", "HP:0012429", "Aplasia/Hypoplasia of the cerebral white matter", "40.7%", "OMIM:235730",
+     "PMID:1234567", "MENDELIAN", "OMIM:235730"],
+    ["16", "AARS1", "HP:0001284", "Areflexia", "-", "OMIM:613287", "", "MENDELIAN", "OMIM:613287"],
+    ["17", "ABCA1", "HP:0001285", "Spasticity", "-", "OMIM:613288", "PMID:1", "POLYGENIC", "OMIM:613288"],
+]
+
+
+def _read_tsv(path: Path):
+    with path.open() as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+
+def _read_parquet(path: Path):
+    cursor = duckdb.execute("select * from read_parquet(?)", [str(path)])
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, values, strict=True)) for values in cursor.fetchall()]
+
+
+def _parquet_types(path: Path):
+    cursor = duckdb.execute("select * from read_parquet(?)", [str(path)])
+    return {description[0]: str(description[1]) for description in cursor.description}
+
+
+def _as_tsv_value(value) -> str:
+    """Render a typed Parquet value as koza writes it to a TSV."""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "|".join(value)
+    return str(value)
+
+
+def _without_ids(edges):
+    return [{k: v for k, v in edge.items() if k != "id"} for edge in edges]
+
+
+@pytest.fixture
+def preprocessed_tsv(tmp_path):
+    p = tmp_path / "genes_to_phenotype_preprocessed.tsv"
+    with p.open("w") as f:
+        f.write("\t".join(PREPROCESSED_HEADER) + "\n")
+        for row in PREPROCESSED_ROWS:
+            f.write("\t".join(row) + "\n")
+    duckdb.read_csv(str(p), sep="\t", header=True, all_varchar=True).write_parquet(str(p.with_suffix(".parquet")))
+    return p
+
+
+def _run_g2p(input_file: Path, output_dir: Path, intermediate_format: str):
+    config, runner = KozaRunner.from_config_file(
+        str(G2P_CONFIG),
+        output_dir=str(output_dir),
+        input_files=[str(input_file)],
+        overrides={"transform": {"intermediate_format": intermediate_format}},
+    )
+    rows = read_runner_input(runner, config.reader)
+    assert isinstance(rows, ParquetRows) == (intermediate_format == "parquet")
+    runner.run()
+    return output_dir / "hpoa_gene_to_phenotype_edges.tsv"
+
+
+def test_g2p_reads_parquet_intermediate(preprocessed_tsv, tmp_path):
+    from_tsv = _read_tsv(_run_g2p(preprocessed_tsv, tmp_path / "tsv", "tsv"))
+    from_parquet = _read_tsv(_run_g2p(preprocessed_tsv, tmp_path / "parquet", "parquet"))
+
+    # The reader's filter (MENDELIAN only) applies to Parquet rows too
+    assert len(from_tsv) == 3
+    assert _without_ids(from_parquet) == _without_ids(from_tsv)
+
+
+def test_plain_koza_run_rejects_parquet_intermediate(preprocessed_tsv, tmp_path):
+    _, runner = KozaRunner.from_config_file(
+        str(G2P_CONFIG),
+        output_dir=str(tmp_path),
+        input_files=[str(preprocessed_tsv)],
+        overrides={"transform": {"intermediate_format": "parquet"}},
+    )
+
+    with pytest.raises(ValueError, match="only read through src.parquet_io.read_runner_input"):
+        runner.run()
+
+
+def test_parquet_rows(preprocessed_tsv, tmp_path):
+    config, _ = KozaRunner.from_config_file(
+        str(G2P_CONFIG), output_dir=str(tmp_path), input_files=[str(preprocessed_tsv)]
+    )
+
+    parquet_rows = ParquetRows(config.reader, G2P_CONFIG.parent)
+    rows = list(parquet_rows)
+    assert [row["ncbi_gene_id"] for row in rows] == ["8192", "9839", "16"]
+    assert rows[2]["publications"] == ""
+    # The reader's filter keeps MENDELIAN rows only
+    assert (parquet_rows.rows_read, parquet_rows.rows_dropped) == (4, 1)
+    assert list(ParquetRows(config.reader, G2P_CONFIG.parent, row_limit=2)) == rows[:2]
+
+
+def test_edges_to_parquet(preprocessed_tsv, tmp_path):
+    edges_tsv = _run_g2p(preprocessed_tsv, tmp_path, "tsv")
+    expected = _read_tsv(edges_tsv)
+
+    parquet_file = edges_to_parquet(G2P_CONFIG, output_dir=str(tmp_path))
+
+    assert parquet_file == tmp_path / "hpoa_gene_to_phenotype_edges.parquet"
+    assert not edges_tsv.exists()
+    edges = _read_parquet(parquet_file)
+    assert [{column: _as_tsv_value(value) for column, value in edge.items()} for edge in edges] == expected
+    assert list(edges[0]) == list(expected[0])
+
+    types = _parquet_types(parquet_file)
+    assert types["has_count"] == types["has_total"] == "BIGINT"
+    assert types["has_percentage"] == types["has_quotient"] == "DOUBLE"
+    assert types["publications"] == types["aggregator_knowledge_source"] == types["category"] == "VARCHAR[]"
+    assert types["subject"] == "VARCHAR"
+    assert edges[0]["publications"] == ["OMIM:614129", "PMID:1234567"]
+    assert (edges[0]["has_count"], edges[0]["has_total"]) == (3, 10)
+
+
+def test_parquet_writer_matches_edges_to_parquet(preprocessed_tsv, tmp_path, monkeypatch):
+    _run_g2p(preprocessed_tsv, tmp_path / "converted", "tsv")
+    expected_file = edges_to_parquet(G2P_CONFIG, output_dir=str(tmp_path / "converted"))
+    # Several batches
+    monkeypatch.setattr(parquet_io, "WRITE_BATCH_SIZE", 2)
+
+    config, runner = parquet_runner(G2P_CONFIG, str(tmp_path / "direct"), input_files=[str(preprocessed_tsv)])
+    read_runner_input(runner, config.reader)
+    runner.run()
+
+    assert sorted(path.name for path in (tmp_path / "direct").iterdir()) == ["hpoa_gene_to_phenotype_edges.parquet"]
+    parquet_file = tmp_path / "direct" / "hpoa_gene_to_phenotype_edges.parquet"
+    assert runner.writer.edge_count == 3
+    assert _parquet_types(parquet_file) == _parquet_types(expected_file)
+    assert _without_ids(_read_parquet(parquet_file)) == _without_ids(_read_parquet(expected_file))
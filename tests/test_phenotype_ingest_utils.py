@@ -2,11 +2,40 @@
 Tests of HPOA Utils methods
 """
 
+from pathlib import Path
+
+import numpy as np
 import pytest
+from biolink_model.datamodel.pydanticmodel_v2 import (
+    AgentTypeEnum,
+    CausalGeneToDiseaseAssociation,
+    KnowledgeLevelEnum,
+)
+from koza import KozaTransform
+from koza.io.writer.passthrough_writer import PassthroughWriter
+from koza.io.writer.tsv_writer import TSVWriter
+from koza.model.formats import OutputFormat
+from koza.runner import KozaRunner
+from koza.model.writer import WriterConfig
+from pronto import Ontology
+from pydantic import ValidationError
 
-from src.phenotype_ingest_utils import (FrequencyHpoTerm,
+import src.phenotype_ingest_utils as phenotype_ingest_utils
+from src.phenotype_ingest_utils import (NO_FREQUENCY,
+                                    VALIDATION_MODE_ENV,
+                                    FrequencyHpoTerm,
+                                    IsAGraph,
+                                    NoInterning,
+                                    ValueInterner,
+                                    build_association,
+                                    classify_frequency,
+                                    get_interner,
+                                    kgx_columns,
                                     get_hpo_term,
-                                    phenotype_frequency_to_hpo_term)
+                                    map_percentage_frequency_to_hpo_term,
+                                    phenotype_frequency_to_hpo_term,
+                                    read_ontology_terms_cached,
+                                    resolve_frequency)
 
 
 def test_get_hpo_term():
@@ -48,4 +77,331 @@ def test_frequency_result(raw_value, frequency_qualifier, percentage, quotient,
     assert frequency.has_percentage == percentage
     assert frequency.has_quotient == quotient
     assert frequency.has_count == count
-    assert frequency.has_total == total
\ No newline at end of file
+    assert frequency.has_total == total
+
+def _koza_transform(**extra_fields):
+    return KozaTransform(mappings={}, writer=PassthroughWriter(), extra_fields=extra_fields)
+
+
+def _g2d_fields(**overrides):
+    fields = dict(
+        id="uuid:1",
+        subject="NCBIGene:64170",
+        predicate="biolink:causes",
+        object="OMIM:212050",
+        primary_knowledge_source="infores:omim",
+        aggregator_knowledge_source=["infores:monarchinitiative"],
+        knowledge_level=KnowledgeLevelEnum.knowledge_assertion,
+        agent_type=AgentTypeEnum.manual_agent,
+    )
+    fields.update(overrides)
+    return fields
+
+
+def test_build_association_without_validation_matches_validated():
+    koza_transform = _koza_transform(validation="none")
+
+    fast = build_association(koza_transform, CausalGeneToDiseaseAssociation, **_g2d_fields())
+    validated = CausalGeneToDiseaseAssociation(**_g2d_fields())
+
+    assert isinstance(fast, CausalGeneToDiseaseAssociation)
+    assert fast == validated
+    assert fast.model_dump(mode="json", exclude_none=True) == validated.model_dump(mode="json", exclude_none=True)
+
+
+def test_build_association_without_validation_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="Unknown CausalGeneToDiseaseAssociation fields: not_a_slot"):
+        build_association(
+            _koza_transform(validation="none"), CausalGeneToDiseaseAssociation, **_g2d_fields(not_a_slot="x")
+        )
+
+
+def test_build_association_validates_a_sample():
+    koza_transform = _koza_transform(validation="sample", validation_sample_rate=2)
+    invalid = _g2d_fields(negated="sometimes")
+
+    with pytest.raises(ValidationError):
+        build_association(koza_transform, CausalGeneToDiseaseAssociation, **invalid)  # 1st: validated
+    build_association(koza_transform, CausalGeneToDiseaseAssociation, **invalid)  # 2nd: not validated
+    with pytest.raises(ValidationError):
+        build_association(koza_transform, CausalGeneToDiseaseAssociation, **invalid)  # 3rd: validated
+
+
+def test_build_association_mode_from_environment(monkeypatch):
+    monkeypatch.setenv(VALIDATION_MODE_ENV, "all")
+    with pytest.raises(ValidationError):
+        build_association(
+            _koza_transform(validation="none"), CausalGeneToDiseaseAssociation, **_g2d_fields(negated="sometimes")
+        )
+
+
+def test_build_association_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="Unknown validation mode"):
+        build_association(_koza_transform(validation="sometimes"), CausalGeneToDiseaseAssociation, **_g2d_fields())
+
+
+@pytest.mark.parametrize("rate", [0, -5, 2.5, "10", True])
+def test_build_association_rejects_bad_sample_rate(rate):
+    koza_transform = _koza_transform(validation="sample", validation_sample_rate=rate)
+    with pytest.raises(ValueError, match="validation_sample_rate must be a positive integer"):
+        build_association(koza_transform, CausalGeneToDiseaseAssociation, **_g2d_fields())
+
+
+@pytest.mark.parametrize("config_file", sorted((Path(__file__).parents[1] / "src").glob("*_transform.yaml")))
+def test_shipped_transforms_validate_every_association(config_file, monkeypatch):
+    monkeypatch.delenv(VALIDATION_MODE_ENV, raising=False)
+    _, runner = KozaRunner.from_config_file(str(config_file), output_format=OutputFormat.passthrough)
+    koza_transform = _koza_transform(**runner.extra_transform_fields)
+    invalid = _g2d_fields(negated="sometimes")
+
+    for _ in range(3):
+        with pytest.raises(ValidationError):
+            build_association(koza_transform, CausalGeneToDiseaseAssociation, **invalid)
+
+
+def test_resolve_frequency_shares_frozen_instances():
+    resolve_frequency.cache_clear()
+
+    first = resolve_frequency("5/20")
+    second = resolve_frequency("5/20")
+
+    assert first is second
+    assert first == phenotype_frequency_to_hpo_term("5/20")
+    assert resolve_frequency.cache_info().hits == 1
+    assert resolve_frequency.cache_info().misses == 1
+    with pytest.raises(ValidationError):
+        first.has_count = 6
+
+
+def test_resolve_frequency_without_data():
+    assert resolve_frequency("") is NO_FREQUENCY
+    assert resolve_frequency(None) is NO_FREQUENCY
+
+
+def test_unparseable_frequency_is_distinguishable():
+    unparseable = resolve_frequency("many")
+
+    assert unparseable.unparseable
+    assert not resolve_frequency("").unparseable
+    assert unparseable != NO_FREQUENCY
+
+
+def test_kgx_columns_match_the_koza_tsv_header(tmp_path):
+    node_properties = ["synonym", "_internal", "id", "in_taxon", "name", "category"]
+    edge_properties = ["publications", "object", "_internal", "category", "subject", "id", "predicate", "negated"]
+    writer = TSVWriter(tmp_path, "test", WriterConfig(node_properties=node_properties, edge_properties=edge_properties))
+    writer.finalize()
+
+    for record_type, properties in [("node", node_properties), ("edge", edge_properties)]:
+        header = (tmp_path / f"test_{record_type}s.tsv").read_text().splitlines()[0].split("\t")
+        assert kgx_columns(properties, record_type) == header
+
+
+def test_value_interner_shares_values():
+    interner = ValueInterner()
+    # Built at run time, so equal but distinct objects
+    first, second = ("PMID:" + str(n) for n in (12345, 12345))
+    assert first is not second
+
+    assert interner.value(first) is interner.value(second) is first
+    assert interner.values([second, "PMID:1"]) == [first, "PMID:1"]
+    assert interner.values([second])[0] is first
+    assert interner.values([first]) is not interner.values([first])
+    assert interner.constant_list(("infores:omim",)) is interner.constant_list(("infores:omim",))
+    assert interner.curie("NCBIGene:", "64170") is interner.curie("NCBIGene:", "64170") == "NCBIGene:64170"
+    assert interner.disease_id("ORPHA:558") is interner.disease_id("ORPHA:558") == "Orphanet:558"
+    assert interner.info() == {"values": 5, "lists": 1}
+
+
+def test_no_interning_builds_values_afresh():
+    interner = NoInterning()
+    assert interner.constant_list(("infores:omim",)) is not interner.constant_list(("infores:omim",))
+    assert interner.curie("NCBIGene:", "64170") == "NCBIGene:64170"
+    assert interner.disease_id("ORPHA:558") == "Orphanet:558"
+
+
+def test_interner_per_run():
+    koza_transform = _koza_transform(intern_values=True)
+    interner = get_interner(koza_transform)
+
+    assert type(interner) is ValueInterner
+    assert get_interner(koza_transform) is interner
+    assert get_interner(_koza_transform(intern_values=True)) is not interner
+    # Opt-in
+    assert type(get_interner(_koza_transform())) is NoInterning
+    assert type(get_interner(_koza_transform(intern_values=False))) is NoInterning
+
+
+@pytest.mark.parametrize(
+    "percentage, curie",
+    [
+        (0.0, "HP:0040285"),
+        (0.5, "HP:0040284"),
+        (4.0, "HP:0040284"),
+        (4.5, "HP:0040284"),
+        (5.0, "HP:0040283"),
+        (29.5, "HP:0040283"),
+        (30.0, "HP:0040282"),
+        (79.5, "HP:0040282"),
+        (80.0, "HP:0040281"),
+        (99.5, "HP:0040281"),
+        (100.0, "HP:0040280"),
+        (-1.0, None),
+        (100.5, None),
+        (float("nan"), None),
+    ],
+)
+def test_classify_frequency_band_edges(percentage, curie):
+    assert classify_frequency(percentage) == curie
+    assert classify_frequency(percentage / 100.0, quotient=True) == curie
+
+
+def test_classify_frequency_in_bulk():
+    percentages = np.array([0.0, 2.5, 17.0, 40.7, 90.0, 100.0, 120.0])
+
+    curies = classify_frequency(percentages)
+
+    assert list(curies) == ["HP:0040285", "HP:0040284", "HP:0040283", "HP:0040282", "HP:0040281", "HP:0040280", None]
+    assert list(classify_frequency(percentages / 100.0, quotient=True)) == list(curies)
+
+
+def test_map_percentage_frequency_to_hpo_term_between_bands():
+    assert map_percentage_frequency_to_hpo_term(79.5) == get_hpo_term("HP:0040282")
+    assert map_percentage_frequency_to_hpo_term(101.0) is None
+
+
+@pytest.mark.parametrize(
+    "raw_value, frequency_qualifier",
+    [
+        ("1/1", "HP:0040280"),
+        ("3/20", "HP:0040283"),
+        ("40.7%", "HP:0040282"),
+        ("0%", "HP:0040285"),
+        ("HP:0040284", "HP:0040284"),
+        ("1/0", None),
+    ],
+)
+def test_derived_frequency_qualifier(raw_value, frequency_qualifier):
+    assert phenotype_frequency_to_hpo_term(raw_value, derive_qualifier=True).frequency_qualifier == frequency_qualifier
+
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001 ! All
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005 ! Mode of inheritance
+"""
+
+
+@pytest.fixture
+def ontology_reads(monkeypatch):
+    """Count how often the ontology is actually parsed."""
+    reads = []
+    read_ontology = phenotype_ingest_utils.read_ontology_to_exclusion_terms
+
+    def counting_read(*args, **kwargs):
+        reads.append(args)
+        return read_ontology(*args, **kwargs)
+
+    monkeypatch.setattr(phenotype_ingest_utils, "read_ontology_to_exclusion_terms", counting_read)
+    return reads
+
+
+def test_read_ontology_terms_cached(tmp_path, ontology_reads):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(HP_OBO_FIXTURE)
+
+    first = read_ontology_terms_cached(obo, umbrella_term="HP:0000005", include=True)
+    second = read_ontology_terms_cached(obo, umbrella_term="HP:0000005", include=True)
+
+    # pronto counts the umbrella term as one of its own superclasses
+    assert first == second == {"HP:0000005": "Mode of inheritance", "HP:0000006": "Autosomal dominant inheritance"}
+    assert len(ontology_reads) == 1
+    assert (tmp_path / "hp.obo.closure.sqlite").exists()
+
+    excluded = read_ontology_terms_cached(obo, umbrella_term="HP:0000005", include=False)
+    assert excluded == phenotype_ingest_utils.read_ontology_to_exclusion_terms(str(obo), "HP:0000005", include=False)
+    assert len(ontology_reads) == 3
+
+
+def test_read_ontology_terms_cached_invalidated_by_content(tmp_path, ontology_reads):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(HP_OBO_FIXTURE)
+    read_ontology_terms_cached(obo, umbrella_term="HP:0000005", include=True)
+
+    obo.write_text(HP_OBO_FIXTURE + """
+[Term]
+id: HP:0000007
+name: Autosomal recessive inheritance
+is_a: HP:0000005 ! Mode of inheritance
+""")
+    terms = read_ontology_terms_cached(obo, umbrella_term="HP:0000005", include=True)
+
+    assert set(terms) == {"HP:0000005", "HP:0000006", "HP:0000007"}
+    assert len(ontology_reads) == 2
+
+
+DIAMOND_OBO_FIXTURE = HP_OBO_FIXTURE + """
+[Term]
+id: HP:0000118
+name: Phenotypic abnormality
+is_a: HP:0000001 ! All
+
+[Term]
+id: HP:0000007
+name: Both
+is_a: HP:0000006 {source="PMID:1"} ! Autosomal dominant inheritance
+is_a: HP:0000118 ! Phenotypic abnormality
+
+[Term]
+id: HP:0000008
+name: Obsolete term
+is_obsolete: true
+
+[Typedef]
+id: part_of
+name: part of
+"""
+
+
+@pytest.mark.parametrize("umbrella_term", ["HP:0000001", "HP:0000005", "HP:0000118"])
+@pytest.mark.parametrize("include", [True, False])
+def test_is_a_graph_matches_pronto(tmp_path, umbrella_term, include):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(DIAMOND_OBO_FIXTURE)
+
+    expected = {
+        term.id: term.name
+        for term in Ontology(str(obo)).terms()
+        if (umbrella_term in {ancestor.id for ancestor in term.superclasses()}) == include
+    }
+    assert IsAGraph.from_obo(obo).split_terms(umbrella_term, include) == expected
+
+
+def test_is_a_graph_descendants_of_several_terms(tmp_path):
+    obo = tmp_path / "hp.obo"
+    obo.write_text(DIAMOND_OBO_FIXTURE)
+
+    assert IsAGraph.from_obo(obo).descendants(["HP:0000005", "HP:0000118", "HP:9999999"]) == {
+        "HP:0000005": {"HP:0000005", "HP:0000006", "HP:0000007"},
+        "HP:0000118": {"HP:0000118", "HP:0000007"},
+        "HP:9999999": set(),
+    }
+
+
+def test_is_a_graph_rejects_cycles():
+    graph = IsAGraph({"A": None, "B": None}, {"A": ["B"], "B": ["A"]})
+    with pytest.raises(ValueError, match="cycle"):
+        graph.descendants(["A"])
@@ -0,0 +1,84 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from kghub_downloader import download_utils
+
+from src.pipeline import PipelineError, Task, download, ingest_tasks, run_tasks
+
+
+# Task functions run in worker processes, so they live at module level
+def touch(path: str, *required: str):
+    for dependency in required:
+        assert Path(dependency).exists(), f"{dependency} not written before {path}"
+    Path(path).touch()
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+def test_run_tasks_respects_dependencies(tmp_path):
+    a, b, c, d = (str(tmp_path / name) for name in "abcd")
+    tasks = [
+        Task("d", touch, (d, b, c), depends_on=("b", "c")),
+        Task("a", touch, (a,)),
+        Task("b", touch, (b, a), depends_on=("a",)),
+        Task("c", touch, (c, a), depends_on=("a",)),
+    ]
+
+    timings = run_tasks(tasks, max_workers=2)
+
+    assert set(timings) == {"a", "b", "c", "d"}
+    assert list(timings)[0] == "a"
+    assert list(timings)[-1] == "d"
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_run_tasks_fails_fast(tmp_path):
+    downstream = tmp_path / "downstream"
+    tasks = [
+        Task("upstream", fail),
+        Task("downstream", touch, (str(downstream),), depends_on=("upstream",)),
+    ]
+
+    with pytest.raises(PipelineError, match="upstream"):
+        run_tasks(tasks, max_workers=2)
+    assert not downstream.exists()
+
+
+@pytest.mark.parametrize(
+    "tasks, message",
+    [
+        ([Task("a", fail, depends_on=("b",)), Task("b", fail, depends_on=("a",))], "cycle"),
+        ([Task("a", fail, depends_on=("missing",))], "unknown"),
+        ([Task("a", fail), Task("a", fail)], "Duplicate"),
+    ],
+)
+def test_run_tasks_rejects_bad_graphs(tasks, message):
+    with pytest.raises(ValueError, match=message):
+        run_tasks(tasks)
+
+
+def test_ingest_tasks_graph():
+    depends_on = {task.name: task.depends_on for task in ingest_tasks()}
+    assert depends_on == {
+        "download": (),
+        "preprocess": ("download",),
+        "gene_to_phenotype_transform": ("preprocess",),
+        "gene_to_disease_transform": ("download",),
+        "hpoa_fanout": ("download",),
+    }
+
+
+@pytest.mark.parametrize("report", [None, SimpleNamespace(failed=[])])
+def test_download_accepts_either_downloader_return(monkeypatch, report):
+    # kghub-downloader 0.4 returns None, 0.5 a DownloadReport
+    monkeypatch.setattr(download_utils, "download_from_yaml", lambda **kwargs: report)
+    download()
+
+
+def test_download_raises_on_failed_files(monkeypatch):
+    monkeypatch.setattr(download_utils, "download_from_yaml", lambda **kwargs: SimpleNamespace(failed=["hp.obo"]))
+    with pytest.raises(RuntimeError, match="Failed to download 1 file"):
+        download()
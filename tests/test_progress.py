@@ -0,0 +1,151 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from koza.model.formats import OutputFormat
+from koza.model.reader import CSVReaderConfig
+from koza.runner import KozaRunner
+
+from src import progress as progress_module
+from src.hpoa_fanout import run_hpoa_fanout
+from src.input_rows import InputRows
+from src.parquet_io import read_runner_input
+from src.progress import Progress, ProgressOptions, track_runner
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+HPOA_FIXTURE = """\
+#description: "HPO annotations for rare diseases [2: OMIM]"
+#version: 2026-01-08
+#tracker: https://github.com/obophenotype/human-phenotype-ontology/issues
+#hpo-version: http://purl.obolibrary.org/obo/hp/releases/2026-01-08/hp.json
+database_id\tdisease_name\tqualifier\thpo_id\treference\tevidence\tonset\tfrequency\tsex\tmodifier\taspect\tbiocuration
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0001249\tOMIM:117650\tTAS\t\t50%\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:117650\tCerebrocostomandibular syndrome\t\tHP:0000347\tOMIM:117650\tTAS\t\t3/10\t\t\tP\tHPO:probinson[2009-02-17]
+OMIM:300425\tAutism susceptibility, X-linked 1\t\tHP:0000006\tOMIM:300425\tIEA\t\t\t\t\tI\tHPO:iea[2009-02-17]
+OMIM:614856\tOsteogenesis imperfecta, type XIII\t\tHP:0003593\tOMIM:614856\tTAS\t\t\t\t\tC\tHPO:skoehler[2012-11-16]
+"""
+
+HP_OBO_FIXTURE = """\
+format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000005
+name: Mode of inheritance
+is_a: HP:0000001
+
+[Term]
+id: HP:0000006
+name: Autosomal dominant inheritance
+is_a: HP:0000005
+"""
+
+GENES_TO_DISEASE = """\
+ncbi_gene_id\tgene_symbol\tassociation_type\tdisease_id\tsource
+NCBIGene:8192\tCLPP\tMENDELIAN\tORPHA:79474\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:9839\tZEB2\tMENDELIAN\tORPHA:2126\thttps://www.orphadata.com/data/xml/en_product6.xml
+NCBIGene:100\tADA\tMENDELIAN\tOMIM:102700\tftp://ftp.ncbi.nlm.nih.gov/gene/DATA/mim2gene_medgen
+"""
+
+
+def _rows(path: Path) -> InputRows:
+    config = CSVReaderConfig(files=[str(path)], delimiter="\t", columns=["a", "b"], header_mode="none")
+    return InputRows(config, path.parent)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_progress_estimates_from_byte_offsets(tmp_path, compressed):
+    content = "".join(f"{i}\tvalue {i}\n" for i in range(200000))
+    path = tmp_path / ("rows.tsv.gz" if compressed else "rows.tsv")
+    if compressed:
+        path.write_bytes(gzip.compress(content.encode()))
+    else:
+        path.write_text(content)
+    rows = _rows(path)
+    progress = Progress("rows", ProgressOptions(interval=0), rows)
+
+    assert progress.bytes_read() is None
+    for i, _ in enumerate(rows):
+        progress.update(i % 2)
+        if i == 100000:
+            done, total = progress.bytes_read()
+            snapshot = progress.snapshot()
+            break
+
+    assert total == path.stat().st_size
+    assert 0.3 < done / total < 0.7
+    assert snapshot["rows_read_total"] == 100001
+    assert snapshot["rows_emitted_total"] == 50000
+    assert snapshot["rows_without_edges_total"] == 50001
+    assert snapshot["eta_seconds"] >= 0
+
+
+def test_progress_reports_at_intervals(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress_module, "CHECK_EVERY", 2)
+    progress = Progress("rows", ProgressOptions(interval=1e-9, metrics_dir=str(tmp_path), metrics_format="jsonl"))
+
+    for _ in range(5):
+        progress.update(1)
+    final = progress.close()
+
+    reports = [json.loads(line) for line in (tmp_path / "rows.jsonl").read_text().splitlines()]
+    assert [report["rows_read_total"] for report in reports] == [2, 4, 5]
+    assert [report["finished"] for report in reports] == [0, 0, 1]
+    assert final == reports[-1]
+    assert "eta_seconds" not in final
+
+
+def test_fanout_writes_prometheus_metrics(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "hp.obo").write_text(HP_OBO_FIXTURE)
+    hpoa_file = tmp_path / "data" / "phenotype.hpoa"
+    hpoa_file.write_text(HPOA_FIXTURE)
+    monkeypatch.chdir(tmp_path)
+
+    run_hpoa_fanout(
+        output_dir=str(tmp_path / "output"),
+        input_files=[str(hpoa_file)],
+        progress=ProgressOptions(metrics_dir=str(tmp_path / "metrics")),
+    )
+
+    metrics = (tmp_path / "metrics" / "hpoa_fanout.prom").read_text()
+    assert "# TYPE ingest_rows_read_total counter" in metrics
+    assert 'ingest_rows_read_total{transform="hpoa_fanout"} 4' in metrics
+    # Two P rows and the I row produce edges; the C row is read by neither transform
+    assert 'ingest_rows_emitted_total{transform="hpoa_fanout"} 3' in metrics
+    assert 'ingest_rows_without_edges_total{transform="hpoa_fanout"} 1' in metrics
+    assert 'ingest_finished{transform="hpoa_fanout"} 1' in metrics
+
+
+def test_track_runner(tmp_path):
+    input_file = tmp_path / "genes_to_disease.txt"
+    input_file.write_text(GENES_TO_DISEASE)
+    config, runner = KozaRunner.from_config_file(
+        str(SRC_DIR / "gene_to_disease_transform.yaml"),
+        output_format=OutputFormat.passthrough,
+        input_files=[str(input_file)],
+    )
+
+    tracker = track_runner(runner, config.name, ProgressOptions(interval=0))
+    assert tracker.rows is None
+    rows = read_runner_input(runner, config.reader)
+    tracker = track_runner(runner, config.name, ProgressOptions(interval=0))
+    assert tracker.rows is rows
+    runner.run()
+    final = tracker.close()
+
+    # The reader drops the mim2gene_medgen row
+    assert final["rows_read_total"] == 3
+    assert final["rows_dropped_total"] == 1
+    assert (final["rows_emitted_total"], final["rows_without_edges_total"]) == (2, 0)
+
+
+def test_progress_options_reject_unknown_formats():
+    with pytest.raises(ValueError, match="Unknown metrics format"):
+        ProgressOptions(metrics_format="csv")
@@ -11,6 +11,7 @@ from pathlib import Path
 import pytest
 
 from src import versions
+from src.hpoa_stats import HpoaStats
 
 
 HPOA_FIXTURE = """\
@@ -108,3 +109,24 @@ def test_hpoa_sub_sources_returns_empty_when_no_description_header(tmp_path: Pat
     sources = versions._hpoa_sub_sources(p, hpoa_url="http://x", hpoa_version="2026-01-08", now="2026-05-07T00:00:00Z")
 
     assert sources == []
+
+
+def test_scan_hpoa_reads_stats_sidecar(hpoa_file: Path):
+    """A sidecar written by the transforms is used instead of re-reading the rows."""
+    stats = HpoaStats()
+    stats.add("DECIPHER:1", "HPO:skoehler[2014-01-01]")
+    stats.write(hpoa_file)
+
+    description, max_dates = versions._scan_hpoa(hpoa_file)
+
+    assert "[10: OMIM; 2: DECIPHER; 5 ORPHANET]" in description
+    assert max_dates == {"DECIPHER": "2014-01-01"}
+
+
+def test_scan_hpoa_ignores_stale_stats_sidecar(hpoa_file: Path):
+    HpoaStats().write(hpoa_file)
+    hpoa_file.write_text(HPOA_FIXTURE + "OMIM:1\tNew\t\tHP:0008\t\tIEA\t\t\t\t\tP\tHPO:x[2026-02-01]\n")
+
+    _, max_dates = versions._scan_hpoa(hpoa_file)
+
+    assert max_dates["OMIM"] == "2026-02-01"